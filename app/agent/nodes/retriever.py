@@ -1,57 +1,195 @@
+import asyncio
+import logging
+import time
+
+import numpy as np
+
 from app.agent.state import AgentState
-from app.core.chroma import get_collection
+from app.core import vector_store
+from app.core.config import settings
 from app.services.embedder import get_embedder
 
+logger = logging.getLogger(__name__)
+
 _SOURCE_COLLECTIONS = {
     "pdf": "pdf_chunks",
     "youtube": "youtube_chunks",
     "web": "web_chunks",
 }
-N_RESULTS = 5
+
+
+def rank_chunks(
+    chunks: list[dict],
+    top_k: int,
+    max_distance: float,
+    max_gap: float,
+    min_k: int = 1,
+) -> list[dict]:
+    """Rank chunks from every collection together and cut the list adaptively.
+
+    Chroma's cosine distances (0 = same direction, 2 = opposite) are scaled
+    to 0–1 as ``norm_distance``. Duplicated text keeps its closest copy. The
+    ranked list stops at ``top_k``, at the first chunk farther than
+    ``max_distance``, or where the distance jumps by more than ``max_gap``
+    from the previous chunk — whichever comes first — but never below
+    ``min_k`` chunks. A threshold of 0 disables that cut.
+    """
+    best: dict[str, dict] = {}
+    for chunk in chunks:
+        chunk = {**chunk, "norm_distance": min(max(chunk["distance"], 0.0), 2.0) / 2}
+        kept = best.get(chunk["text"])
+        if kept is None or chunk["norm_distance"] < kept["norm_distance"]:
+            best[chunk["text"]] = chunk
+    ranked = sorted(best.values(), key=lambda c: c["norm_distance"])
+
+    selected: list[dict] = []
+    for chunk in ranked[: top_k or None]:
+        if len(selected) >= min_k:
+            if max_distance and chunk["norm_distance"] > max_distance:
+                break
+            if max_gap and chunk["norm_distance"] - selected[-1]["norm_distance"] > max_gap:
+                break
+        selected.append(chunk)
+    return selected
+
+
+def mmr_select(
+    query: np.ndarray,
+    vectors: np.ndarray,
+    k: int,
+    lambda_: float,
+    duplicate_similarity: float = 1.0,
+) -> list[int]:
+    """Maximal marginal relevance: indices of up to ``k`` rows of ``vectors``, in pick order.
+
+    Each step takes the candidate maximising ``lambda_ * sim(query) - (1 - lambda_) * max
+    sim(selected)``; the running max is updated with one vectorised row per pick. Candidates
+    at least ``duplicate_similarity`` similar to a pick are dropped as near-duplicates.
+    """
+    if not len(vectors) or k <= 0:
+        return []
+    v = vectors.astype(np.float32)
+    v /= np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+    q = query.astype(np.float32)
+    q /= max(float(np.linalg.norm(q)), 1e-12)
+    relevance = v @ q
+    redundancy = np.full(len(v), -np.inf, dtype=np.float32)
+    available = np.ones(len(v), dtype=bool)
+    picked: list[int] = []
+    while len(picked) < k and available.any():
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(available, lambda_ * relevance - (1 - lambda_) * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, v @ v[best])
+        available &= redundancy < duplicate_similarity
+    return picked
+
+
+def _diversify(query_emb: list[float], chunks: list[dict], k: int) -> list[dict]:
+    """Reorder and thin ``chunks`` (which carry an ``embedding``) with MMR."""
+    with_vectors = [c for c in chunks if c.get("embedding") is not None]
+    if not with_vectors:
+        return chunks[:k]
+    order = mmr_select(
+        np.asarray(query_emb, dtype=np.float32),
+        np.asarray([c["embedding"] for c in with_vectors], dtype=np.float32),
+        k,
+        settings.retrieval_mmr_lambda,
+        settings.retrieval_mmr_duplicate_similarity,
+    )
+    return [with_vectors[i] for i in order]
+
+
+async def _search(source: str, collection_name: str, query_emb: list[float], source_ids: list[str]) -> list[dict]:
+    kwargs: dict = {
+        "query_embeddings": [query_emb],
+        # Enough candidates per collection that the global top-k could all come from one;
+        # MMR picks from a larger pool.
+        "n_results": max(1, settings.retrieval_mmr_pool if settings.retrieval_mmr else settings.retrieval_top_k),
+        "include": ["documents", "metadatas", "distances"],
+    }
+    if settings.retrieval_mmr:
+        kwargs["include"].append("embeddings")
+    if source_ids:
+        kwargs["where"] = {"source_id": {"$in": source_ids}}
+    results = await vector_store.query(collection_name, **kwargs)
+    chunks = [
+        {"text": doc, "metadata": meta, "source_type": source, "distance": dist}
+        for doc, meta, dist in zip(
+            results["documents"][0],
+            results["metadatas"][0],
+            results["distances"][0],
+        )
+    ]
+    embeddings = results.get("embeddings") if settings.retrieval_mmr else None
+    if embeddings is not None and len(embeddings):
+        for chunk, emb in zip(chunks, embeddings[0]):
+            chunk["embedding"] = emb
+    return chunks
+
+
+async def _timed_search(source: str, *args) -> tuple[str, list[dict] | None, dict]:
+    """Run one collection's search under its own timeout; never raises."""
+    start = time.perf_counter()
+    chunks, status = None, "ok"
+    try:
+        chunks = await asyncio.wait_for(_search(source, *args), settings.retrieval_timeout_seconds or None)
+    except asyncio.TimeoutError:
+        status = "timeout"
+    except Exception as exc:
+        status = "error"
+        logger.warning("retrieval from %s failed: %s", source, exc)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    return source, chunks, {"status": status, "ms": elapsed_ms, "chunks": len(chunks or [])}
 
 
 async def retriever_node(state: AgentState) -> dict:
     embedder = get_embedder()
     if not embedder:
-        return {"retrieved_chunks": []}
+        return {"retrieved_chunks": [], "retrieval_stats": {}}
 
-    query_emb = embedder.embed_query(state["query"]).tolist()
+    # ONNX inference (and the embedding cache's SQLite lookup) would otherwise block the event loop.
+    loop = asyncio.get_running_loop()
+    query_emb = (await loop.run_in_executor(None, embedder.embed_query, state["query"])).tolist()
     source_ids = state.get("source_ids") or []
-    all_chunks: list[dict] = []
-
-    for source in state["sources_to_use"]:
-        collection_name = _SOURCE_COLLECTIONS.get(source)
-        if not collection_name:
-            continue
-        try:
-            collection = get_collection(collection_name)
-            kwargs: dict = {
-                "query_embeddings": [query_emb],
-                "n_results": N_RESULTS,
-                "include": ["documents", "metadatas", "distances"],
-            }
-            if source_ids:
-                kwargs["where"] = {"source_id": {"$in": source_ids}}
-            results = collection.query(**kwargs)
-            for doc, meta, dist in zip(
-                results["documents"][0],
-                results["metadatas"][0],
-                results["distances"][0],
-            ):
-                all_chunks.append({
-                    "text": doc,
-                    "metadata": meta,
-                    "source_type": source,
-                    "distance": dist,
-                })
-        except Exception:
-            pass
-
-    seen: set[str] = set()
-    unique: list[dict] = []
-    for chunk in all_chunks:
-        if chunk["text"] not in seen:
-            seen.add(chunk["text"])
-            unique.append(chunk)
-
-    return {"retrieved_chunks": unique}
+    sources = [s for s in dict.fromkeys(state["sources_to_use"]) if s in _SOURCE_COLLECTIONS]
+
+    # All collections are searched at once; results are merged as each one answers,
+    # so retrieval takes as long as the slowest search (capped by its timeout).
+    start = time.perf_counter()
+    per_source: dict[str, list[dict]] = {}
+    collections: dict[str, dict] = {}
+    searches = [_timed_search(s, _SOURCE_COLLECTIONS[s], query_emb, source_ids) for s in sources]
+    for done in asyncio.as_completed(searches):
+        source, chunks, stats = await done
+        collections[source] = stats
+        if chunks:
+            per_source[source] = chunks
+
+    stats = {"ms": round((time.perf_counter() - start) * 1000, 1), "collections": collections}
+    if collections:
+        slowest = max(collections, key=lambda s: collections[s]["ms"])
+        stats["slowest"] = slowest
+        slow = collections[slowest]
+        if slow["status"] == "timeout" or slow["ms"] >= settings.retrieval_slow_ms:
+            logger.warning("slow retrieval from %s: %s after %.0f ms", slowest, slow["status"], slow["ms"])
+
+    candidates = [chunk for source in sources for chunk in per_source.get(source, [])]
+    ranked = rank_chunks(
+        candidates,
+        top_k=0 if settings.retrieval_mmr else settings.retrieval_top_k,
+        max_distance=settings.retrieval_max_distance,
+        max_gap=settings.retrieval_max_gap,
+        min_k=settings.retrieval_min_k,
+    )
+    if settings.retrieval_mmr:
+        ranked = _diversify(query_emb, ranked, settings.retrieval_top_k or len(ranked))
+        for chunk in ranked:
+            chunk.pop("embedding", None)   # keep vectors out of the graph state
+    stats["candidates"] = len(candidates)
+    stats["chunks"] = len(ranked)
+    logger.info("retrieved %d of %d candidate chunks in %.0f ms", len(ranked), len(candidates), stats["ms"])
+
+    return {"retrieved_chunks": ranked, "retrieval_stats": stats}
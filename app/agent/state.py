@@ -7,6 +7,7 @@ class AgentState(TypedDict):
     sources_to_use: list[str]
     source_ids: list[str]          # empty = no filter; non-empty = restrict to these source_ids
     retrieved_chunks: list[dict]
+    retrieval_stats: dict          # per-collection status/latency of the last retrieval
     answer: str
     critic_feedback: str
     needs_replan: bool
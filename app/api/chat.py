@@ -60,6 +60,7 @@ async def chat(
         "sources_to_use": req.sources or ["pdf", "youtube", "web"],
         "source_ids": req.source_ids or [],
         "retrieved_chunks": [],
+        "retrieval_stats": {},
         "answer": "",
         "critic_feedback": "",
         "needs_replan": False,
@@ -81,5 +82,8 @@ async def chat(
     return StreamingResponse(
         sse_stream(),
         media_type="text/event-stream",
-        headers={"X-Conversation-Id": conv.id},
+        headers={
+            "X-Conversation-Id": conv.id,
+            "X-Retrieved-Chunks": str(len(final_state.get("retrieved_chunks") or [])),
+        },
     )
@@ -3,6 +3,10 @@ from datetime import datetime, timezone
 from fastapi import APIRouter
 
 from app.core.config import settings
+from app.core.vector_store import vector_store_stats
+from app.services.embedder import embedding_cache_stats
+from app.services.fetch_cache import fetch_cache_stats
+from app.services.ingestion.boilerplate import boilerplate_stats
 
 router = APIRouter()
 
@@ -10,8 +14,21 @@ router = APIRouter()
 @router.get("/health")
 async def health_check():
     """Health check endpoint to verify that the API is running."""
-    return {
+    body = {
         "status": "ok",
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "version": settings.version,
     }
+    cache_stats = embedding_cache_stats()
+    if cache_stats is not None:
+        body["embedding_cache"] = cache_stats
+    fetch_stats = fetch_cache_stats()
+    if fetch_stats is not None:
+        body["fetch_cache"] = fetch_stats
+    boilerplate = boilerplate_stats()
+    if boilerplate is not None:
+        body["boilerplate"] = boilerplate
+    store_stats = vector_store_stats()
+    if store_stats:
+        body["vector_store"] = store_stats
+    return body
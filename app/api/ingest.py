@@ -1,14 +1,25 @@
-import shutil
-import tempfile
-from pathlib import Path
+import json
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.core.chroma import get_collection
-from app.services.ingestion.pdf import ingest_pdf, SUPPORTED_TYPES
-from app.services.ingestion.youtube import ingest_youtube
-from app.services.ingestion.web import ingest_web
+from app.core import vector_store
+from app.core.config import settings
+from app.services.jobs import get_job_manager
+from app.services.ingestion.bulk import ingest_bulk_urls, ingest_bulk_zip, ingest_youtube_collection
+from app.services.ingestion.crawl import (
+    CrawlOptions,
+    create_crawl,
+    crawl_summary,
+    is_crawl_active,
+    run_crawl,
+)
+from app.services.ingestion.pdf import ingest_pdf, ingest_pdf_version, SUPPORTED_TYPES
+from app.services.ingestion.refresh import refresh_web_source
+from app.services.ingestion.upload import BadUpload, StagedUpload, UploadTooLarge, stage_request
+from app.services.ingestion.youtube import collection_ref, ingest_youtube
+from app.services.ingestion.web import ingest_web, scrape_times
 
 router = APIRouter()
 
@@ -17,45 +28,231 @@ class UrlRequest(BaseModel):
     url: str
 
 
+class BulkUrlRequest(BaseModel):
+    urls: list[str]
+
+
+class CrawlRequest(BaseModel):
+    url: str
+    max_depth: int | None = None
+    max_pages: int | None = None
+    allowed_hosts: list[str] = []
+    path_prefix: str = ""
+    respect_robots: bool = True
+    delay_seconds: float | None = None
+
+
+ZIP_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+
 class IngestResponse(BaseModel):
-    source_id: str
+    job_id: str
+    status: str
     message: str
 
 
-@router.post("/ingest/pdf", response_model=IngestResponse)
-async def ingest_pdf_endpoint(file: UploadFile = File(...)):
-    if file.content_type not in SUPPORTED_TYPES:
-        raise HTTPException(400, f"Unsupported file type: {file.content_type}")
+class CrawlResponse(IngestResponse):
+    crawl_id: str
 
-    suffix = Path(file.filename or "upload").suffix or ".bin"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
 
-    try:
-        source_id = await ingest_pdf(tmp_path, file.filename or "upload", file.content_type)
-    finally:
-        Path(tmp_path).unlink(missing_ok=True)
+def _accepted(job, message: str) -> IngestResponse:
+    return IngestResponse(job_id=job.id, status=job.status.value, message=message)
 
-    return IngestResponse(source_id=source_id, message=f"Ingested {file.filename}")
 
+# The upload endpoints read the multipart body themselves (see ``stage_request``);
+# this documents the form FastAPI no longer derives from a File() parameter.
+_FILE_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
 
-@router.post("/ingest/youtube", response_model=IngestResponse)
-async def ingest_youtube_endpoint(req: UrlRequest):
+
+async def _stage(request: Request, accept) -> StagedUpload:
     try:
-        source_id = await ingest_youtube(req.url)
-    except Exception as exc:
+        return await stage_request(request, accept=accept)
+    except UploadTooLarge as exc:
+        raise HTTPException(413, str(exc))
+    except BadUpload as exc:
         raise HTTPException(400, str(exc))
-    return IngestResponse(source_id=source_id, message=f"Ingested YouTube: {req.url}")
 
 
-@router.post("/ingest/web", response_model=IngestResponse)
+def _accept_document(filename: str, content_type: str) -> None:
+    if content_type not in SUPPORTED_TYPES:
+        raise HTTPException(400, f"Unsupported file type: {content_type}")
+
+
+def _accept_zip(filename: str, content_type: str) -> None:
+    if content_type not in ZIP_TYPES and not filename.lower().endswith(".zip"):
+        raise HTTPException(400, f"Expected a zip archive, got: {content_type}")
+
+
+def _submit_crawl(crawl_id: str, label: str):
+    return get_job_manager().submit(
+        "crawl", label, lambda progress: run_crawl(crawl_id, progress=progress)
+    )
+
+
+@router.post("/ingest/pdf", response_model=IngestResponse, status_code=202, openapi_extra=_FILE_FORM)
+async def ingest_pdf_endpoint(request: Request):
+    staged = await _stage(request, _accept_document)
+
+    filename, content_type = staged.filename or "upload", staged.content_type
+    job = get_job_manager().submit(
+        "pdf",
+        filename,
+        lambda progress: ingest_pdf(
+            staged.source, filename, content_type, progress=progress, file_hash=staged.sha256
+        ),
+        cleanup=staged.cleanup,
+    )
+    return _accepted(job, f"Queued {filename}")
+
+
+@router.post(
+    "/ingest/pdf/{source_id}/versions", response_model=IngestResponse, status_code=202, openapi_extra=_FILE_FORM
+)
+async def ingest_pdf_version_endpoint(source_id: str, request: Request):
+    found = await vector_store.get("pdf_chunks", where={"source_id": source_id}, limit=1, include=[])
+    if not found["ids"]:
+        raise HTTPException(404, f"Document source {source_id} not found")
+
+    staged = await _stage(request, _accept_document)
+
+    filename, content_type = staged.filename or "upload", staged.content_type
+    job = get_job_manager().submit(
+        "pdf",
+        filename,
+        lambda progress: ingest_pdf_version(
+            source_id, staged.source, filename, content_type, progress=progress, file_hash=staged.sha256
+        ),
+        cleanup=staged.cleanup,
+    )
+    return _accepted(job, f"Queued new version of {source_id}: {filename}")
+
+
+@router.post("/ingest/youtube", response_model=IngestResponse, status_code=202)
+async def ingest_youtube_endpoint(req: UrlRequest):
+    ref = collection_ref(req.url)
+    if ref is not None:
+        job = get_job_manager().submit(
+            "bulk", req.url, lambda progress: ingest_youtube_collection(req.url, progress=progress)
+        )
+        return _accepted(job, f"Queued YouTube {ref[0]}: {req.url}")
+    job = get_job_manager().submit(
+        "youtube", req.url, lambda progress: ingest_youtube(req.url, progress=progress)
+    )
+    return _accepted(job, f"Queued YouTube: {req.url}")
+
+
+@router.post("/ingest/web", response_model=IngestResponse, status_code=202)
 async def ingest_web_endpoint(req: UrlRequest):
-    try:
-        source_id = await ingest_web(req.url)
-    except Exception as exc:
-        raise HTTPException(400, str(exc))
-    return IngestResponse(source_id=source_id, message=f"Ingested web: {req.url}")
+    job = get_job_manager().submit(
+        "web", req.url, lambda progress: ingest_web(req.url, progress=progress)
+    )
+    return _accepted(job, f"Queued web: {req.url}")
+
+
+@router.post("/ingest/bulk", response_model=IngestResponse, status_code=202)
+async def ingest_bulk_endpoint(req: BulkUrlRequest):
+    urls = list(dict.fromkeys(u.strip() for u in req.urls if u.strip()))
+    if not urls:
+        raise HTTPException(400, "No URLs given")
+    if len(urls) > settings.bulk_max_items:
+        raise HTTPException(400, f"At most {settings.bulk_max_items} URLs per request")
+    job = get_job_manager().submit(
+        "bulk", f"{len(urls)} URLs", lambda progress: ingest_bulk_urls(urls, progress=progress)
+    )
+    return _accepted(job, f"Queued {len(urls)} URLs")
+
+
+@router.post("/ingest/bulk/zip", response_model=IngestResponse, status_code=202, openapi_extra=_FILE_FORM)
+async def ingest_bulk_zip_endpoint(request: Request):
+    staged = await _stage(request, _accept_zip)
+
+    filename = staged.filename or "upload.zip"
+    job = get_job_manager().submit(
+        "bulk",
+        filename,
+        lambda progress: ingest_bulk_zip(staged.source, progress=progress),
+        cleanup=staged.cleanup,
+    )
+    return _accepted(job, f"Queued {filename}")
+
+
+@router.post("/ingest/crawl", response_model=CrawlResponse, status_code=202)
+async def ingest_crawl_endpoint(req: CrawlRequest):
+    overrides = {
+        k: v for k, v in req.model_dump(exclude={"url"}).items() if v is not None
+    }
+    options = CrawlOptions(**overrides)
+    if options.max_pages > settings.crawl_max_pages:
+        raise HTTPException(400, f"At most {settings.crawl_max_pages} pages per crawl")
+    crawl_id = await create_crawl(req.url, options)
+    job = _submit_crawl(crawl_id, f"crawl {req.url}")
+    return CrawlResponse(
+        job_id=job.id, status=job.status.value, message=f"Queued crawl: {req.url}", crawl_id=crawl_id
+    )
+
+
+@router.post("/ingest/crawls/{crawl_id}/resume", response_model=CrawlResponse, status_code=202)
+async def resume_crawl_endpoint(crawl_id: str):
+    summary = await crawl_summary(crawl_id)
+    if summary is None:
+        raise HTTPException(404, f"Crawl {crawl_id} not found")
+    if is_crawl_active(crawl_id):
+        raise HTTPException(409, f"Crawl {crawl_id} is already running")
+    job = _submit_crawl(crawl_id, f"crawl {summary['root_url']} (resumed)")
+    return CrawlResponse(
+        job_id=job.id, status=job.status.value, message=f"Resumed crawl: {summary['root_url']}", crawl_id=crawl_id
+    )
+
+
+@router.get("/ingest/crawls/{crawl_id}")
+async def get_crawl(crawl_id: str):
+    summary = await crawl_summary(crawl_id)
+    if summary is None:
+        raise HTTPException(404, f"Crawl {crawl_id} not found")
+    return summary
+
+
+@router.get("/ingest/jobs")
+async def list_jobs(limit: int = 50):
+    manager = get_job_manager()
+    return {
+        "jobs": [job.to_dict() for job in manager.recent(limit)],
+        "metrics": manager.metrics(),
+    }
+
+
+@router.get("/ingest/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@router.get("/ingest/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    manager = get_job_manager()
+    if manager.get(job_id) is None:
+        raise HTTPException(404, f"Job {job_id} not found")
+
+    async def events():
+        async for snapshot in manager.watch(job_id):
+            yield f"data: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 
 @router.get("/sources")
@@ -63,8 +260,7 @@ async def list_sources():
     sources = []
     for name in ("pdf_chunks", "youtube_chunks", "web_chunks"):
         try:
-            col = get_collection(name)
-            results = col.get(include=["metadatas"])
+            results = await vector_store.get(name, include=["metadatas"])
             seen_ids: set[str] = set()
             for meta in results["metadatas"]:
                 sid = meta.get("source_id")
@@ -81,18 +277,29 @@ async def list_sources():
     return {"sources": sources}
 
 
+@router.post("/sources/{source_id}/refresh", response_model=IngestResponse, status_code=202)
+async def refresh_source(source_id: str):
+    found = await vector_store.get("web_chunks", where={"source_id": source_id}, limit=1, include=[])
+    if not found["ids"]:
+        raise HTTPException(404, f"Web source {source_id} not found")
+    job = get_job_manager().submit(
+        "refresh", source_id, lambda progress: refresh_web_source(source_id, progress=progress)
+    )
+    return _accepted(job, f"Queued refresh of {source_id}")
+
+
 @router.delete("/sources/{source_id}")
 async def delete_source(source_id: str):
     deleted = False
     for name in ("pdf_chunks", "youtube_chunks", "web_chunks"):
         try:
-            col = get_collection(name)
-            results = col.get(where={"source_id": source_id}, include=[])
+            results = await vector_store.get(name, where={"source_id": source_id}, include=[])
             if results["ids"]:
-                col.delete(ids=results["ids"])
+                await vector_store.delete(name, ids=results["ids"])
                 deleted = True
         except Exception:
             pass
     if not deleted:
         raise HTTPException(404, f"Source {source_id} not found")
+    scrape_times.forget(source_id)
     return {"message": f"Deleted source {source_id}"}
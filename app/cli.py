@@ -0,0 +1,313 @@
+"""
+Command-line ingestion of a local directory.
+
+    python -m app.cli ingest <dir> [--workers N] [--manifest PATH] [--watch] [--interval S]
+
+Walks ``<dir>`` for PDF, DOCX, text and Markdown files and keeps the document
+index in sync with it. A JSON manifest records each file's size, mtime,
+sha256 and source_id:
+
+- files whose size and mtime are unchanged are skipped without being read;
+- new files are ingested;
+- changed files are uploaded as a new version of their source, so only
+  changed pages are re-embedded;
+- a file moved or renamed (its bytes reappear under a new path) keeps its
+  source; only the stored filename changes;
+- the sources of deleted files are removed from the index, after the new
+  and changed files are in.
+
+Files are ingested on ``--workers`` processes, each doing its own
+extraction and embedding. With ``VECTOR_BACKEND=local`` the index belongs to
+one process, so ingestion runs in this one and the command exits at once if
+another process (such as the API server) has the index open. ``--watch`` keeps rescanning every
+``--interval`` seconds; files modified within the last ``--settle`` seconds
+are left for a later pass so half-written copies are never ingested.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.core import vector_store
+from app.core.chroma import get_collection
+from app.core.config import settings
+from app.services.ingestion.bulk import _EXTENSION_TYPES
+from app.services.ingestion.dedup import hash_file
+from app.services.ingestion.pdf import COLLECTION, ingest_pdf, ingest_pdf_version
+
+logger = logging.getLogger("app.cli")
+
+MANIFEST_NAME = ".docchat-manifest.json"
+
+
+@dataclass
+class SyncPlan:
+    new: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    unsettled: int = 0
+    # Files whose mtime moved but whose bytes did not: only the manifest changes.
+    touched: dict[str, dict] = field(default_factory=dict)
+    hashes: dict[str, str] = field(default_factory=dict)
+
+
+def load_manifest(path: Path) -> dict[str, dict]:
+    if not path.is_file():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("files", {})
+
+
+def save_manifest(path: Path, files: dict[str, dict]) -> None:
+    """Write atomically so an interrupted sync never leaves a truncated manifest."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": 1, "files": files}, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def scan(root: Path, manifest_path: Path) -> dict[str, os.stat_result]:
+    """Supported files under ``root`` by POSIX-style relative path, skipping hidden ones."""
+    found = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            path = Path(dirpath) / name
+            if name.startswith(".") or path == manifest_path or path.suffix.lower() not in _EXTENSION_TYPES:
+                continue
+            found[path.relative_to(root).as_posix()] = path.stat()
+    return found
+
+
+def plan_sync(root: Path, manifest: dict[str, dict], files: dict[str, os.stat_result], settle: float) -> SyncPlan:
+    plan = SyncPlan()
+    now = time.time()
+    to_hash = []
+    for rel, st in files.items():
+        entry = manifest.get(rel)
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            plan.unchanged += 1
+        elif now - st.st_mtime < settle:
+            plan.unsettled += 1
+        else:
+            to_hash.append(rel)
+    with ThreadPoolExecutor() as pool:
+        for rel, digest in zip(to_hash, pool.map(lambda r: hash_file(root / r), to_hash)):
+            plan.hashes[rel] = digest
+            entry = manifest.get(rel)
+            if entry is None:
+                plan.new.append(rel)
+            elif entry["sha256"] == digest:
+                st = files[rel]
+                plan.touched[rel] = {**entry, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            else:
+                plan.changed.append(rel)
+    plan.removed = [rel for rel in manifest if rel not in files]
+    return plan
+
+
+def _init_worker() -> None:
+    # Files are the unit of parallelism here; no nested pools inside a worker.
+    settings.pdf_extract_workers = 0
+    settings.ocr_workers = 0
+    settings.web_parse_workers = 0
+
+
+def ingest_file(root: str, rel: str, sha256: str, source_id: str | None) -> dict:
+    """Ingest one file (a new version of ``source_id`` when given). Runs in a worker process."""
+    path = Path(root) / rel
+    content_type = _EXTENSION_TYPES[path.suffix.lower()]
+
+    async def run() -> dict:
+        if source_id:
+            try:
+                summary = await ingest_pdf_version(source_id, path, path.name, content_type, file_hash=sha256)
+                return {"source_id": source_id, "version": summary["version"]}
+            except ValueError:
+                pass   # the source was deleted from the index meanwhile: ingest afresh
+        return {"source_id": await ingest_pdf(path, path.name, content_type, file_hash=sha256)}
+
+    return asyncio.run(run())
+
+
+def _delete_source(source_id: str) -> None:
+    collection = get_collection(COLLECTION)
+    ids = vector_store.call(collection, "get", where={"source_id": source_id}, include=[])["ids"]
+    if ids:
+        vector_store.call(collection, "delete", ids=ids)
+
+
+def _rename_source(source_id: str, filename: str) -> None:
+    """Point a moved file's chunks at its new name; the text and embeddings stay."""
+    collection = get_collection(COLLECTION)
+    res = vector_store.call(collection, "get", where={"source_id": source_id}, include=["metadatas"])
+    stale = [(cid, meta or {}) for cid, meta in zip(res["ids"], res["metadatas"])
+             if (meta or {}).get("filename") != filename]
+    if stale:
+        vector_store.call(collection, "update", ids=[cid for cid, _ in stale],
+                          metadatas=[{**meta, "filename": filename} for _, meta in stale])
+
+
+def sync(root: Path, manifest_path: Path, workers: int = 1, settle: float = 0.0) -> dict:
+    """One pass: bring the index in line with ``root``. Returns counts per outcome."""
+    manifest = load_manifest(manifest_path)
+    files = scan(root, manifest_path)
+    plan = plan_sync(root, manifest, files, settle)
+    counts = {"new": 0, "changed": 0, "moved": 0, "removed": 0, "unchanged": plan.unchanged,
+              "unsettled": plan.unsettled, "failed": 0}
+
+    manifest.update(plan.touched)
+    save_manifest(manifest_path, manifest)
+
+    def record(rel: str, kind: str, outcome: dict) -> None:
+        st = files[rel]
+        manifest[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                         "sha256": plan.hashes[rel], "source_id": outcome["source_id"]}
+        save_manifest(manifest_path, manifest)
+        counts[kind] += 1
+        logger.info("%s %s -> %s", kind, rel, outcome["source_id"])
+
+    def failed(rel: str, exc: BaseException) -> None:
+        counts["failed"] += 1
+        logger.error("failed %s: %s", rel, exc)
+
+    # Removed entries stay in the manifest until their sources are deleted, after ingestion,
+    # so an interrupted sync never forgets a source it has not cleaned up.
+    removed = list(plan.removed)
+    by_hash: dict[str, list[str]] = {}
+    for rel in removed:
+        by_hash.setdefault(manifest[rel]["sha256"], []).append(rel)
+
+    # A new path with the bytes of a removed one is a move: keep the source, fix its filename.
+    for rel in list(plan.new):
+        candidates = by_hash.get(plan.hashes[rel])
+        if not candidates:
+            continue
+        old = candidates.pop(0)
+        source_id = manifest[old]["source_id"]
+        try:
+            _rename_source(source_id, Path(rel).name)
+        except Exception as exc:
+            # Ingesting it as new still lands on the same source: dedup finds it by hash.
+            logger.warning("could not rename %s -> %s: %s", old, rel, exc)
+            continue
+        removed.remove(old)
+        plan.new.remove(rel)
+        del manifest[old]
+        record(rel, "moved", {"source_id": source_id})
+
+    def version_of(rel: str) -> str | None:
+        # A source shared with an identical file is left alone; the edited copy becomes its own source.
+        source_id = manifest[rel].get("source_id")
+        shared = any(e.get("source_id") == source_id for r, e in manifest.items() if r != rel and r not in removed)
+        return None if shared else source_id
+
+    jobs = [(rel, "new", None) for rel in plan.new]
+    jobs += [(rel, "changed", version_of(rel)) for rel in plan.changed]
+
+    if workers <= 1:
+        for rel, kind, source_id in jobs:
+            try:
+                record(rel, kind, ingest_file(str(root), rel, plan.hashes[rel], source_id))
+            except Exception as exc:
+                failed(rel, exc)
+    elif jobs:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        ) as pool:
+            futures = {
+                pool.submit(ingest_file, str(root), rel, plan.hashes[rel], source_id): (rel, kind)
+                for rel, kind, source_id in jobs
+            }
+            for fut in as_completed(futures):
+                rel, kind = futures[fut]
+                try:
+                    record(rel, kind, fut.result())
+                except Exception as exc:
+                    failed(rel, exc)
+
+    for rel in removed:
+        entry = manifest[rel]
+        # Identical files share one source; keep it while another file still maps to it.
+        if not any(e.get("source_id") == entry.get("source_id") for r, e in manifest.items() if r != rel):
+            try:
+                _delete_source(entry["source_id"])
+            except Exception as exc:
+                failed(rel, exc)   # the entry stays, so the next pass retries the delete
+                continue
+        del manifest[rel]
+        counts["removed"] += 1
+        save_manifest(manifest_path, manifest)
+    return counts
+
+
+def watch(root: Path, manifest_path: Path, workers: int, interval: float, settle: float) -> None:
+    logger.info("watching %s every %.1fs", root, interval)
+    while True:
+        try:
+            counts = sync(root, manifest_path, workers, settle)
+        except Exception:
+            logger.exception("sync failed; retrying in %.1fs", interval)
+        else:
+            if any(counts[k] for k in ("new", "changed", "moved", "removed", "failed")):
+                logger.info("sync %s", counts)
+        time.sleep(interval)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="DocChat command-line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="sync a directory of documents into the index")
+    ingest.add_argument("directory", type=Path)
+    ingest.add_argument("--manifest", type=Path, default=None,
+                        help=f"manifest file (default: <directory>/{MANIFEST_NAME})")
+    ingest.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="ingestion processes (1 ingests in this process)")
+    ingest.add_argument("--watch", action="store_true", help="keep the directory in sync until interrupted")
+    ingest.add_argument("--interval", type=float, default=10.0, help="seconds between scans in watch mode")
+    ingest.add_argument("--settle", type=float, default=2.0,
+                        help="skip files modified less than this many seconds ago")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    root = args.directory.resolve()
+    if not root.is_dir():
+        parser.error(f"not a directory: {args.directory}")
+    manifest_path = (args.manifest or root / MANIFEST_NAME).resolve()
+
+    workers = args.workers
+    if settings.vector_backend == "local":
+        # The local index is locked to one process: write from this one, and stop now rather
+        # than per file when another process (e.g. the API server) already holds it.
+        if workers > 1:
+            logger.info("vector_backend=local: ingesting in this process with a single writer")
+        workers = 1
+        try:
+            get_collection(COLLECTION)
+        except RuntimeError as exc:
+            print(f"error: {exc}; stop the API server or use VECTOR_BACKEND=chroma", file=sys.stderr)
+            return 2
+
+    if args.watch:
+        try:
+            watch(root, manifest_path, workers, args.interval, args.settle)
+        except KeyboardInterrupt:
+            return 0
+    counts = sync(root, manifest_path, workers, args.settle)
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
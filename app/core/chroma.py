@@ -1,6 +1,12 @@
+import threading
 from functools import lru_cache
 import chromadb
 from app.core.config import settings
+from app.core.local_index import LocalIndexClient
+
+_handles: dict[str, object] = {}
+_handles_client = None
+_handles_lock = threading.Lock()
 
 
 @lru_cache()
@@ -8,8 +14,46 @@ def get_chroma_client() -> chromadb.HttpClient:
     return chromadb.HttpClient(host=settings.chroma_host, port=settings.chroma_port)
 
 
-def get_collection(name: str):
-    return get_chroma_client().get_or_create_collection(
-        name=name,
-        metadata={"hnsw:space": "cosine"},
+@lru_cache()
+def get_local_index_client() -> LocalIndexClient:
+    return LocalIndexClient(
+        settings.vector_index_dir,
+        partition_min=settings.vector_index_partition_min,
+        nprobe=settings.vector_index_nprobe,
+        cache_mb=settings.vector_index_cache_mb,
     )
+
+
+def get_vector_client():
+    """The client for ``vector_backend``: ChromaDB over HTTP, or the in-process index."""
+    if settings.vector_backend == "local":
+        return get_local_index_client()
+    if settings.vector_backend != "chroma":
+        raise ValueError(f"Unknown vector_backend: {settings.vector_backend!r}")
+    return get_chroma_client()
+
+
+def get_collection(name: str):
+    """Return the handle for ``name``, resolving it with the server only on first use."""
+    global _handles_client
+    client = get_vector_client()
+    with _handles_lock:
+        if client is not _handles_client:
+            _handles.clear()
+            _handles_client = client
+        handle = _handles.get(name)
+    if handle is None:
+        handle = client.get_or_create_collection(
+            name=name,
+            metadata={"hnsw:space": "cosine"},
+        )
+        with _handles_lock:
+            if client is _handles_client:
+                handle = _handles.setdefault(name, handle)
+    return handle
+
+
+def forget_collection(name: str) -> None:
+    """Drop a cached handle, e.g. after the collection was deleted or recreated server-side."""
+    with _handles_lock:
+        _handles.pop(name, None)
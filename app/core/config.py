@@ -23,10 +23,106 @@ class Settings(BaseSettings):
     # Embeddings
     embedding_model: str = "BAAI/bge-small-en-v1.5"
     embedding_dim: int = 384
+    embedding_batch_size: int = 64
+    embedding_threads: int = 0         # ONNX intra-op threads; 0 = onnxruntime default
+    embedding_cache_path: str = ""     # SQLite file for the persistent vector cache; empty disables it
+    embedding_cache_max_entries: int = 500_000
+
+    # Ingestion pipeline — chunks per embed/write batch, batches buffered per stage
+    ingest_batch_size: int = 256
+    ingest_queue_depth: int = 2
+    pdf_extract_workers: int = 0       # >1 extracts PDF page ranges on a process pool
+    pdf_pages_per_task: int = 32
+
+    # OCR fallback for scanned PDF pages (empty cache dir disables the cache)
+    ocr_workers: int = 0               # >1 runs tesseract on a process pool
+    ocr_lang: str = "eng"
+    ocr_cache_dir: str = str(_PROJECT_ROOT / "data" / "ocr_cache")
+
+    # Ingestion job queue — concurrent jobs per source type, finished jobs kept for status queries
+    ingest_concurrency_pdf: int = 2
+    ingest_concurrency_youtube: int = 4
+    ingest_concurrency_web: int = 8
+    ingest_concurrency_bulk: int = 1
+    ingest_concurrency_crawl: int = 1
+    ingest_concurrency_refresh: int = 2
+    ingest_jobs_retained: int = 500
+
+    # Uploads — hard size cap, largest upload kept in memory instead of a temp file
+    upload_max_bytes: int = 100 * 1024 * 1024
+    upload_memory_max_bytes: int = 8 * 1024 * 1024
+
+    # Web page parsing — trafilatura extraction and chunking
+    web_parse_workers: int = 0         # >1 parses pages on a process pool
+
+    # Boilerplate stripping — a block on at least this many pages (0 disables) and this share of a
+    # domain's pages is removed before chunking; empty path keeps the model in memory
+    boilerplate_min_pages: int = 5
+    boilerplate_min_ratio: float = 0.5
+    boilerplate_path: str = ""
+
+    # Outbound HTTP — shared keep-alive client for scraping and metadata fetches
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http_max_connections: int = 100
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_per_host_connections: int = 6
+    http2: bool = False                # needs the h2 package (httpx[http2])
+
+    # Fetch cache — validators + extracted text for web pages and YouTube (empty path disables it)
+    fetch_cache_path: str = ""
+    fetch_cache_ttl_seconds: int = 7 * 24 * 3600
+    fetch_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Bulk ingestion — concurrent URL fetches per request, items accepted per request or archive
+    bulk_fetch_concurrency: int = 8
+    bulk_max_items: int = 1000
+
+    # YouTube — transcript requests per second across all jobs (0 = unlimited); a directory of local
+    # transcripts/listings replaces YouTube itself (offline development and tests)
+    youtube_transcript_rate: float = 2.0
+    youtube_local_dir: str = ""
+
+    # Site crawls — concurrent page fetches, minimum gap between requests to one host, default limits
+    crawl_concurrency: int = 8
+    crawl_delay_seconds: float = 0.25
+    crawl_max_pages: int = 5000
+    crawl_max_depth: int = 3
+
+    # Web source refresh — re-scrape sources older than this in the background (0 disables), jobs queued per minute
+    web_refresh_max_age_seconds: int = 0
+    web_refresh_per_minute: int = 10
+
+    # Retrieval — per-collection query timeout (0 = none); searches slower than this are logged
+    retrieval_timeout_seconds: float = 5.0
+    retrieval_slow_ms: float = 1000.0
+    # Chunks handed to the synthesizer: ranked across collections by cosine distance scaled to 0–1,
+    # cut at top-k, past max distance or at a distance jump above max gap (0 disables a cut), min_k kept
+    retrieval_top_k: int = 8
+    retrieval_min_k: int = 1
+    retrieval_max_distance: float = 0.35
+    retrieval_max_gap: float = 0.08
+    # MMR diversification — candidates per collection, relevance/novelty trade-off (1 = relevance only),
+    # similarity at which a candidate is dropped as a near-duplicate of one already picked
+    retrieval_mmr: bool = False
+    retrieval_mmr_pool: int = 20
+    retrieval_mmr_lambda: float = 0.7
+    retrieval_mmr_duplicate_similarity: float = 0.95
+
+    # Vector store — "chroma" (ChromaDB over HTTP) or "local" (in-process index under vector_index_dir,
+    # searched by partition once a collection reaches partition_min rows, probing nprobe partitions;
+    # float32 copies of up to cache_mb of float16 vectors kept per collection)
+    vector_backend: str = "chroma"
+    vector_index_dir: str = str(_PROJECT_ROOT / "data" / "vector_index")
+    vector_index_partition_min: int = 50_000
+    vector_index_nprobe: int = 8
+    vector_index_cache_mb: int = 256
 
     # ChromaDB
     chroma_host: str = "localhost"
     chroma_port: int = 8001
+    chroma_workers: int = 16           # threads running vector store calls off the event loop
 
     # LangSmith observability
     langsmith_api_key: str = ""
@@ -32,6 +32,7 @@ class Base(DeclarativeBase):
 
 async def create_all_tables() -> None:
     import app.models.conversation  # noqa: F401
+    import app.models.crawl  # noqa: F401
     import app.models.user  # noqa: F401
     import app.models.refresh_token  # noqa: F401
 
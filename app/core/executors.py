@@ -0,0 +1,44 @@
+"""Named process pools for CPU-bound ingestion work, shut down with the app."""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+_pools: dict[str, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(name: str, workers: int) -> ProcessPoolExecutor:
+    """Return the pool registered under ``name``, creating it on first use.
+
+    Workers are spawned rather than forked so they never inherit the event
+    loop, executor threads or ONNX sessions of the API process.
+    """
+    with _pools_lock:   # called from executor threads; two jobs must not both create the pool
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=max(1, workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pools[name] = pool
+        return pool
+
+
+async def run_cpu_bound(name: str, workers: int, fn: Callable[..., Any], *args: Any) -> Any:
+    """Run ``fn(*args)`` on the ``name`` process pool when ``workers`` > 1, else on the default thread executor.
+
+    ``fn`` and its arguments must be picklable when a pool is used.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_process_pool(name, workers) if workers > 1 else None
+    return await loop.run_in_executor(executor, fn, *args)
+
+
+def shutdown_process_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+"""
+App-wide ``httpx.AsyncClient`` for outbound fetches (web scraping, YouTube metadata).
+
+One pooled client keeps connections alive across ingests so repeated fetches
+from the same host skip DNS, TCP and TLS setup. httpx only limits connections
+globally, so a per-host semaphore caps how many requests hit one host at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (compatible; DocChatBot/2.0; +https://github.com/docchat)"
+# The bare product token robots.txt groups are matched against; RobotFileParser would
+# read only "Mozilla" from the full header.
+ROBOTS_AGENT = "DocChatBot"
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_host_slots: dict[str, asyncio.Semaphore] = defaultdict(
+    lambda: asyncio.Semaphore(max(1, settings.http_per_host_connections))
+)
+
+
+def _http2_available() -> bool:
+    if not settings.http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("http2 requested but the h2 package is missing; install httpx[http2]")
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+        timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, (re)creating it if it is closed or bound to another loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client, _client_loop = _build_client(), loop
+        _host_slots.clear()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client, _client_loop = None, None
+    _host_slots.clear()
+
+
+@asynccontextmanager
+async def host_slot(url: str) -> AsyncIterator[None]:
+    """Hold one of the ``http_per_host_connections`` slots for ``url``'s host."""
+    async with _host_slots[(urlparse(url).hostname or "").lower()]:
+        yield
+
+
+async def fetch(url: str, **kwargs) -> httpx.Response:
+    """GET ``url`` on the shared client under the per-host limit.
+
+    Raises on HTTP errors; a ``304 Not Modified`` (only ever the answer to a
+    conditional request) is returned for the caller to handle.
+    """
+    client = get_http_client()
+    async with host_slot(url):
+        response = await client.get(url, **kwargs)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
@@ -0,0 +1,636 @@
+"""
+In-process vector index, an alternative to ChromaDB over HTTP for single-node deployments.
+
+Each collection lives in its own directory:
+
+- ``vectors.f16``: unit-normalised embeddings as float16 rows of a memory-mapped
+  file, half the size of float32 and paged in by the OS rather than loaded;
+- ``rows.jsonl``: an append-only log of row writes and deletes (id, document,
+  metadata), replayed on open into columnar arrays: one list per metadata key,
+  with a value → rows index built on first filter by that key.
+- ``info.json``: the dimension and the current generation. ``compact`` writes
+  the next generation's pair (``vectors.<n>.f16``, ``rows.<n>.jsonl``) in full
+  and then switches to it by replacing this file, so a crash at any point
+  leaves one complete, consistent pair to open.
+
+Search is cosine similarity by NumPy matmul over float32 blocks; decoded
+blocks are cached up to ``cache_mb`` per collection, since the float16 →
+float32 conversion costs several times the matmul itself. Small or
+filtered candidate sets are scanned exactly. Once a collection holds
+``partition_min`` rows, spherical k-means centroids split it into partitions
+and a query scans only the ``nprobe`` partitions nearest to it.
+
+``LocalIndexClient`` and ``LocalCollection`` mirror the parts of chromadb's
+client and collection API this app uses (``add``/``upsert``/``update``/``get``/
+``query``/``delete``/``count`` with ``where`` filters), so ``get_collection``
+can return either. An index directory belongs to one process at a time; use
+the Chroma backend when several processes write concurrently.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:   # pragma: no cover - non-POSIX
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_BLOCK_ROWS = 16384
+_GROW_ROWS = 1024
+_KMEANS_ITERATIONS = 8
+_KMEANS_SAMPLE_PER_CENTROID = 64
+_DEFAULT_INCLUDE_GET = ("metadatas", "documents")
+_DEFAULT_INCLUDE_QUERY = ("metadatas", "documents", "distances")
+
+
+def _unit_rows(vectors: Any) -> np.ndarray:
+    v = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+
+
+def _compare(op: str, expected: Any) -> Callable[[Any], bool]:
+    def safe(fn: Callable[[Any], bool]) -> Callable[[Any], bool]:
+        def check(value: Any) -> bool:
+            try:
+                return value is not None and fn(value)
+            except TypeError:
+                return False
+        return check
+
+    if op == "$gt":
+        return safe(lambda v: v > expected)
+    if op == "$gte":
+        return safe(lambda v: v >= expected)
+    if op == "$lt":
+        return safe(lambda v: v < expected)
+    if op == "$lte":
+        return safe(lambda v: v <= expected)
+    raise ValueError(f"Unsupported where operator: {op}")
+
+
+class LocalCollection:
+    """One collection: memory-mapped vectors plus columnar ids, documents and metadata."""
+
+    def __init__(self, path: Path, name: str, metadata: dict | None, partition_min: int, nprobe: int,
+                 cache_mb: int = 256) -> None:
+        self.name = name
+        self.metadata = metadata or {"hnsw:space": "cosine"}
+        if self.metadata.get("hnsw:space", "cosine") != "cosine":
+            raise ValueError("The local index only supports cosine distance")
+        self.partition_min = partition_min
+        self.nprobe = max(1, nprobe)
+        self._cache_budget = max(0, cache_mb) * 1024 * 1024
+        self._decoded: dict[int, np.ndarray] = {}
+        self._decoded_bytes = 0
+        self._dir = path
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._lock_file = open(self._dir / ".lock", "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise RuntimeError(f"Vector index {self._dir} is open in another process")
+
+        info_path = self._dir / "info.json"
+        info = json.loads(info_path.read_text()) if info_path.exists() else {}
+        self._dim: int | None = info.get("dim")
+        self._gen: int = info.get("gen", 0)
+        self._remove_other_generations()
+        self._vectors: np.memmap | None = None
+        self._size = 0
+        self._ids: list[str | None] = []
+        self._documents: list[str | None] = []
+        self._columns: dict[str, list] = {}
+        self._indexes: dict[str, dict[Any, set[int]]] = {}
+        self._slots: dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._centroids: np.ndarray | None = None
+        self._assignment = np.zeros(0, dtype=np.int32)
+        self._partitioned_rows = 0
+
+        if self._dim is not None:
+            self._open_vectors()
+        self._replay()
+        if len(self._slots) < self._size // 2 and self._size - len(self._slots) > _GROW_ROWS:
+            self.compact()
+        self._log = open(self._rows_path(), "a", encoding="utf-8")
+
+    # -- storage ------------------------------------------------------------
+
+    def _vectors_path(self, gen: int | None = None) -> Path:
+        gen = self._gen if gen is None else gen
+        return self._dir / ("vectors.f16" if gen == 0 else f"vectors.{gen}.f16")
+
+    def _rows_path(self, gen: int | None = None) -> Path:
+        gen = self._gen if gen is None else gen
+        return self._dir / ("rows.jsonl" if gen == 0 else f"rows.{gen}.jsonl")
+
+    def _write_info(self) -> None:
+        """Replace info.json atomically; it names the generation every other file belongs to."""
+        tmp = self._dir / "info.json.tmp"
+        with open(tmp, "w") as fh:
+            json.dump({"dim": self._dim, "gen": self._gen}, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._dir / "info.json")
+
+    def _remove_other_generations(self) -> None:
+        """Delete files left by a compaction that crashed before or after switching generation."""
+        keep = {self._vectors_path(), self._rows_path()}
+        for pattern in ("vectors*.f16*", "rows*.jsonl*", "info.json.tmp"):
+            for path in self._dir.glob(pattern):
+                if path not in keep:
+                    path.unlink(missing_ok=True)
+
+    def _capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _open_vectors(self) -> None:
+        path = self._vectors_path()
+        if not path.exists() or path.stat().st_size == 0:
+            with open(path, "wb") as fh:
+                fh.truncate(_GROW_ROWS * self._dim * 2)
+        rows = path.stat().st_size // (self._dim * 2)
+        self._vectors = np.memmap(path, dtype=np.float16, mode="r+", shape=(rows, self._dim))
+
+    def _reserve(self, rows: int) -> None:
+        if rows <= self._capacity():
+            return
+        capacity = max(rows, self._capacity() * 2, _GROW_ROWS)
+        self._vectors.flush()
+        self._vectors = None
+        with open(self._vectors_path(), "r+b") as fh:
+            fh.truncate(capacity * self._dim * 2)
+        self._open_vectors()
+
+    def _set_dim(self, dim: int) -> None:
+        if self._dim is None:
+            self._dim = dim
+            self._write_info()
+            self._open_vectors()
+        elif dim != self._dim:
+            raise ValueError(f"Embedding dimension {dim} does not match collection dimensionality {self._dim}")
+
+    def _replay(self) -> None:
+        path = self._rows_path()
+        if not path.exists():
+            return
+        good = 0
+        with open(path, "rb") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if entry.get("x"):
+                    self._drop(entry["s"])
+                else:
+                    self._put(entry["s"], entry["id"], entry.get("d"), entry.get("m") or {})
+                good += len(line)
+        if good < path.stat().st_size:
+            # A torn final line from an interrupted write: cut it so later appends stay readable.
+            with open(path, "r+b") as fh:
+                fh.truncate(good)
+
+    def _append(self, entries: list[dict]) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._log.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries))
+        self._log.flush()
+
+    def compact(self) -> None:
+        """Rewrite the files without deleted rows, as a new generation."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[: self._size])
+            entries = [
+                {"s": new, "id": self._ids[old], "d": self._documents[old], "m": self._row_metadata(old)}
+                for new, old in enumerate(live)
+            ]
+            old_gen, gen = self._gen, self._gen + 1
+            if self._vectors is not None:
+                packed = np.memmap(self._vectors_path(gen), dtype=np.float16, mode="w+",
+                                   shape=(max(len(live), 1), self._dim))
+                for start in range(0, len(live), _BLOCK_ROWS):
+                    chunk = live[start : start + _BLOCK_ROWS]
+                    packed[start : start + len(chunk)] = self._vectors[chunk]
+                packed.flush()
+                del packed
+            with open(self._rows_path(gen), "w", encoding="utf-8") as fh:
+                fh.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries))
+                fh.flush()
+                os.fsync(fh.fileno())
+
+            # The switch: until info.json names the new generation, a reopen uses the old pair.
+            self._gen = gen
+            try:
+                self._write_info()
+            except BaseException:
+                self._gen = old_gen
+                self._vectors_path(gen).unlink(missing_ok=True)
+                self._rows_path(gen).unlink(missing_ok=True)
+                raise
+            self._vectors = None
+            log = getattr(self, "_log", None)
+            if log is not None:
+                log.close()
+                self._log = open(self._rows_path(), "a", encoding="utf-8")
+            self._vectors_path(old_gen).unlink(missing_ok=True)
+            self._rows_path(old_gen).unlink(missing_ok=True)
+
+            self._size = 0
+            self._ids, self._documents, self._columns, self._indexes, self._slots = [], [], {}, {}, {}
+            self._alive = np.zeros(0, dtype=bool)
+            self._assignment = np.zeros(0, dtype=np.int32)
+            self._centroids, self._partitioned_rows = None, 0
+            self._decoded.clear()
+            self._decoded_bytes = 0
+            if self._dim is not None:
+                self._open_vectors()
+            for e in entries:
+                self._put(e["s"], e["id"], e["d"], e["m"])
+
+    # -- rows and columns ---------------------------------------------------
+
+    def _grow_rows(self, slot: int) -> None:
+        if slot < self._size:
+            return
+        extra = slot + 1 - self._size
+        self._ids.extend([None] * extra)
+        self._documents.extend([None] * extra)
+        for column in self._columns.values():
+            column.extend([None] * extra)
+        if slot >= len(self._alive):
+            alive = np.zeros(max(slot + 1, len(self._alive) * 2, _GROW_ROWS), dtype=bool)
+            alive[: len(self._alive)] = self._alive
+            self._alive = alive
+            assignment = np.full(len(alive), -1, dtype=np.int32)
+            assignment[: len(self._assignment)] = self._assignment
+            self._assignment = assignment
+        self._size = slot + 1
+
+    def _set_value(self, key: str, slot: int, value: Any) -> None:
+        column = self._columns.get(key)
+        if column is None:
+            if value is None:
+                return
+            column = self._columns[key] = [None] * self._size
+        index = self._indexes.get(key)
+        old = column[slot]
+        if index is not None and old is not None:
+            index.get(old, set()).discard(slot)
+        column[slot] = value
+        if index is not None and value is not None:
+            index.setdefault(value, set()).add(slot)
+
+    def _put(self, slot: int, id_: str, document: str | None, metadata: dict) -> None:
+        self._grow_rows(slot)
+        self._ids[slot] = id_
+        self._documents[slot] = document
+        for key in set(self._columns) | set(metadata):
+            self._set_value(key, slot, metadata.get(key))
+        self._slots[id_] = slot
+        self._alive[slot] = True
+
+    def _drop(self, slot: int) -> None:
+        if slot >= self._size or not self._alive[slot]:
+            return
+        for key in self._columns:
+            self._set_value(key, slot, None)
+        self._slots.pop(self._ids[slot], None)
+        self._ids[slot] = self._documents[slot] = None
+        self._alive[slot] = False
+
+    def _row_metadata(self, slot: int) -> dict:
+        return {k: column[slot] for k, column in self._columns.items() if column[slot] is not None}
+
+    def _index(self, key: str) -> dict[Any, set[int]]:
+        index = self._indexes.get(key)
+        if index is None:
+            index = {}
+            for slot, value in enumerate(self._columns.get(key, ())):
+                if value is not None:
+                    index.setdefault(value, set()).add(slot)
+            self._indexes[key] = index
+        return index
+
+    def _slots_mask(self, slots: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self._size, dtype=bool)
+        slots = np.fromiter(slots, dtype=np.int64)
+        if len(slots):
+            mask[slots] = True
+        return mask
+
+    def _match(self, where: dict) -> np.ndarray:
+        """Boolean mask over rows for a Chroma-style ``where`` filter."""
+        mask = np.ones(self._size, dtype=bool)
+        for key, cond in where.items():
+            if key in ("$and", "$or"):
+                parts = [self._match(sub) for sub in cond]
+                if parts:
+                    mask &= np.logical_and.reduce(parts) if key == "$and" else np.logical_or.reduce(parts)
+                continue
+            ops = cond.items() if isinstance(cond, dict) else [("$eq", cond)]
+            for op, expected in ops:
+                if op in ("$eq", "$in", "$ne", "$nin"):
+                    values = expected if op in ("$in", "$nin") else [expected]
+                    index = self._index(key)
+                    hit = self._slots_mask(s for v in values for s in index.get(v, ()))
+                    if op in ("$ne", "$nin"):
+                        present = self._slots_mask(s for slots in index.values() for s in slots)
+                        hit = present & ~hit
+                    mask &= hit
+                else:
+                    check = _compare(op, expected)
+                    column = self._columns.get(key, [None] * self._size)
+                    mask &= np.fromiter((check(v) for v in column), dtype=bool, count=self._size)
+        return mask
+
+    def _selected(self, ids: Iterable[str] | None, where: dict | None) -> np.ndarray:
+        """Slots matching ``ids`` (in the given order) and ``where``, else all live rows in order."""
+        if ids is not None:
+            slots = np.fromiter((self._slots[i] for i in ids if i in self._slots), dtype=np.int64)
+            if where:
+                slots = slots[self._match(where)[slots]]
+            return slots
+        mask = self._alive[: self._size].copy()
+        if where:
+            mask &= self._match(where)
+        return np.flatnonzero(mask)
+
+    # -- writes -------------------------------------------------------------
+
+    def _write(self, ids: list[str], embeddings: Any, documents: list | None, metadatas: list | None,
+               existing: str) -> None:
+        """Store rows; ``existing`` says what to do with ids already present: skip, replace or merge."""
+        if len(ids) != len(set(ids)):
+            raise ValueError("Expected IDs to be unique")
+        vectors = _unit_rows(embeddings) if embeddings is not None else None
+        if vectors is not None:
+            if len(vectors) != len(ids):
+                raise ValueError("Number of embeddings does not match number of ids")
+            self._set_dim(vectors.shape[1])
+        entries = []
+        with self._lock:
+            for i, id_ in enumerate(ids):
+                slot = self._slots.get(id_)
+                if slot is not None and existing == "skip":
+                    logger.warning("Add of existing embedding ID: %s", id_)
+                    continue
+                if slot is None:
+                    if existing == "merge":
+                        continue   # chromadb ignores updates to missing ids
+                    if vectors is None:
+                        raise ValueError("New rows need embeddings")
+                    slot = self._size
+                    self._reserve(slot + 1)
+                    self._grow_rows(slot)
+                metadata = dict(metadatas[i] or {}) if metadatas is not None else None
+                if existing == "merge":
+                    merged = self._row_metadata(slot)
+                    merged.update(metadata or {})
+                    metadata = {k: v for k, v in merged.items() if v is not None}
+                    document = documents[i] if documents is not None else self._documents[slot]
+                else:
+                    document = documents[i] if documents is not None else None
+                    metadata = metadata or {}
+                if vectors is not None:
+                    self._vectors[slot] = vectors[i]
+                    self._forget_block(slot // _BLOCK_ROWS)
+                    if self._centroids is not None:
+                        self._assignment[slot] = int(np.argmax(self._centroids @ vectors[i]))
+                self._put(slot, id_, document, metadata)
+                entries.append({"s": slot, "id": id_, "d": document, "m": metadata})
+            if entries:
+                self._append(entries)
+
+    def add(self, ids: list[str], embeddings: Any = None, documents: list | None = None,
+            metadatas: list | None = None, **_: Any) -> None:
+        self._write(list(ids), embeddings, documents, metadatas, existing="skip")
+
+    def upsert(self, ids: list[str], embeddings: Any = None, documents: list | None = None,
+               metadatas: list | None = None, **_: Any) -> None:
+        self._write(list(ids), embeddings, documents, metadatas, existing="replace")
+
+    def update(self, ids: list[str], embeddings: Any = None, documents: list | None = None,
+               metadatas: list | None = None, **_: Any) -> None:
+        self._write(list(ids), embeddings, documents, metadatas, existing="merge")
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None, **_: Any) -> None:
+        with self._lock:
+            slots = self._selected(ids, where)
+            for slot in slots:
+                self._drop(int(slot))
+            if len(slots):
+                self._append([{"s": int(s), "x": 1} for s in slots])
+
+    # -- reads --------------------------------------------------------------
+
+    def count(self) -> int:
+        return len(self._slots)
+
+    def _embeddings(self, slots: np.ndarray) -> np.ndarray:
+        if self._vectors is None or not len(slots):
+            return np.zeros((len(slots), self._dim or 0), dtype=np.float32)
+        return np.asarray(self._vectors[slots], dtype=np.float32)
+
+    def get(self, ids: list[str] | str | None = None, where: dict | None = None, limit: int | None = None,
+            offset: int | None = None, include: Iterable[str] = _DEFAULT_INCLUDE_GET, **_: Any) -> dict:
+        include = list(include)
+        with self._lock:
+            slots = self._selected([ids] if isinstance(ids, str) else ids, where)
+            slots = slots[offset or 0 :]
+            if limit is not None:
+                slots = slots[:limit]
+            return {
+                "ids": [self._ids[s] for s in slots],
+                "embeddings": self._embeddings(slots) if "embeddings" in include else None,
+                "documents": [self._documents[s] for s in slots] if "documents" in include else None,
+                "metadatas": [self._row_metadata(s) for s in slots] if "metadatas" in include else None,
+                "include": include,
+            }
+
+    def _partitions(self) -> np.ndarray | None:
+        """Centroids for partitioned search, (re)built once the collection has doubled since the last build."""
+        live = len(self._slots)
+        if not self.partition_min or live < self.partition_min:
+            return None
+        if self._centroids is not None and live <= 2 * self._partitioned_rows:
+            return self._centroids
+        rows = np.flatnonzero(self._alive[: self._size])
+        nlist = int(np.clip(np.sqrt(live), 16, 4096))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(rows, size=min(len(rows), nlist * _KMEANS_SAMPLE_PER_CENTROID), replace=False)
+        data = self._embeddings(np.sort(sample))
+        centroids = data[rng.choice(len(data), size=nlist, replace=False)]
+        for _ in range(_KMEANS_ITERATIONS):
+            nearest = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, data)
+            empty = ~np.bincount(nearest, minlength=nlist).astype(bool)
+            sums[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+            centroids = _unit_rows(sums)
+        for start in range(0, self._size, _BLOCK_ROWS):
+            block = np.arange(start, min(start + _BLOCK_ROWS, self._size))
+            self._assignment[block] = np.argmax(self._embeddings(block) @ centroids.T, axis=1)
+        self._centroids, self._partitioned_rows = centroids, live
+        return centroids
+
+    def _forget_block(self, b: int) -> None:
+        block = self._decoded.pop(b, None)
+        if block is not None:
+            self._decoded_bytes -= block.nbytes
+
+    def _block(self, b: int, rows: np.ndarray | None = None) -> np.ndarray:
+        """Block ``b`` (or just its ``rows``) as float32.
+
+        Blocks are cached whole while the budget lasts and then kept, not
+        evicted: a full scan touches every block in order, which would make an
+        LRU miss on every one once the collection outgrows the budget.
+        """
+        start = b * _BLOCK_ROWS
+        end = min(start + _BLOCK_ROWS, self._size)
+        cached = self._decoded.get(b)
+        if cached is not None and len(cached) == end - start:
+            return cached if rows is None else cached[rows]
+        self._forget_block(b)   # the tail block grew since it was cached
+        if self._decoded_bytes + (end - start) * self._dim * 4 <= self._cache_budget:
+            block = np.asarray(self._vectors[start:end], dtype=np.float32)
+            self._decoded[b] = block
+            self._decoded_bytes += block.nbytes
+            return block if rows is None else block[rows]
+        if rows is None:
+            return np.asarray(self._vectors[start:end], dtype=np.float32)
+        return np.asarray(self._vectors[start + rows], dtype=np.float32)
+
+    def _similarities(self, queries: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each query to each of ``slots`` (ascending), block by block."""
+        sims = np.empty((len(queries), len(slots)), dtype=np.float32)
+        bounds = np.searchsorted(slots, np.arange(0, self._size + _BLOCK_ROWS, _BLOCK_ROWS))
+        for b in range(len(bounds) - 1):
+            lo, hi = bounds[b], bounds[b + 1]
+            if lo == hi:
+                continue
+            start = b * _BLOCK_ROWS
+            whole = hi - lo == min(start + _BLOCK_ROWS, self._size) - start
+            sims[:, lo:hi] = queries @ self._block(b, None if whole else slots[lo:hi] - start).T
+        return sims
+
+    def _top(self, sims: np.ndarray, slots: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(slots))
+        if k <= 0:
+            return slots[:0], sims[:0]
+        best = np.argpartition(-sims, k - 1)[:k]
+        best = best[np.argsort(-sims[best], kind="stable")]
+        return slots[best], sims[best]
+
+    def query(self, query_embeddings: Any, n_results: int = 10, where: dict | None = None,
+              include: Iterable[str] = _DEFAULT_INCLUDE_QUERY, **_: Any) -> dict:
+        include = list(include)
+        queries = _unit_rows(query_embeddings)
+        out: dict[str, Any] = {"ids": [], "embeddings": [] if "embeddings" in include else None,
+                               "documents": [] if "documents" in include else None,
+                               "metadatas": [] if "metadatas" in include else None,
+                               "distances": [] if "distances" in include else None, "include": include}
+        with self._lock:
+            if self._vectors is None or not self._slots:
+                for key in ("ids", "embeddings", "documents", "metadatas", "distances"):
+                    if out[key] is not None:
+                        out[key] = [[] for _ in queries]
+                return out
+            if queries.shape[1] != self._dim:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match collection dimensionality {self._dim}")
+            base = self._alive[: self._size].copy()
+            if where:
+                base &= self._match(where)
+            candidates = np.flatnonzero(base)
+            centroids = self._partitions()
+            # Filters that leave few rows are cheaper to scan exactly than to partition.
+            if centroids is not None and len(candidates) >= self.partition_min:
+                probes = np.argsort(-(queries @ centroids.T), axis=1)[:, : self.nprobe]
+                assignment = self._assignment[candidates]
+                results = []
+                for q, probe in enumerate(probes):
+                    slots = candidates[np.isin(assignment, probe)]
+                    results.append(self._top(self._similarities(queries[q : q + 1], slots)[0], slots, n_results))
+            else:
+                sims = self._similarities(queries, candidates)
+                results = [self._top(row, candidates, n_results) for row in sims]
+
+            for top, scores in results:
+                out["ids"].append([self._ids[s] for s in top])
+                if out["distances"] is not None:
+                    out["distances"].append((1.0 - scores).astype(float).tolist())
+                if out["documents"] is not None:
+                    out["documents"].append([self._documents[s] for s in top])
+                if out["metadatas"] is not None:
+                    out["metadatas"].append([self._row_metadata(s) for s in top])
+                if out["embeddings"] is not None:
+                    out["embeddings"].append(self._embeddings(top))
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._log.close()
+            self._lock_file.close()
+
+
+class LocalIndexClient:
+    """Directory of ``LocalCollection``s with the chromadb client methods the app calls."""
+
+    def __init__(self, path: "str | Path", partition_min: int = 50_000, nprobe: int = 8, cache_mb: int = 256) -> None:
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self.partition_min = partition_min
+        self.nprobe = nprobe
+        self.cache_mb = cache_mb
+        self._collections: dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name: str, metadata: dict | None = None, **_: Any) -> LocalCollection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = LocalCollection(
+                    self._path / name, name, metadata, self.partition_min, self.nprobe, self.cache_mb
+                )
+                self._collections[name] = collection
+            return collection
+
+    def get_collection(self, name: str, **_: Any) -> LocalCollection:
+        if name not in self._collections and not (self._path / name).is_dir():
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.get_or_create_collection(name)
+
+    def list_collections(self) -> list[str]:
+        return sorted(p.name for p in self._path.iterdir() if p.is_dir())
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            target = self._path / name
+            if target.is_dir():
+                for child in target.iterdir():
+                    child.unlink()
+                target.rmdir()
+
+    def close(self) -> None:
+        with self._lock:
+            for collection in self._collections.values():
+                collection.close()
+            self._collections.clear()
@@ -0,0 +1,152 @@
+"""
+Async gateway to ChromaDB.
+
+``chromadb.HttpClient`` is synchronous: calling it from a request handler or
+LangGraph node blocks the event loop for the whole HTTP round trip, so
+concurrent chats queue up behind each other's queries. Every call made here
+runs on a dedicated thread pool (sized by ``chroma_workers``, separate from the
+default executor that ingestion saturates) and awaits the result instead.
+
+Collections may be passed by name, resolved through the cached handles of
+``get_collection``, or as a handle already in hand. Each operation's latency
+is recorded and exposed by ``vector_store_stats`` on ``/health``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from app.core.chroma import forget_collection, get_collection
+from app.core.config import settings
+
+_SAMPLES = 1024
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+class _OpStats:
+    __slots__ = ("calls", "errors", "total", "max", "recent")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=_SAMPLES)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.recent)
+
+        def pct(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2) if ordered else 0.0
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.total / self.calls * 1000, 2) if self.calls else 0.0,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+_stats: dict[str, _OpStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(op: str, elapsed: float, failed: bool) -> None:
+    with _stats_lock:
+        stats = _stats.get(op)
+        if stats is None:
+            stats = _stats[op] = _OpStats()
+        stats.calls += 1
+        stats.errors += failed
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        stats.recent.append(elapsed)
+
+
+def call(collection: Any, op: str, **kwargs: Any) -> Any:
+    """Run ``collection.<op>(**kwargs)`` on the calling thread, timing it.
+
+    For code already off the event loop (pipeline stages, executor jobs).
+    """
+    start = time.perf_counter()
+    failed = True
+    try:
+        handle = get_collection(collection) if isinstance(collection, str) else collection
+        result = getattr(handle, op)(**kwargs)
+        failed = False
+        return result
+    except Exception:
+        if isinstance(collection, str):
+            forget_collection(collection)   # the collection may have been dropped server-side
+        raise
+    finally:
+        _record(op, time.perf_counter() - start, failed)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.chroma_workers), thread_name_prefix="chroma"
+            )
+        return _executor
+
+
+async def run(collection: Any, op: str, **kwargs: Any) -> Any:
+    """Await ``collection.<op>(**kwargs)`` without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(call, collection, op, **kwargs))
+
+
+async def query(collection: Any, **kwargs: Any) -> dict:
+    return await run(collection, "query", **kwargs)
+
+
+async def get(collection: Any, **kwargs: Any) -> dict:
+    return await run(collection, "get", **kwargs)
+
+
+async def add(collection: Any, **kwargs: Any) -> None:
+    await run(collection, "add", **kwargs)
+
+
+async def upsert(collection: Any, **kwargs: Any) -> None:
+    await run(collection, "upsert", **kwargs)
+
+
+async def update(collection: Any, **kwargs: Any) -> None:
+    await run(collection, "update", **kwargs)
+
+
+async def delete(collection: Any, **kwargs: Any) -> None:
+    await run(collection, "delete", **kwargs)
+
+
+def vector_store_stats() -> dict:
+    """Per-operation call counts and latencies since startup."""
+    with _stats_lock:
+        return {op: stats.snapshot() for op, stats in sorted(_stats.items())}
+
+
+def reset_vector_store_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def shutdown_vector_store() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -11,6 +11,11 @@ from fastapi.staticfiles import StaticFiles
 
 from app.core.config import settings
 from app.core.database import create_all_tables
+from app.core.executors import shutdown_process_pools
+from app.core.http import close_http_client, get_http_client
+from app.core.vector_store import shutdown_vector_store
+from app.services.ingestion.refresh import start_refresh_scheduler, stop_refresh_scheduler
+from app.services.jobs import get_job_manager
 from app.api import auth
 from app.api import chat
 from app.api import conversations
@@ -28,8 +33,15 @@ logging.basicConfig(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await create_all_tables()
+    get_http_client()
+    start_refresh_scheduler()
     logger.info("startup", extra={"app": settings.app_name, "version": settings.version})
     yield
+    await stop_refresh_scheduler()
+    await get_job_manager().stop()
+    await close_http_client()
+    shutdown_process_pools()
+    shutdown_vector_store()
 
 
 app = FastAPI(
@@ -0,0 +1,57 @@
+import enum
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class CrawlStatus(str, enum.Enum):
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class PageState(str, enum.Enum):
+    queued = "queued"
+    ingested = "ingested"
+    duplicate = "duplicate"
+    skipped = "skipped"
+    failed = "failed"
+
+
+class Crawl(Base):
+    __tablename__ = "crawls"
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    root_url: Mapped[str] = mapped_column(Text, nullable=False)
+    options: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+    status: Mapped[CrawlStatus] = mapped_column(
+        Enum(CrawlStatus), nullable=False, default=CrawlStatus.running
+    )
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
+class CrawlPage(Base):
+    __tablename__ = "crawl_pages"
+
+    crawl_id: Mapped[str] = mapped_column(
+        String, ForeignKey("crawls.id", ondelete="CASCADE"), primary_key=True
+    )
+    url: Mapped[str] = mapped_column(Text, primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    state: Mapped[PageState] = mapped_column(
+        Enum(PageState), nullable=False, default=PageState.queued, index=True
+    )
+    source_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
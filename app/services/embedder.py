@@ -11,6 +11,8 @@ from __future__ import annotations
 import logging
 import numpy as np
 
+from app.services.embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -28,28 +30,78 @@ def get_embedder() -> "_Embedder | None":
         return _embedder_instance
     try:
         from app.core.config import settings
-        _embedder_instance = _Embedder(settings.embedding_model)
+        cache = None
+        if settings.embedding_cache_path:
+            cache = EmbeddingCache(
+                settings.embedding_cache_path,
+                settings.embedding_model,
+                max_entries=settings.embedding_cache_max_entries,
+            )
+        _embedder_instance = _Embedder(
+            settings.embedding_model,
+            batch_size=settings.embedding_batch_size,
+            threads=settings.embedding_threads or None,
+            cache=cache,
+        )
     except Exception:
         logger.exception("embedder_init_failed — running without embeddings")
     return _embedder_instance
 
 
+def embedding_cache_stats() -> dict | None:
+    """Hit/miss counters of the live embedder's cache, without initialising one."""
+    if _embedder_instance is None or _embedder_instance.cache is None:
+        return None
+    return _embedder_instance.cache.stats()
+
+
 class _Embedder:
     """Thin fastembed wrapper with a stable public API."""
 
-    def __init__(self, model_name: str) -> None:
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 64,
+        threads: int | None = None,
+        cache: EmbeddingCache | None = None,
+    ) -> None:
         if TextEmbedding is None:
             raise ImportError("fastembed is not installed")
-        self._fe = TextEmbedding(model_name=model_name)
+        self._fe = TextEmbedding(model_name=model_name, threads=threads)
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
         list(self._fe.embed(["warmup"]))
 
     def embed_query(self, text: str) -> np.ndarray:
         """Embed a single string. Returns float32 ndarray shape (dim,)."""
+        if self.cache is not None:
+            return self.embed_batch([text])[0]
         return next(self._fe.embed([text])).astype(np.float32)
 
+    def embed_batch(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed many texts in ONNX batches of ``batch_size``. Blocking — run in an executor.
+
+        With a cache attached, only the texts it misses go through ONNX.
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._run(texts)
+        results = self.cache.get_many(texts)
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            fresh = self._run([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], fresh)
+            for i, vec in zip(missing, fresh):
+                results[i] = vec
+        return results
+
+    def _run(self, texts: list[str]) -> list[np.ndarray]:
+        return [e.astype(np.float32) for e in self._fe.embed(texts, batch_size=self.batch_size)]
+
     def embed_independently(self, texts: list[str]) -> list[np.ndarray]:
         """Embed each text independently."""
-        return [e.astype(np.float32) for e in self._fe.embed(texts)]
+        return self.embed_batch(texts)
 
     def embed_late(
         self,
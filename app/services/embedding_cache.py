@@ -0,0 +1,140 @@
+"""
+Persistent embedding cache backed by SQLite.
+
+Vectors are stored as raw float32 blobs keyed by sha256(model name + normalised
+text), so re-ingests, replans and repeated queries skip ONNX inference. The
+table is bounded: once it holds more than ``max_entries`` rows the least
+recently used ~10% are evicted. Hits are not written back one by one: their
+``last_used`` times are buffered and flushed with the next write, at most
+every ``_TOUCH_FLUSH_SECONDS`` or once ``_TOUCH_FLUSH_KEYS`` keys pile up.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key       BLOB PRIMARY KEY,
+    vec       BLOB NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used);
+"""
+_MAX_VARS = 500     # keys per SELECT ... IN (...)
+_TOUCH_FLUSH_SECONDS = 30.0
+_TOUCH_FLUSH_KEYS = 1000
+
+
+class EmbeddingCache:
+    """Thread-safe (model, text) → float32 vector cache with LRU eviction."""
+
+    def __init__(self, path: "str | Path", model_name: str, max_entries: int = 500_000) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._model = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._touched: dict[bytes, float] = {}     # hit key -> last_used not yet written
+        self._flushed_at = time.monotonic()
+        (self._approx_entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def _key(self, text: str) -> bytes:
+        normalised = " ".join(text.split())
+        return hashlib.sha256(f"{self._model}\0{normalised}".encode("utf-8")).digest()
+
+    def get_many(self, texts: list[str]) -> list[np.ndarray | None]:
+        keys = [self._key(t) for t in texts]
+        found: dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), _MAX_VARS):
+                batch = unique[i : i + _MAX_VARS]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).copy()
+            if found:
+                now = time.time()
+                self._touched.update(dict.fromkeys(found, now))
+                if (len(self._touched) >= _TOUCH_FLUSH_KEYS
+                        or time.monotonic() - self._flushed_at >= _TOUCH_FLUSH_SECONDS):
+                    self._flush_touched()
+                    self._conn.commit()
+            hit = sum(k in found for k in keys)
+            self.hits += hit
+            self.misses += len(keys) - hit
+        return [found.get(k) for k in keys]
+
+    def put_many(self, texts: list[str], vectors: list[np.ndarray]) -> None:
+        now = time.time()
+        rows = [
+            (self._key(t), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vectors)
+            if v is not None
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec, last_used) VALUES (?, ?, ?)", rows
+            )
+            # Replacements over-count; the exact COUNT(*) only runs once the estimate overflows.
+            self._approx_entries += len(rows)
+            if self._approx_entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        """Write buffered hit times; the caller holds the lock and commits."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(at, k) for k, at in self._touched.items()],
+            )
+            self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self.max_entries:
+            excess = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            count -= excess
+        self._approx_entries = count
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,192 @@
+"""
+On-disk fetch cache for web pages and YouTube metadata/transcripts, backed by SQLite.
+
+Each entry stores the response validators (ETag / Last-Modified) next to the
+*extracted* payload, so a ``304 Not Modified`` skips download, extraction and
+— because the content hash is unchanged — embedding as well. Entries older
+than ``ttl_seconds`` are ignored and refetched unconditionally; once the
+stored payloads exceed ``max_bytes`` the least recently used ~10% are evicted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.core.http import fetch
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    key           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    payload       TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    fetched_at    REAL NOT NULL,
+    last_used     REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_fetches_last_used ON fetches (last_used);
+"""
+
+
+@dataclass
+class CachedFetch:
+    payload: dict
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class FetchCache:
+    """Thread-safe key → (validators, extracted payload) cache with TTL and size-based LRU eviction."""
+
+    def __init__(self, path: "str | Path", ttl_seconds: float, max_bytes: int) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        (self._approx_bytes,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM fetches").fetchone()
+
+    def get(self, key: str) -> CachedFetch | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, payload FROM fetches WHERE key = ? AND fetched_at > ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE fetches SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        etag, last_modified, payload = row
+        return CachedFetch(payload=json.loads(payload), etag=etag, last_modified=last_modified)
+
+    def put(self, key: str, payload: dict, etag: str | None = None, last_modified: str | None = None) -> None:
+        blob = json.dumps(payload, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetches (key, etag, last_modified, payload, size, fetched_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, blob, len(blob), now, now),
+            )
+            # Replacements over-count; the exact SUM only runs once the estimate overflows.
+            self._approx_bytes += len(blob)
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def revalidated(self, key: str) -> None:
+        """Record a 304 for ``key``: the entry is fresh again for another TTL."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE fetches SET fetched_at = ?, last_used = ? WHERE key = ?", (now, now, key))
+            self._conn.commit()
+            self.not_modified += 1
+
+    def _evict(self) -> None:
+        self._conn.execute("DELETE FROM fetches WHERE fetched_at <= ?", (time.time() - self.ttl_seconds,))
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM fetches").fetchone()
+        if total > self.max_bytes:
+            target = int(self.max_bytes * 0.9)
+            freed = 0
+            doomed = []
+            for key, size in self._conn.execute("SELECT key, size FROM fetches ORDER BY last_used"):
+                if total - freed <= target:
+                    break
+                doomed.append((key,))
+                freed += size
+            self._conn.executemany("DELETE FROM fetches WHERE key = ?", doomed)
+            total -= freed
+        self._approx_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fetches").fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: FetchCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_fetch_cache() -> FetchCache | None:
+    """Return the shared cache, or None when ``fetch_cache_path`` is empty."""
+    global _cache
+    if not settings.fetch_cache_path:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = FetchCache(
+                settings.fetch_cache_path,
+                ttl_seconds=settings.fetch_cache_ttl_seconds,
+                max_bytes=settings.fetch_cache_max_bytes,
+            )
+    return _cache
+
+
+def fetch_cache_stats() -> dict | None:
+    """Counters of the live cache, without opening one."""
+    return _cache.stats() if _cache is not None else None
+
+
+async def fetch_extracted(
+    url: str,
+    extract: Callable[[str], Awaitable[dict]],
+    key: str | None = None,
+    **kwargs,
+) -> dict:
+    """Conditionally GET ``url`` and return ``await extract(body)``.
+
+    When a cached entry has validators they are sent along; a 304 returns the
+    cached payload without downloading or extracting anything.
+    """
+    cache = get_fetch_cache()
+    key = key or url
+    loop = asyncio.get_running_loop()
+    entry = await loop.run_in_executor(None, cache.get, key) if cache else None
+    headers = {**kwargs.pop("headers", {}), **(entry.conditional_headers() if entry else {})}
+    response = await fetch(url, headers=headers, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        await loop.run_in_executor(None, cache.revalidated, key)
+        return entry.payload
+    payload = await extract(response.text)
+    if cache:
+        await loop.run_in_executor(
+            None, cache.put, key, payload, response.headers.get("etag"), response.headers.get("last-modified")
+        )
+    return payload
@@ -0,0 +1,128 @@
+"""
+Per-domain boilerplate model for web ingestion, backed by SQLite.
+
+Every ingested page's text blocks (the lines trafilatura emits) are hashed,
+and for each domain we count how many distinct pages contain each block.
+A block that appears on at least ``min_pages`` pages and on at least
+``min_ratio`` of the domain's pages is boilerplate — navigation, cookie
+banners, footers — and is stripped before the page is chunked.
+
+The model learns as pages arrive, so the first few pages of a new domain are
+kept whole; ``boilerplate_path`` persists what was learned across restarts.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.ingestion.web_parse import block_hash, page_blocks
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    domain TEXT NOT NULL,
+    url    TEXT NOT NULL,
+    PRIMARY KEY (domain, url)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blocks (
+    domain TEXT NOT NULL,
+    hash   TEXT NOT NULL,
+    pages  INTEGER NOT NULL,
+    PRIMARY KEY (domain, hash)
+) WITHOUT ROWID;
+"""
+_IN_BATCH = 500
+
+
+class BoilerplateModel:
+    """Thread-safe domain → block hash → page count store."""
+
+    def __init__(self, path: "str | Path", min_pages: int, min_ratio: float) -> None:
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.min_pages = max(1, min_pages)
+        self.min_ratio = min_ratio
+        self.blocks_stripped = 0
+        self.chunks_saved = 0
+        self.embeddings_saved = 0
+
+    def observe(self, domain: str, url: str, content: str) -> frozenset[str]:
+        """Count ``url``'s blocks (once per page) and return the hashes of those that are boilerplate."""
+        hashes = list({block_hash(b) for b in page_blocks(content)})
+        with self._lock:
+            new_page = self._conn.execute(
+                "INSERT OR IGNORE INTO pages (domain, url) VALUES (?, ?)", (domain, url)
+            ).rowcount == 1
+            if new_page:
+                self._conn.executemany(
+                    "INSERT INTO blocks (domain, hash, pages) VALUES (?, ?, 1) "
+                    "ON CONFLICT (domain, hash) DO UPDATE SET pages = pages + 1",
+                    [(domain, h) for h in hashes],
+                )
+            self._conn.commit()
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM pages WHERE domain = ?", (domain,)).fetchone()
+            threshold = max(self.min_pages, self.min_ratio * total)
+            found: set[str] = set()
+            for i in range(0, len(hashes), _IN_BATCH):
+                part = hashes[i : i + _IN_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT hash FROM blocks WHERE domain = ? AND pages >= ? "
+                    f"AND hash IN ({','.join('?' * len(part))})",
+                    (domain, threshold, *part),
+                )
+                found.update(h for (h,) in rows)
+        return frozenset(found)
+
+    def record_savings(self, blocks: int, chunks: int, embeddings: int) -> None:
+        with self._lock:
+            self.blocks_stripped += blocks
+            self.chunks_saved += chunks
+            self.embeddings_saved += embeddings
+
+    def stats(self) -> dict:
+        with self._lock:
+            (domains, pages) = self._conn.execute(
+                "SELECT COUNT(DISTINCT domain), COUNT(*) FROM pages"
+            ).fetchone()
+        return {
+            "domains": domains,
+            "pages": pages,
+            "blocks_stripped": self.blocks_stripped,
+            "chunks_saved": self.chunks_saved,
+            "embeddings_saved": self.embeddings_saved,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_model: BoilerplateModel | None = None
+_model_lock = threading.Lock()
+
+
+def get_boilerplate_model() -> BoilerplateModel | None:
+    """Return the shared model, or None when ``boilerplate_min_pages`` is 0."""
+    global _model
+    if settings.boilerplate_min_pages <= 0:
+        return None
+    with _model_lock:
+        if _model is None:
+            _model = BoilerplateModel(
+                settings.boilerplate_path or ":memory:",
+                min_pages=settings.boilerplate_min_pages,
+                min_ratio=settings.boilerplate_min_ratio,
+            )
+    return _model
+
+
+def boilerplate_stats() -> dict | None:
+    """Counters of the live model, without opening one."""
+    return _model.stats() if _model is not None else None
@@ -0,0 +1,328 @@
+"""
+Bulk ingestion of URL lists, YouTube playlists/channels and zip archives.
+
+All items of a request share one ingestion pipeline: URLs are fetched
+concurrently on the shared HTTP client and handed on as they complete, zip members are extracted
+one after another, and the resulting chunks are embedded and written in
+``ingest_batch_size`` batches that span documents — one Chroma ``add`` per
+collection per batch instead of one per source.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import threading
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Callable, Iterator
+from urllib.parse import urlparse
+
+from app.core import vector_store
+from app.core.chroma import get_collection
+from app.core.config import settings
+from app.services.embedder import get_embedder
+from app.services.ingestion import pdf, web, youtube
+from app.services.ingestion.dedup import content_hash, embed_with_reuse, find_source
+from app.services.ingestion.pipeline import ProgressCallback, run_pipeline
+
+_EXTENSION_TYPES = {
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+    ".md": "text/plain",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+@dataclass
+class _Doc:
+    """One bulk item and, once prepared, the source it becomes."""
+    item: str
+    kind: str
+    status: str = "failed"
+    source_id: str | None = None
+    collection: str | None = None
+    content_hash: str | None = None
+    meta: dict = field(default_factory=dict)       # file items: metadata shared by every chunk
+    records: list[dict] = field(default_factory=list)  # URL items: chunk records built on fetch
+    indexed: int = 0
+    chunks: int = 0
+    error: str | None = None
+
+    def result(self) -> dict:
+        return {
+            "item": self.item,
+            "kind": self.kind,
+            "status": self.status,
+            "source_id": self.source_id,
+            "chunks": self.chunks,
+            "error": self.error,
+        }
+
+
+@dataclass
+class _Piece:
+    doc: _Doc
+    segment: "pdf._Segment | None" = None
+    position: int = 0      # segment index within its document
+
+
+class _SeenHashes:
+    """Content hashes claimed by earlier items of the same request."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seen: dict[tuple[str, str], str] = {}
+
+    def claim(self, collection: str, digest: str, source_id: str) -> str | None:
+        """Record ``source_id`` for the hash, or return the id that already claimed it."""
+        key = (collection, digest)
+        with self._lock:
+            if key in self._seen:
+                return self._seen[key]
+            self._seen[key] = source_id
+        return None
+
+
+def _is_youtube(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return host == "youtu.be" or host == "youtube.com" or host.endswith(".youtube.com")
+
+
+def _claim_source(doc: _Doc, collection_name: str, digest: str, seen: _SeenHashes) -> bool:
+    """Assign a new source to ``doc`` unless its content is already stored or queued."""
+    source_id = str(uuid.uuid4())
+    existing = find_source(get_collection(collection_name), digest) or seen.claim(collection_name, digest, source_id)
+    if existing:
+        doc.status, doc.source_id = "duplicate", existing
+        return False
+    doc.collection, doc.content_hash, doc.source_id = collection_name, digest, source_id
+    return True
+
+
+async def _prepare_url(doc: _Doc, seen: _SeenHashes) -> _Doc:
+    """Fetch and chunk one URL, recording any failure on ``doc``."""
+    loop = asyncio.get_running_loop()
+    try:
+        now = datetime.now(timezone.utc).isoformat()
+        if doc.kind == "youtube":
+            video_id = youtube._extract_video_id(doc.item)
+            digest = content_hash(f"youtube:{video_id}")
+            if await loop.run_in_executor(None, _claim_source, doc, youtube.COLLECTION, digest, seen):
+                meta, transcript = await asyncio.gather(
+                    youtube._get_video_metadata(video_id, doc.item),
+                    youtube._load_transcript(video_id),
+                )
+                doc.records = youtube._chunk_records(doc.item, meta, transcript, now)
+        else:
+            scraped = await web._scrape(doc.item)
+            digest = content_hash(scraped["content"])
+            if await loop.run_in_executor(None, _claim_source, doc, web.COLLECTION, digest, seen):
+                doc.records = await web._chunk_records(doc.item, scraped, now)
+    except Exception as exc:
+        doc.status, doc.source_id, doc.error = "failed", None, str(exc) or type(exc).__name__
+    return doc
+
+
+async def _iter_url_docs(docs: list[_Doc]) -> AsyncIterator[_Piece]:
+    """Fetch URLs ``bulk_fetch_concurrency`` at a time; yield each as soon as it is ready."""
+    seen = _SeenHashes()
+    limit = max(1, settings.bulk_fetch_concurrency)
+    todo = iter(docs)
+    pending: set[asyncio.Task] = set()
+    try:
+        while True:
+            while len(pending) < limit and (doc := next(todo, None)) is not None:
+                pending.add(asyncio.ensure_future(_prepare_url(doc, seen)))
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if (doc := task.result()).records:
+                    yield _Piece(doc)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _iter_zip_docs(source: "Path | bytes", docs: list[_Doc]) -> Iterator[_Piece]:
+    """Extract supported zip members in order, yielding their segments."""
+    seen = _SeenHashes()
+    with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as zf:
+        for info in zf.infolist():
+            name = PurePosixPath(info.filename)
+            if info.is_dir() or name.name.startswith(".") or "__MACOSX" in name.parts:
+                continue
+            doc = _Doc(item=info.filename, kind="file")
+            docs.append(doc)
+            content_type = _EXTENSION_TYPES.get(name.suffix.lower())
+            if content_type is None:
+                doc.error = f"Unsupported file type: {name.suffix or info.filename}"
+                continue
+            if info.file_size > settings.upload_max_bytes:
+                doc.error = "File exceeds the upload size limit"
+                continue
+            if len(docs) > settings.bulk_max_items:
+                doc.error = "Too many items in archive"
+                continue
+            try:
+                data = zf.read(info)
+                if not _claim_source(doc, pdf.COLLECTION, content_hash(data), seen):
+                    continue
+                segments = list(pdf._iter_segments(data, content_type))
+            except Exception as exc:
+                doc.status, doc.source_id, doc.error = "failed", None, str(exc) or type(exc).__name__
+                continue
+            doc.meta = {"filename": name.name, "ingested_at": datetime.now(timezone.utc).isoformat()}
+            for pos, seg in enumerate(segments):
+                yield _Piece(doc, seg, pos)
+
+
+def _chunk_piece(piece: _Piece, seg_idx: int, splitter) -> list[dict]:
+    doc = piece.doc
+    if piece.segment is None:
+        return [{**rec, "doc": doc} for rec in doc.records]
+    chunks = []
+    page_hash = content_hash(piece.segment.text)
+    for c in pdf._chunk_segment(piece.segment, seg_idx, splitter):
+        chunks.append({
+            "text": c["text"],
+            "char_start": c["char_start"],
+            "doc": doc,
+            "metadata": {
+                **doc.meta,
+                "page_number": c.get("page_number") or 0,
+                "section_heading": c.get("section_heading") or "",
+                "chunk_index": doc.indexed,
+                "segment_index": piece.position,
+                "page_hash": page_hash,
+            },
+        })
+        doc.indexed += 1
+    return chunks
+
+
+def _group_by_collection(batch: list[dict]) -> dict[str, list[int]]:
+    groups: dict[str, list[int]] = {}
+    for i, c in enumerate(batch):
+        groups.setdefault(c["doc"].collection, []).append(i)
+    return groups
+
+
+async def _run(
+    pieces: "Iterator[_Piece] | AsyncIterator[_Piece]",
+    docs: list[_Doc],
+    progress: ProgressCallback | None,
+    on_written: Callable[[_Doc], None] | None = None,
+) -> list[dict]:
+    """Embed and write ``pieces``; ``on_written(doc)`` fires once all of a URL item's chunks are stored."""
+    embedder = get_embedder()
+    splitter = pdf._get_splitter()
+
+    def chunk(piece: _Piece, seg_idx: int) -> list[dict]:
+        return _chunk_piece(piece, seg_idx, splitter)
+
+    def embed(batch: list[dict], pieces_by_idx: dict[int, _Piece]) -> list:
+        vectors: list = [None] * len(batch)
+        if not embedder:
+            return vectors
+        segments = {i: p.segment for i, p in pieces_by_idx.items() if p.segment is not None}
+        for name, idx in _group_by_collection(batch).items():
+            group = [batch[i] for i in idx]
+
+            def embed_missing(todo: list[int]) -> list:
+                sub = [group[k] for k in todo]
+                if segments:
+                    return pdf._embed_chunks_late(sub, segments, embedder)
+                return embedder.embed_batch([c["text"] for c in sub])
+
+            group_vectors, hashes = embed_with_reuse(
+                get_collection(name), [c["text"] for c in group], embed_missing
+            )
+            for i, c, vec, h in zip(idx, group, group_vectors, hashes):
+                c["chunk_hash"] = h
+                vectors[i] = vec
+        return vectors
+
+    def write(batch: list[dict], embeddings: list) -> int:
+        written = 0
+        for name, idx in _group_by_collection(batch).items():
+            ids, texts, metas, embs = [], [], [], []
+            for i in idx:
+                c, emb = batch[i], embeddings[i]
+                if emb is None:
+                    continue
+                doc = c["doc"]
+                ids.append(f"{doc.source_id}_{c['metadata']['chunk_index']}")
+                texts.append(c["text"])
+                metas.append({
+                    "source_id": doc.source_id,
+                    **c["metadata"],
+                    "content_hash": doc.content_hash,
+                    "chunk_hash": c["chunk_hash"],
+                })
+                embs.append(emb.tolist())
+            if ids:
+                vector_store.call(get_collection(name), "add", ids=ids, embeddings=embs, documents=texts, metadatas=metas)
+                written += len(ids)
+                for i in idx:
+                    if embeddings[i] is not None:
+                        batch[i]["doc"].status = "ingested"
+                        batch[i]["doc"].chunks += 1
+                if name == web.COLLECTION:
+                    for m in metas:
+                        web.scrape_times.note(m["source_id"], m.get("scraped_at") or "")
+        if on_written:
+            for doc in {id(c["doc"]): c["doc"] for c in batch}.values():
+                if doc.records and doc.chunks == len(doc.records):
+                    on_written(doc)
+        return written
+
+    def rollback() -> None:
+        # Drop documents cut off mid-write: their chunks carry the content hash and would
+        # otherwise be taken as finished duplicates. URL items already reported complete stay.
+        for doc in docs:
+            if doc.chunks and not (doc.records and doc.chunks == len(doc.records)):
+                vector_store.call(get_collection(doc.collection), "delete", where={"source_id": doc.source_id})
+                web.scrape_times.forget(doc.source_id)
+
+    await run_pipeline(
+        pieces,
+        chunk,
+        embed,
+        write,
+        batch_size=settings.ingest_batch_size,
+        queue_depth=settings.ingest_queue_depth,
+        progress=progress,
+        on_failure=rollback,
+    )
+    for doc in docs:
+        if doc.status == "failed" and not doc.error:
+            doc.source_id, doc.error = None, "No extractable text"
+    return [doc.result() for doc in docs]
+
+
+async def ingest_bulk_urls(urls: list[str], progress: ProgressCallback | None = None) -> list[dict]:
+    """Ingest web pages and YouTube videos together. Returns one result per URL, in request order."""
+    docs = [_Doc(item=url, kind="youtube" if _is_youtube(url) else "web") for url in urls]
+    return await _run(_iter_url_docs(docs), docs, progress)
+
+
+async def ingest_youtube_collection(url: str, progress: ProgressCallback | None = None) -> list[dict]:
+    """Expand a playlist or channel URL and ingest its videos as one bulk job. Returns one result per video."""
+    video_ids = list(dict.fromkeys(await youtube.get_youtube_provider().list_videos(url)))
+    if not video_ids:
+        raise ValueError(f"No videos found at {url}")
+    if progress:
+        progress("discover", len(video_ids))
+    urls = [f"https://www.youtube.com/watch?v={vid}" for vid in video_ids[: settings.bulk_max_items]]
+    return await ingest_bulk_urls(urls, progress)
+
+
+async def ingest_bulk_zip(source: "Path | bytes", progress: ProgressCallback | None = None) -> list[dict]:
+    """Ingest every supported document in a zip archive. Returns one result per member."""
+    docs: list[_Doc] = []
+    return await _run(_iter_zip_docs(source, docs), docs, progress)
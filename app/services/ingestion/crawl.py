@@ -0,0 +1,384 @@
+"""
+Site crawl ingestion.
+
+A crawl starts from a page (following links breadth-first up to ``max_depth``)
+or from a ``sitemap.xml``. It stays within the allowed hosts and optional path
+prefix, honours robots.txt (including ``Crawl-delay``), and spaces requests to
+each host by at least ``delay_seconds``. Canonical URLs are de-duplicated, and
+fetched pages feed the shared bulk pipeline, so embedding and Chroma writes
+are batched across pages.
+
+Every discovered URL and its state is persisted in ``crawl_pages`` as the
+crawl runs; ``resume_crawl`` picks up the still-queued URLs after a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import PurePosixPath
+from typing import AsyncIterator
+from urllib.parse import urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.executors import run_cpu_bound
+from app.core.http import ROBOTS_AGENT, fetch
+from app.models.crawl import Crawl, CrawlPage, CrawlStatus, PageState
+from app.services.fetch_cache import fetch_extracted
+from app.services.ingestion import web
+from app.services.ingestion.bulk import _claim_source, _Doc, _Piece, _run, _SeenHashes
+from app.services.ingestion.dedup import content_hash
+from app.services.ingestion.pipeline import ProgressCallback
+from app.services.ingestion.web_parse import parse_crawled_page
+
+logger = logging.getLogger(__name__)
+
+_SKIP_EXTENSIONS = {
+    ".pdf", ".zip", ".gz", ".tar", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico",
+    ".css", ".js", ".json", ".xml", ".mp3", ".mp4", ".webm", ".woff", ".woff2", ".ttf", ".exe",
+}
+_SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+_MAX_SITEMAPS = 50
+
+# Crawls running in this process; a resume while one is still going would fetch pages twice.
+_active: set[str] = set()
+
+
+@dataclass
+class CrawlOptions:
+    max_depth: int = field(default_factory=lambda: settings.crawl_max_depth)
+    max_pages: int = field(default_factory=lambda: settings.crawl_max_pages)
+    allowed_hosts: list[str] = field(default_factory=list)   # empty = the root URL's host
+    path_prefix: str = ""
+    respect_robots: bool = True
+    delay_seconds: float = field(default_factory=lambda: settings.crawl_delay_seconds)
+
+
+def normalize_url(url: str) -> str | None:
+    """Canonical form used for de-duplication; None for non-HTTP(S) URLs."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if port and (parts.scheme, port) not in (("http", 80), ("https", 443)):
+        netloc = f"{netloc}:{port}"
+    return urlunsplit((parts.scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def _is_sitemap(url: str) -> bool:
+    path = urlsplit(url).path.lower()
+    return path.endswith(".xml") or path.endswith(".xml.gz")
+
+
+def _parse_sitemap(body: bytes) -> tuple[list[str], list[str]]:
+    """Return ``(page URLs, child sitemap URLs)`` from a urlset or sitemapindex."""
+    if body[:2] == b"\x1f\x8b":
+        body = gzip.decompress(body)
+    root = ET.fromstring(body)
+    locs = [el.text.strip() for el in root.iter(f"{_SITEMAP_NS}loc") if el.text]
+    if root.tag == f"{_SITEMAP_NS}sitemapindex":
+        return [], locs
+    return locs, []
+
+
+class _CrawlStore:
+    """Persists crawl pages; every call uses its own short session."""
+
+    def __init__(self, crawl_id: str, session_factory=AsyncSessionLocal) -> None:
+        self.crawl_id = crawl_id
+        self._sessions = session_factory
+
+    async def add_pages(self, pages: list[tuple[str, int]]) -> None:
+        if not pages:
+            return
+        async with self._sessions() as db:
+            db.add_all(CrawlPage(crawl_id=self.crawl_id, url=u, depth=d) for u, d in pages)
+            await db.commit()
+
+    async def mark(self, url: str, state: PageState, source_id: str | None = None, error: str | None = None) -> None:
+        async with self._sessions() as db:
+            await db.execute(
+                update(CrawlPage)
+                .where(CrawlPage.crawl_id == self.crawl_id, CrawlPage.url == url)
+                .values(state=state, source_id=source_id, error=error)
+            )
+            await db.commit()
+
+    async def set_status(self, status: CrawlStatus, error: str | None = None) -> None:
+        async with self._sessions() as db:
+            await db.execute(update(Crawl).where(Crawl.id == self.crawl_id).values(status=status, error=error))
+            await db.commit()
+
+    async def pages(self) -> list[CrawlPage]:
+        async with self._sessions() as db:
+            rows = await db.execute(
+                select(CrawlPage).where(CrawlPage.crawl_id == self.crawl_id).order_by(CrawlPage.depth)
+            )
+            return list(rows.scalars())
+
+
+class _Crawler:
+    def __init__(self, root_url: str, options: CrawlOptions, store: _CrawlStore, progress: ProgressCallback | None):
+        self.root_url = root_url
+        self.options = options
+        self.store = store
+        self._report = progress or (lambda stage, n: None)
+        root_host = urlsplit(root_url).hostname or ""
+        self.hosts = {h.lower() for h in options.allowed_hosts} or {root_host.lower()}
+        self.frontier: deque[tuple[str, int]] = deque()
+        self.seen: set[str] = set()
+        self.counts: Counter = Counter()
+        self.fetched = 0
+        self.written: list[_Doc] = []
+        self.in_flight: list[_Doc] = []   # handed to the pipeline, not yet marked ingested
+        self.hashes = _SeenHashes()
+        self._robots: dict[str, RobotFileParser | None] = {}
+        self._robots_lock = asyncio.Lock()
+        self._host_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._next_at: dict[str, float] = {}
+
+    def in_scope(self, url: str) -> bool:
+        parts = urlsplit(url)
+        if (parts.hostname or "") not in self.hosts:
+            return False
+        if self.options.path_prefix and not parts.path.startswith(self.options.path_prefix):
+            return False
+        return PurePosixPath(parts.path).suffix.lower() not in _SKIP_EXTENSIONS
+
+    async def enqueue(self, urls: list[str], depth: int) -> None:
+        new = []
+        for raw in urls:
+            url = normalize_url(raw)
+            if url is None or url in self.seen or not self.in_scope(url):
+                continue
+            if len(self.seen) >= self.options.max_pages:
+                break
+            self.seen.add(url)
+            new.append((url, depth))
+        # Persist first: a queued page visited before its row exists would have its state lost.
+        await self.store.add_pages(new)
+        self.frontier.extend(new)
+        self._report("discovered", len(self.seen))
+
+    async def seed_from_sitemap(self, url: str) -> None:
+        queue, fetched, pages = [url], 0, []
+        while queue and fetched < _MAX_SITEMAPS and len(pages) < self.options.max_pages:
+            sitemap = queue.pop(0)
+            # Sitemaps are fetched like pages: subject to robots.txt and the per-host delay.
+            robots = await self._robots_for(sitemap) if self.options.respect_robots else None
+            if robots is not None and not robots.can_fetch(ROBOTS_AGENT, sitemap):
+                logger.info("sitemap %s disallowed by robots.txt", sitemap)
+                continue
+            await self._wait_turn(sitemap, robots)
+            response = await fetch(sitemap)
+            fetched += 1
+            found, children = _parse_sitemap(response.content)
+            pages.extend(found)
+            queue.extend(children)
+        await self.enqueue(pages, 0)
+
+    async def _robots_for(self, url: str) -> RobotFileParser | None:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        async with self._robots_lock:
+            if origin not in self._robots:
+                parser = None
+                try:
+                    response = await fetch(f"{origin}/robots.txt")
+                    parser = RobotFileParser()
+                    parser.parse(response.text.splitlines())
+                except Exception:
+                    pass   # no robots.txt (or unreachable): everything is allowed
+                self._robots[origin] = parser
+        return self._robots[origin]
+
+    async def _wait_turn(self, url: str, robots: RobotFileParser | None) -> None:
+        host = urlsplit(url).netloc
+        delay = self.options.delay_seconds
+        if robots is not None:
+            delay = max(delay, float(robots.crawl_delay(ROBOTS_AGENT) or 0))
+        async with self._host_locks[host]:
+            wait = self._next_at.get(host, 0.0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_at[host] = time.monotonic() + delay
+
+    async def _finish(self, url: str, state: PageState, source_id: str | None = None, error: str | None = None) -> None:
+        self.counts[state.value] += 1
+        self._report(state.value, self.counts[state.value])
+        await self.store.mark(url, state, source_id, error)
+
+    async def visit(self, url: str, depth: int) -> _Doc | None:
+        """Fetch one page, queue its links, and return it as a doc ready for chunk/embed."""
+        robots = await self._robots_for(url) if self.options.respect_robots else None
+        if robots is not None and not robots.can_fetch(ROBOTS_AGENT, url):
+            await self._finish(url, PageState.skipped, error="Disallowed by robots.txt")
+            return None
+        await self._wait_turn(url, robots)
+
+        async def extract(html: str) -> dict:
+            return await run_cpu_bound("web_parse", settings.web_parse_workers, parse_crawled_page, url, html)
+
+        try:
+            page = await fetch_extracted(url, extract, key=f"crawl:{url}")
+        except Exception as exc:
+            await self._finish(url, PageState.failed, error=str(exc) or type(exc).__name__)
+            return None
+        self.fetched += 1
+        self._report("fetched", self.fetched)
+
+        if depth < self.options.max_depth:
+            await self.enqueue(page["links"], depth + 1)
+
+        canonical = normalize_url(page["canonical"] or "") or url
+        if canonical != url and canonical in self.seen:
+            await self._finish(url, PageState.duplicate, error=f"Canonical URL is {canonical}")
+            return None
+        self.seen.add(canonical)
+        if not page["content"].strip():
+            await self._finish(url, PageState.skipped, error="No readable content")
+            return None
+
+        doc = _Doc(item=url, kind="web")
+        loop = asyncio.get_running_loop()
+        digest = content_hash(page["content"])
+        if not await loop.run_in_executor(None, _claim_source, doc, web.COLLECTION, digest, self.hashes):
+            await self._finish(url, PageState.duplicate, source_id=doc.source_id)
+            return None
+        now = datetime.now(timezone.utc).isoformat()
+        doc.records = await web._chunk_records(canonical, page, now)
+        if not doc.records:
+            await self._finish(url, PageState.skipped, error="No readable content")
+            return None
+        return doc
+
+    async def flush_written(self) -> None:
+        while self.written:
+            doc = self.written.pop()
+            self.in_flight.remove(doc)
+            doc.records = []
+            await self._finish(doc.item, PageState.ingested, source_id=doc.source_id)
+
+    async def pieces(self) -> AsyncIterator[_Piece]:
+        limit = max(1, settings.crawl_concurrency)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                await self.flush_written()
+                while len(pending) < limit and self.frontier:
+                    pending.add(asyncio.ensure_future(self.visit(*self.frontier.popleft())))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if (doc := task.result()) is not None:
+                        self.in_flight.append(doc)
+                        yield _Piece(doc)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def run(self) -> dict:
+        # ``on_written`` fires on an executor thread; the list is drained on the loop. On a
+        # failed write, ``_run`` deletes the in-flight pages it had only partly stored.
+        try:
+            await _run(self.pieces(), self.in_flight, self._report_pipeline, on_written=self.written.append)
+        finally:
+            await self.flush_written()
+        return dict(self.counts)
+
+    def _report_pipeline(self, stage: str, count: int) -> None:
+        if stage in ("embed", "write"):
+            self._report(stage, count)
+
+
+async def create_crawl(root_url: str, options: CrawlOptions, session_factory=AsyncSessionLocal) -> str:
+    async with session_factory() as db:
+        crawl = Crawl(root_url=root_url, options=json.dumps(asdict(options)))
+        db.add(crawl)
+        await db.commit()
+        return crawl.id
+
+
+async def run_crawl(
+    crawl_id: str,
+    progress: ProgressCallback | None = None,
+    session_factory=AsyncSessionLocal,
+) -> dict:
+    """Run (or resume) a crawl until its frontier is empty. Returns page counts by state."""
+    if crawl_id in _active:
+        raise ValueError(f"Crawl {crawl_id} is already running")
+    _active.add(crawl_id)
+    try:
+        return await _run_crawl(crawl_id, progress, session_factory)
+    finally:
+        _active.discard(crawl_id)
+
+
+def is_crawl_active(crawl_id: str) -> bool:
+    return crawl_id in _active
+
+
+async def _run_crawl(crawl_id: str, progress: ProgressCallback | None, session_factory) -> dict:
+    async with session_factory() as db:
+        crawl = await db.get(Crawl, crawl_id)
+    if crawl is None:
+        raise ValueError(f"Crawl {crawl_id} not found")
+
+    store = _CrawlStore(crawl_id, session_factory)
+    crawler = _Crawler(crawl.root_url, CrawlOptions(**json.loads(crawl.options)), store, progress)
+    pages = await store.pages()
+    try:
+        if pages:
+            crawler.seen.update(p.url for p in pages)
+            crawler.frontier.extend((p.url, p.depth) for p in pages if p.state == PageState.queued)
+            crawler.counts.update(p.state.value for p in pages if p.state != PageState.queued)
+        elif _is_sitemap(crawl.root_url):
+            await crawler.seed_from_sitemap(crawl.root_url)
+        else:
+            await crawler.enqueue([crawl.root_url], 0)
+        await store.set_status(CrawlStatus.running)
+        counts = await crawler.run()
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        await store.set_status(CrawlStatus.failed, str(exc) or type(exc).__name__)
+        raise
+    await store.set_status(CrawlStatus.completed)
+    return {"crawl_id": crawl_id, "pages": counts}
+
+
+async def crawl_summary(crawl_id: str, session_factory=AsyncSessionLocal) -> dict | None:
+    async with session_factory() as db:
+        crawl = await db.get(Crawl, crawl_id)
+        if crawl is None:
+            return None
+        rows = await db.execute(
+            select(CrawlPage.state, func.count())
+            .where(CrawlPage.crawl_id == crawl_id)
+            .group_by(CrawlPage.state)
+        )
+        counts = {state.value: n for state, n in rows}
+    return {
+        "crawl_id": crawl.id,
+        "root_url": crawl.root_url,
+        "status": crawl.status.value,
+        "error": crawl.error,
+        "options": json.loads(crawl.options),
+        "pages": counts,
+    }
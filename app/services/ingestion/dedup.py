@@ -0,0 +1,107 @@
+"""
+Content-addressed deduplication for ingestion.
+
+Every stored chunk carries two hashes in its Chroma metadata:
+
+- ``content_hash`` — the hash of the whole source (uploaded file bytes,
+  extracted web text, or YouTube video id). Ingesting an exact duplicate
+  returns the existing ``source_id`` without doing any work.
+- ``chunk_hash`` — the hash of the chunk's normalised text. Identical chunks
+  reuse the embedding already stored for them instead of being re-embedded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from app.core import vector_store
+
+_HASH_BLOCK = 1 << 20
+_IN_BATCH = 500     # hashes per ``$in`` lookup
+
+
+def content_hash(data: "bytes | str") -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: "str | Path") -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(_HASH_BLOCK):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    return content_hash(" ".join(text.split()))
+
+
+def find_source(collection, source_hash: str) -> str | None:
+    """Return the source_id already stored under ``source_hash``, if any."""
+    res = vector_store.call(collection, "get", where={"content_hash": source_hash}, limit=1, include=["metadatas"])
+    metas = res.get("metadatas") or []
+    return metas[0].get("source_id") if metas else None
+
+
+def stored_chunk_hashes(collection, hashes: list[str]) -> set[str]:
+    """The subset of ``hashes`` already stored, without fetching embeddings."""
+    unique = list(dict.fromkeys(hashes))
+    found: set[str] = set()
+    for i in range(0, len(unique), _IN_BATCH):
+        res = vector_store.call(
+            collection, "get", where={"chunk_hash": {"$in": unique[i : i + _IN_BATCH]}}, include=["metadatas"]
+        )
+        found.update((meta or {}).get("chunk_hash") for meta in res.get("metadatas") or [])
+    return found
+
+
+def lookup_embeddings(collection, hashes: list[str]) -> dict[str, np.ndarray]:
+    """Map each chunk hash that is already stored to its embedding."""
+    unique = list(dict.fromkeys(hashes))
+    found: dict[str, np.ndarray] = {}
+    for i in range(0, len(unique), _IN_BATCH):
+        res = vector_store.call(
+            collection,
+            "get",
+            where={"chunk_hash": {"$in": unique[i : i + _IN_BATCH]}},
+            include=["metadatas", "embeddings"],
+        )
+        embeddings = res.get("embeddings")
+        if embeddings is None:
+            continue
+        for meta, emb in zip(res.get("metadatas") or [], embeddings):
+            h = (meta or {}).get("chunk_hash")
+            if h and h not in found and emb is not None:
+                found[h] = np.asarray(emb, dtype=np.float32)
+    return found
+
+
+def embed_with_reuse(
+    collection,
+    texts: list[str],
+    embed_missing: Callable[[list[int]], list],
+) -> tuple[list, list[str]]:
+    """Embed ``texts``, reusing stored embeddings for chunks seen before.
+
+    ``embed_missing(indices)`` must return one vector per index; it is only
+    called for the first occurrence of each hash that is not already stored.
+    Returns ``(vectors, chunk_hashes)`` aligned with ``texts``. Blocking.
+    """
+    hashes = [chunk_hash(t) for t in texts]
+    known = lookup_embeddings(collection, hashes) if texts else {}
+    first_seen: dict[str, int] = {}
+    for i, h in enumerate(hashes):
+        if h not in known:
+            first_seen.setdefault(h, i)
+    todo = list(first_seen.values())
+    if todo:
+        for i, vec in zip(todo, embed_missing(todo)):
+            if vec is not None:
+                known[hashes[i]] = vec
+    return [known.get(h) for h in hashes], hashes
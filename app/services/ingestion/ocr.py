@@ -0,0 +1,139 @@
+"""
+OCR fallback for PDF pages that have no text layer.
+
+Pages are rendered at a DPI chosen from the page size, in grayscale unless the
+page actually carries colour, and recognised with tesseract on a process pool.
+Recognised text is cached on disk keyed by a hash of the rendered page image,
+so re-uploads and retries of the same scan skip tesseract entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.executors import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+OCR_TARGET_PX = 2400        # longest rendered side; ~200 DPI on A4/Letter
+OCR_MIN_DPI = 150
+OCR_MAX_DPI = 300
+_THUMB_DPI = 18
+_COLOUR_TOLERANCE = 24      # max channel spread for a pixel to count as grey
+
+
+def _choose_dpi(page) -> int:
+    longest_pt = max(page.rect.width, page.rect.height) or 1
+    dpi = round(OCR_TARGET_PX * 72 / longest_pt)
+    return max(OCR_MIN_DPI, min(OCR_MAX_DPI, dpi))
+
+
+def _is_grayscale(page) -> bool:
+    """Render a tiny thumbnail and check whether any pixel carries real colour."""
+    import numpy as np
+    pix = page.get_pixmap(dpi=_THUMB_DPI)
+    if pix.n < 3:
+        return True
+    px = np.frombuffer(pix.samples, dtype=np.uint8).reshape(-1, pix.n)[:, :3].astype(np.int16)
+    spread = px.max(axis=1) - px.min(axis=1)
+    return bool((spread <= _COLOUR_TOLERANCE).mean() >= 0.99)
+
+
+def _render(page):
+    import fitz
+    colorspace = fitz.csGRAY if _is_grayscale(page) else fitz.csRGB
+    return page.get_pixmap(dpi=_choose_dpi(page), colorspace=colorspace)
+
+
+def _cache_key(pix, lang: str) -> str:
+    h = hashlib.sha256()
+    h.update(f"{pix.width}x{pix.height}x{pix.n}:{lang}:".encode())
+    h.update(pix.samples)
+    return h.hexdigest()
+
+
+def _cache_path(cache_dir: str, key: str) -> Path:
+    return Path(cache_dir) / key[:2] / f"{key}.txt"
+
+
+def _read_cache(cache_dir: str, key: str) -> str | None:
+    if not cache_dir:
+        return None
+    try:
+        return _cache_path(cache_dir, key).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _write_cache(cache_dir: str, key: str, text: str) -> None:
+    if not cache_dir:
+        return
+    path = _cache_path(cache_dir, key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning("ocr_cache_write_failed key=%s", key)
+
+
+def _ocr_page(page, cache_dir: str, lang: str) -> str:
+    pix = _render(page)
+    key = _cache_key(pix, lang)
+    cached = _read_cache(cache_dir, key)
+    if cached is not None:
+        return cached
+
+    import pytesseract
+    from PIL import Image
+    mode = "L" if pix.n == 1 else "RGB"
+    img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+    text = pytesseract.image_to_string(img, lang=lang)
+    _write_cache(cache_dir, key, text)
+    return text
+
+
+def _ocr_page_task(path: "str | bytes", page_number: int, cache_dir: str, lang: str) -> str:
+    """Process-pool task: open the PDF independently and OCR one page (1-based)."""
+    import fitz
+    doc = fitz.open(stream=path, filetype="pdf") if isinstance(path, bytes) else fitz.open(path)
+    try:
+        return _ocr_page(doc[page_number - 1], cache_dir, lang)
+    except Exception as exc:
+        logger.warning("ocr_failed page=%s: %s", page_number, exc)
+        return ""
+    finally:
+        doc.close()
+
+
+def ocr_pages(path: "str | Path | bytes", page_numbers: list[int]) -> dict[int, str]:
+    """OCR the given 1-based pages of a PDF (a path or in-memory bytes). Blocking — call from an executor."""
+    if not page_numbers:
+        return {}
+    cache_dir, lang, workers = settings.ocr_cache_dir, settings.ocr_lang, settings.ocr_workers
+    n = len(page_numbers)
+    if workers > 1 and n > 1:
+        # Workers get a path, never the bytes: pickling an in-memory upload once per page
+        # would copy the whole PDF through the pool n times. Spill it to disk once instead.
+        spilled = None
+        if isinstance(path, bytes):
+            fd, spilled = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(path)
+        src = spilled or str(path)
+        try:
+            pool = get_process_pool("ocr", workers)
+            texts = list(pool.map(_ocr_page_task, [src] * n, page_numbers, [cache_dir] * n, [lang] * n))
+        finally:
+            if spilled:
+                os.unlink(spilled)
+    else:
+        src = path if isinstance(path, bytes) else str(path)
+        texts = [_ocr_page_task(src, p, cache_dir, lang) for p in page_numbers]
+    return dict(zip(page_numbers, texts))
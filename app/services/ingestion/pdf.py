@@ -1,15 +1,28 @@
 import asyncio
+import io
 import uuid
+import weakref
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterable, Iterator, Mapping
 
+from app.core import vector_store
 from app.core.chroma import get_collection
+from app.core.config import settings
+from app.core.executors import get_process_pool
 from app.services.embedder import get_embedder
+from app.services.ingestion.dedup import content_hash, embed_with_reuse, find_source, hash_file
+from app.services.ingestion.docx_stream import iter_docx_paragraphs
+from app.services.ingestion.ocr import ocr_pages
+from app.services.ingestion.pipeline import ProgressCallback, run_pipeline
 
 COLLECTION = "pdf_chunks"
 CHUNK_SIZE = 1500
 CHUNK_OVERLAP = 200
+TEXT_BLOCK_CHARS = 64_000
+HEADING_MIN_FONT_SIZE = 13
 
 SUPPORTED_TYPES = {
     "application/pdf",
@@ -25,79 +38,174 @@ class _Segment:
     section_heading: str | None = None
 
 
-def _detect_pdf_heading(page) -> str | None:
+@dataclass
+class _PageLayout:
+    text: str
+    blocks: list[str]
+    # (font size, span text) for spans large enough to be a heading, largest first.
+    heading_candidates: list[tuple[float, str]]
+
+    @property
+    def heading(self) -> str | None:
+        return self.heading_candidates[0][1] if self.heading_candidates else None
+
+
+def _parse_page_layout(page) -> _PageLayout:
+    """Single ``dict`` pass over a page: plain text, block order and heading candidates.
+
+    Uses the plain-text flags so image blocks are never decoded, and rebuilds
+    the text exactly as ``page.get_text()`` would.
+    """
+    import fitz
+    layout = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+    blocks: list[str] = []
+    candidates: list[tuple[float, str]] = []
+    for block in layout["blocks"]:
+        if block.get("type", 0) != 0:
+            continue
+        lines: list[str] = []
+        for line in block.get("lines", []):
+            spans = line.get("spans", [])
+            for span in spans:
+                size = span.get("size", 0.0)
+                txt = span.get("text", "").strip()
+                if size > HEADING_MIN_FONT_SIZE and 3 < len(txt) < 200:
+                    candidates.append((size, txt))
+            lines.append("".join(span.get("text", "") for span in spans) + "\n")
+        blocks.append("".join(lines))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    return _PageLayout(text="".join(blocks), blocks=blocks, heading_candidates=candidates)
+
+
+def _extract_pdf_page(page, page_num: int) -> _Segment:
+    layout = _parse_page_layout(page)
+    return _Segment(text=layout.text, page_number=page_num, section_heading=layout.heading)
+
+
+def _extract_pdf_page_range(path: str, start: int, stop: int) -> list[_Segment]:
+    """Process-pool task: open the PDF independently and extract pages [start, stop)."""
+    import fitz
+    doc = fitz.open(path)
     try:
-        max_size, heading = 0.0, None
-        for block in page.get_text("dict")["blocks"]:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    size = span.get("size", 0.0)
-                    txt = span.get("text", "").strip()
-                    if size > max_size and 3 < len(txt) < 200:
-                        max_size, heading = size, txt
-        return heading if max_size > 13 else None
-    except Exception:
-        return None
-
-
-def _extract_pdf_segments(path: Path) -> list[_Segment]:
+        return [_extract_pdf_page(doc[i], i + 1) for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _fill_ocr(source: "Path | bytes", segments: list[_Segment]) -> list[_Segment]:
+    """OCR the pages in ``segments`` that have no text layer; drop any still empty."""
+    missing = [seg.page_number for seg in segments if not seg.text.strip()]
+    if missing:
+        texts = ocr_pages(source, missing)
+        for seg in segments:
+            if not seg.text.strip():
+                seg.text = texts.get(seg.page_number, "")
+    return [seg for seg in segments if seg.text.strip()]
+
+
+def _iter_pdf_segments_parallel(path: Path, page_count: int, workers: int) -> Iterator[_Segment]:
+    """Fan page ranges out to worker processes; yield segments in page order."""
+    pool = get_process_pool("pdf_extract", workers)
+    step = max(1, settings.pdf_pages_per_task)
+    ranges = deque((start, min(start + step, page_count)) for start in range(0, page_count, step))
+    pending: deque = deque()
+    try:
+        while ranges or pending:
+            # Keep a bounded window in flight so results never pile up ahead of the consumer.
+            while ranges and len(pending) < workers * 2:
+                pending.append(pool.submit(_extract_pdf_page_range, str(path), *ranges.popleft()))
+            yield from _fill_ocr(path, pending.popleft().result())
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+
+def _iter_pdf_segments(source: "Path | bytes") -> Iterator[_Segment]:
+    """Yield page segments from a PDF on disk or, for small uploads, held in memory."""
+    in_memory = isinstance(source, bytes)
     try:
         import fitz
-        doc = fitz.open(str(path))
-        segments: list[_Segment] = []
-        for page_num, page in enumerate(doc, start=1):
-            text = page.get_text()
-            heading = _detect_pdf_heading(page)
-            if not text.strip():
-                try:
-                    import pytesseract
-                    from PIL import Image
-                    pix = page.get_pixmap(dpi=200)
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    text = pytesseract.image_to_string(img)
-                except Exception:
-                    pass
-            if text.strip():
-                segments.append(_Segment(text=text, page_number=page_num, section_heading=heading))
-        doc.close()
-        return segments
     except ImportError:
         from pypdf import PdfReader
-        reader = PdfReader(str(path))
-        return [
-            _Segment(text=page.extract_text() or "", page_number=i + 1)
-            for i, page in enumerate(reader.pages)
-            if (page.extract_text() or "").strip()
-        ]
-
-
-def _extract_docx_segments(path: Path) -> list[_Segment]:
-    from docx import Document as DocxDocument
-    doc = DocxDocument(str(path))
-    segments: list[_Segment] = []
+        reader = PdfReader(io.BytesIO(source) if in_memory else str(source))
+        for i, page in enumerate(reader.pages):
+            text = page.extract_text() or ""
+            if text.strip():
+                yield _Segment(text=text, page_number=i + 1)
+        return
+
+    doc = fitz.open(stream=source, filetype="pdf") if in_memory else fitz.open(str(source))
+    page_count = doc.page_count
+    step = max(1, settings.pdf_pages_per_task)
+    workers = settings.pdf_extract_workers
+    # Worker processes reopen the file by path, so in-memory uploads stay serial.
+    if workers > 1 and page_count > step and not in_memory:
+        doc.close()
+        yield from _iter_pdf_segments_parallel(source, page_count, workers)
+        return
+
+    try:
+        # Extract a window of pages at a time so scanned pages in it OCR together.
+        for start in range(0, page_count, step):
+            window = [_extract_pdf_page(doc[i], i + 1) for i in range(start, min(start + step, page_count))]
+            yield from _fill_ocr(source, window)
+    finally:
+        doc.close()
+
+
+def _group_docx_paragraphs(paragraphs: Iterable[tuple[str | None, str]]) -> Iterator[_Segment]:
+    """Turn ``(style name, text)`` paragraphs into one segment per heading-delimited section."""
     current_heading: str | None = None
     current_paragraphs: list[str] = []
-    for para in doc.paragraphs:
-        if para.style.name.startswith("Heading"):
+    for style, text in paragraphs:
+        if style is not None and style.startswith("Heading"):
             if current_paragraphs:
-                segments.append(_Segment(text="\n".join(current_paragraphs), section_heading=current_heading))
+                yield _Segment(text="\n".join(current_paragraphs), section_heading=current_heading)
                 current_paragraphs = []
-            current_heading = para.text or current_heading
-        elif para.text.strip():
-            current_paragraphs.append(para.text)
+            current_heading = text or current_heading
+        elif text.strip():
+            current_paragraphs.append(text)
     if current_paragraphs:
-        segments.append(_Segment(text="\n".join(current_paragraphs), section_heading=current_heading))
-    return segments
+        yield _Segment(text="\n".join(current_paragraphs), section_heading=current_heading)
+
 
+def _iter_docx_segments(source: "Path | bytes") -> Iterator[_Segment]:
+    """Stream sections out of ``word/document.xml`` without building the python-docx tree."""
+    return _group_docx_paragraphs(iter_docx_paragraphs(source))
 
-def _extract_segments(file_path: "str | Path", content_type: str) -> list[_Segment]:
-    path = Path(file_path)
+
+def _iter_text_segments(source: "Path | bytes", block_chars: int = TEXT_BLOCK_CHARS) -> Iterator[_Segment]:
+    """Read a text file in blocks, cutting each block at the last paragraph break."""
+    buf = ""
+    if isinstance(source, bytes):
+        fh = io.TextIOWrapper(io.BytesIO(source), encoding="utf-8", errors="replace")
+    else:
+        fh = source.open(encoding="utf-8", errors="replace")
+    with fh:
+        while block := fh.read(block_chars):
+            buf += block
+            if len(block) < block_chars:
+                break
+            cut = buf.rfind("\n\n")
+            if cut <= 0:
+                cut = buf.rfind("\n")
+            if cut <= 0:
+                cut = len(buf)
+            text, buf = buf[:cut], buf[cut:]
+            if text.strip():
+                yield _Segment(text=text)
+    if buf.strip():
+        yield _Segment(text=buf)
+
+
+def _iter_segments(file_path: "str | Path | bytes", content_type: str) -> Iterator[_Segment]:
+    source = file_path if isinstance(file_path, bytes) else Path(file_path)
     if content_type == "text/plain":
-        return [_Segment(text=path.read_text(encoding="utf-8", errors="replace"))]
+        return _iter_text_segments(source)
     if content_type == "application/pdf":
-        return _extract_pdf_segments(path)
+        return _iter_pdf_segments(source)
     if content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return _extract_docx_segments(path)
+        return _iter_docx_segments(source)
     raise ValueError(f"Unsupported content type: {content_type}")
 
 
@@ -112,23 +220,22 @@ def _get_splitter():
     )
 
 
-def _chunk_segments(segments: list[_Segment]) -> list[dict]:
-    splitter = _get_splitter()
+def _chunk_segment(seg: _Segment, seg_idx: int, splitter=None) -> list[dict]:
+    splitter = splitter or _get_splitter()
     chunks: list[dict] = []
-    for seg_idx, seg in enumerate(segments):
-        for doc in splitter.create_documents([seg.text]):
-            if doc.page_content.strip():
-                chunks.append({
-                    "text": doc.page_content,
-                    "page_number": seg.page_number,
-                    "section_heading": seg.section_heading,
-                    "seg_idx": seg_idx,
-                    "char_start": doc.metadata.get("start_index", 0),
-                })
+    for doc in splitter.create_documents([seg.text]):
+        if doc.page_content.strip():
+            chunks.append({
+                "text": doc.page_content,
+                "page_number": seg.page_number,
+                "section_heading": seg.section_heading,
+                "seg_idx": seg_idx,
+                "char_start": doc.metadata.get("start_index", 0),
+            })
     return chunks
 
 
-def _embed_chunks_late(raw_chunks: list[dict], segments: list[_Segment], embedder) -> list:
+def _embed_chunks_late(raw_chunks: list[dict], segments: Mapping[int, _Segment], embedder) -> list:
     results: list = [None] * len(raw_chunks)
     i = 0
     while i < len(raw_chunks):
@@ -139,7 +246,7 @@ def _embed_chunks_late(raw_chunks: list[dict], segments: list[_Segment], embedde
         group = raw_chunks[i:j]
         chunk_texts = [c["text"] for c in group]
         char_starts = [c.get("char_start", 0) for c in group]
-        if seg_idx is not None and seg_idx < len(segments):
+        if seg_idx in segments:
             embs = embedder.embed_late(segments[seg_idx].text, chunk_texts, char_starts)
         else:
             embs = embedder.embed_independently(chunk_texts)
@@ -149,42 +256,278 @@ def _embed_chunks_late(raw_chunks: list[dict], segments: list[_Segment], embedde
     return results
 
 
-async def ingest_pdf(file_path: "str | Path", filename: str, content_type: str) -> str:
-    """Extract, chunk, embed and store document in ChromaDB. Returns source_id."""
-    source_id = str(uuid.uuid4())
-    loop = asyncio.get_running_loop()
+def _embed_batch(collection, embedder, batch: list[dict], segments: Mapping[int, _Segment]) -> list:
+    if not embedder:
+        return [None] * len(batch)
+    vectors, hashes = embed_with_reuse(
+        collection,
+        [c["text"] for c in batch],
+        lambda todo: _embed_chunks_late([batch[i] for i in todo], segments, embedder),
+    )
+    for c, h in zip(batch, hashes):
+        c["chunk_hash"] = h
+    return vectors
 
-    segments = await loop.run_in_executor(None, _extract_segments, file_path, content_type)
-    raw_chunks = await loop.run_in_executor(None, _chunk_segments, segments)
 
-    embedder = get_embedder()
-    if embedder:
-        embeddings = await loop.run_in_executor(
-            None, _embed_chunks_late, raw_chunks, segments, embedder
-        )
-    else:
-        embeddings = [None] * len(raw_chunks)
+async def ingest_pdf(
+    file_path: "str | Path | bytes",
+    filename: str,
+    content_type: str,
+    progress: ProgressCallback | None = None,
+    file_hash: str | None = None,
+) -> str:
+    """Stream a document through extract → chunk → embed → ChromaDB. Returns source_id.
 
+    ``file_path`` may be the raw bytes of a small upload. Pass ``file_hash`` when
+    the sha256 is already known to skip re-reading the file. An upload whose
+    bytes were ingested before returns the existing source_id. If ingestion
+    fails, the chunks already written are deleted so a retry starts clean.
+    """
+    loop = asyncio.get_running_loop()
     collection = get_collection(COLLECTION)
-    ids, docs, metas, embs = [], [], [], []
+    if file_hash is None:
+        if isinstance(file_path, bytes):
+            file_hash = content_hash(file_path)
+        else:
+            file_hash = await loop.run_in_executor(None, hash_file, file_path)
+    existing = await loop.run_in_executor(None, find_source, collection, file_hash)
+    if existing:
+        return existing
+
+    source_id = str(uuid.uuid4())
+    embedder = get_embedder()
+    splitter = _get_splitter()
     now = datetime.now(timezone.utc).isoformat()
 
-    for i, (chunk, emb) in enumerate(zip(raw_chunks, embeddings)):
-        if emb is None:
-            continue
-        ids.append(f"{source_id}_{i}")
-        docs.append(chunk["text"])
-        metas.append({
-            "source_id": source_id,
-            "filename": filename,
-            "page_number": chunk.get("page_number") or 0,
-            "section_heading": chunk.get("section_heading") or "",
-            "chunk_index": i,
-            "ingested_at": now,
-        })
-        embs.append(emb.tolist())
-
-    if ids:
-        collection.add(ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+    def chunk(seg: _Segment, seg_idx: int) -> list[dict]:
+        page_hash = content_hash(seg.text)
+        return [{**c, "page_hash": page_hash} for c in _chunk_segment(seg, seg_idx, splitter)]
+
+    def embed(batch: list[dict], segments: dict[int, _Segment]) -> list:
+        return _embed_batch(collection, embedder, batch, segments)
+
+    def write(batch: list[dict], embeddings: list) -> int:
+        ids, docs, metas, embs = [], [], [], []
+        for chunk, emb in zip(batch, embeddings):
+            if emb is None:
+                continue
+            i = chunk["chunk_index"]
+            ids.append(f"{source_id}_{i}")
+            docs.append(chunk["text"])
+            metas.append({
+                "source_id": source_id,
+                "filename": filename,
+                "page_number": chunk.get("page_number") or 0,
+                "section_heading": chunk.get("section_heading") or "",
+                "chunk_index": i,
+                "segment_index": chunk["seg_idx"],
+                "page_hash": chunk["page_hash"],
+                "ingested_at": now,
+                "content_hash": file_hash,
+                "chunk_hash": chunk["chunk_hash"],
+            })
+            embs.append(emb.tolist())
+        if ids:
+            vector_store.call(collection, "add", ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+        return len(ids)
 
+    await run_pipeline(
+        _iter_segments(file_path, content_type),
+        chunk,
+        embed,
+        write,
+        batch_size=settings.ingest_batch_size,
+        queue_depth=settings.ingest_queue_depth,
+        progress=progress,
+        # Partial chunks carry the file hash, so left behind they would pass as a finished duplicate.
+        on_failure=lambda: vector_store.call(collection, "delete", where={"source_id": source_id}),
+    )
     return source_id
+
+
+def _stored_pages(collection, source_id: str) -> tuple[dict[tuple, list], dict]:
+    """Group a source's stored chunks by ``(segment_index, page_hash)``.
+
+    Returns ``(pages, info)``; ``info`` holds the latest ``content_hash``,
+    ``version`` and the next free ``chunk_index``. Chunks stored before page
+    hashes existed each form their own group that never matches.
+    """
+    res = vector_store.call(collection, "get", where={"source_id": source_id}, include=["metadatas"])
+    pages: dict[tuple, list] = {}
+    info = {"content_hashes": set(), "version": 0, "next_index": 0}
+    for cid, meta in zip(res["ids"], res["metadatas"]):
+        meta = meta or {}
+        key = (meta.get("segment_index"), meta["page_hash"]) if meta.get("page_hash") else (cid, None)
+        pages.setdefault(key, []).append((cid, meta))
+        info["content_hashes"].add(meta.get("content_hash"))
+        info["version"] = max(info["version"], meta.get("version", 1))
+        info["next_index"] = max(info["next_index"], meta.get("chunk_index", -1) + 1)
+    return pages, info
+
+
+# Per-source locks for ``ingest_pdf_version``; an entry goes once no update holds or awaits it.
+_version_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+async def ingest_pdf_version(
+    source_id: str,
+    file_path: "str | Path | bytes",
+    filename: str,
+    content_type: str,
+    progress: ProgressCallback | None = None,
+    file_hash: str | None = None,
+) -> dict:
+    """Replace ``source_id`` with a new version of the document, re-embedding only changed pages.
+
+    Every page (segment) is hashed as it is extracted. Pages whose text is
+    already stored keep their chunks and embeddings; only their metadata is
+    rewritten. Changed pages are chunked, embedded and added under new chunk
+    ids, and the chunks of pages that no longer exist are deleted.
+
+    New chunks carry no ``content_hash`` until every page is in place, and are
+    deleted again if the update fails, so a retry with the same bytes redoes
+    the work instead of seeing a half-applied version as current. Updates to
+    the same source run one at a time.
+    """
+    # Two versions applied at once would take the same chunk indices and delete each other's pages.
+    lock = _version_locks.setdefault(source_id, asyncio.Lock())
+    async with lock:
+        return await _ingest_pdf_version(source_id, file_path, filename, content_type, progress, file_hash)
+
+
+async def _ingest_pdf_version(
+    source_id: str,
+    file_path: "str | Path | bytes",
+    filename: str,
+    content_type: str,
+    progress: ProgressCallback | None,
+    file_hash: str | None,
+) -> dict:
+    loop = asyncio.get_running_loop()
+    collection = get_collection(COLLECTION)
+    if file_hash is None:
+        if isinstance(file_path, bytes):
+            file_hash = content_hash(file_path)
+        else:
+            file_hash = await loop.run_in_executor(None, hash_file, file_path)
+    stored, info = await loop.run_in_executor(None, _stored_pages, collection, source_id)
+    if not stored:
+        raise ValueError(f"Document source {source_id} not found")
+    version = info["version"] + 1
+    summary = {"source_id": source_id, "version": info["version"], "pages_kept": len(stored),
+               "pages_changed": 0, "pages_removed": 0, "chunks_added": 0, "chunks_removed": 0}
+    if info["content_hashes"] == {file_hash}:
+        return summary
+
+    available: dict[str, list[tuple]] = {}
+    for key in stored:
+        if key[1] is not None:
+            available.setdefault(key[1], []).append(key)
+    kept: list[tuple[tuple, int, _Segment]] = []   # (stored key, new segment index, segment)
+    changed_pages: list[tuple[int, str]] = []      # (segment index, page hash) per changed segment
+
+    def changed_segments() -> Iterator[_Segment]:
+        for pos, seg in enumerate(_iter_segments(file_path, content_type)):
+            page_hash = content_hash(seg.text)
+            if available.get(page_hash):
+                kept.append((available[page_hash].pop(0), pos, seg))
+                continue
+            changed_pages.append((pos, page_hash))
+            yield seg
+
+    embedder = get_embedder()
+    if not embedder:
+        # Without one the changed pages would be deleted and never replaced.
+        raise RuntimeError("No embedder available to embed changed pages")
+    splitter = _get_splitter()
+    now = datetime.now(timezone.utc).isoformat()
+
+    def chunk(seg: _Segment, seg_idx: int) -> list[dict]:
+        return _chunk_segment(seg, seg_idx, splitter)
+
+    def embed(batch: list[dict], segments: dict[int, _Segment]) -> list:
+        return _embed_batch(collection, embedder, batch, segments)
+
+    added: dict[str, dict] = {}   # new chunk id -> metadata, tagged with the file hash in finish()
+
+    def write(batch: list[dict], embeddings: list) -> int:
+        ids, docs, metas, embs = [], [], [], []
+        for chunk, emb in zip(batch, embeddings):
+            if emb is None:
+                continue
+            i = info["next_index"] + chunk["chunk_index"]
+            pos, page_hash = changed_pages[chunk["seg_idx"]]
+            ids.append(f"{source_id}_{i}")
+            docs.append(chunk["text"])
+            metas.append({
+                "source_id": source_id,
+                "filename": filename,
+                "page_number": chunk.get("page_number") or 0,
+                "section_heading": chunk.get("section_heading") or "",
+                "chunk_index": i,
+                "segment_index": pos,
+                "page_hash": page_hash,
+                "ingested_at": now,
+                "content_hash": "",
+                "chunk_hash": chunk["chunk_hash"],
+                "version": version,
+            })
+            embs.append(emb.tolist())
+        if ids:
+            vector_store.call(collection, "add", ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+            added.update(zip(ids, metas))
+        return len(ids)
+
+    def rollback() -> None:
+        if added:
+            vector_store.call(collection, "delete", ids=list(added))
+
+    stats = await run_pipeline(
+        changed_segments(),
+        chunk,
+        embed,
+        write,
+        batch_size=settings.ingest_batch_size,
+        queue_depth=settings.ingest_queue_depth,
+        progress=progress,
+        on_failure=rollback,
+    )
+
+    def finish() -> int:
+        # New chunks are already written; tag them and retag the kept ones, then drop what is gone.
+        ids = list(added)
+        metas = [{**meta, "content_hash": file_hash} for meta in added.values()]
+        for key, pos, seg in kept:
+            for cid, meta in stored.pop(key):
+                ids.append(cid)
+                metas.append({
+                    **meta,
+                    "filename": filename,
+                    "page_number": seg.page_number or 0,
+                    "section_heading": seg.section_heading or "",
+                    "segment_index": pos,
+                    "content_hash": file_hash,
+                    "version": version,
+                })
+        if ids:
+            vector_store.call(collection, "update", ids=ids, metadatas=metas)
+        doomed = [cid for chunks in stored.values() for cid, _ in chunks]
+        if doomed:
+            vector_store.call(collection, "delete", ids=doomed)
+        return len(doomed)
+
+    removed_pages = len(stored) - len(kept)
+    try:
+        chunks_removed = await loop.run_in_executor(None, finish)
+    except BaseException:
+        await asyncio.shield(loop.run_in_executor(None, rollback))
+        raise
+    summary.update(
+        version=version,
+        pages_kept=len(kept),
+        pages_changed=len(changed_pages),
+        pages_removed=removed_pages,
+        chunks_added=stats.written,
+        chunks_removed=chunks_removed,
+    )
+    return summary
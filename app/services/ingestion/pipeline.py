@@ -0,0 +1,137 @@
+"""
+Bounded-memory ingestion pipeline.
+
+Segments are pulled from a (blocking) iterator and flow through chunk, embed
+and write stages connected by bounded queues. Each stage only ever holds a
+handful of ``batch_size`` batches, so peak memory depends on the batch size
+and queue depth — not on the size of the document being ingested.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterable
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, int], None]
+
+# Stage names reported to progress callbacks, in pipeline order.
+STAGES = ("extract", "chunk", "embed", "write")
+
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    segments: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    written: int = 0
+
+
+async def run_pipeline(
+    segments: Iterable[Any] | AsyncIterable[Any],
+    chunk_segment: Callable[[Any, int], list[dict]],
+    embed_batch: Callable[[list[dict], dict[int, Any]], list],
+    write_batch: Callable[[list[dict], list], int],
+    *,
+    batch_size: int,
+    queue_depth: int = 2,
+    progress: ProgressCallback | None = None,
+    on_failure: Callable[[], None] | None = None,
+) -> PipelineStats:
+    """Stream ``segments`` through chunk → embed → write with backpressure.
+
+    ``segments`` is a blocking iterator (advanced in the executor) or an async
+    iterable. ``chunk_segment(segment, seg_idx)`` returns chunk dicts; the
+    pipeline stamps each with a document-wide ``chunk_index`` and ``seg_idx``.
+    ``embed_batch(chunks, segments_by_idx)`` returns one vector (or None) per
+    chunk, and ``write_batch(chunks, vectors)`` persists a batch and returns
+    how many chunks it wrote. All three run in the default executor.
+
+    If any stage fails (or the pipeline is cancelled), ``on_failure()`` runs in
+    the executor so the caller can remove batches already written, and the
+    stage's own exception is raised rather than the ``TaskGroup``'s group.
+    """
+    loop = asyncio.get_running_loop()
+    stats = PipelineStats()
+    batch_size = max(1, batch_size)
+    seg_q: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_depth))
+    embed_q: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_depth))
+    write_q: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_depth))
+
+    def _report(stage: str, count: int) -> None:
+        if progress:
+            progress(stage, count)
+
+    async def emit(seg: Any) -> None:
+        await seg_q.put((stats.segments, seg))
+        stats.segments += 1
+        _report("extract", stats.segments)
+
+    async def extract() -> None:
+        if isinstance(segments, AsyncIterable):
+            async for seg in segments:
+                await emit(seg)
+        else:
+            it = iter(segments)
+            while (seg := await loop.run_in_executor(None, next, it, _DONE)) is not _DONE:
+                await emit(seg)
+        await seg_q.put(_DONE)
+
+    async def chunk() -> None:
+        batch: list[dict] = []
+        batch_segments: dict[int, Any] = {}
+        while (item := await seg_q.get()) is not _DONE:
+            seg_idx, seg = item
+            for c in await loop.run_in_executor(None, chunk_segment, seg, seg_idx):
+                c["seg_idx"] = seg_idx
+                c["chunk_index"] = stats.chunks
+                stats.chunks += 1
+                batch.append(c)
+                batch_segments[seg_idx] = seg
+                if len(batch) >= batch_size:
+                    await embed_q.put((batch, batch_segments))
+                    batch, batch_segments = [], {}
+            _report("chunk", stats.chunks)
+        if batch:
+            await embed_q.put((batch, batch_segments))
+        await embed_q.put(_DONE)
+
+    async def embed() -> None:
+        while (item := await embed_q.get()) is not _DONE:
+            batch, batch_segments = item
+            vectors = await loop.run_in_executor(None, embed_batch, batch, batch_segments)
+            stats.embedded += sum(v is not None for v in vectors)
+            _report("embed", stats.embedded)
+            await write_q.put((batch, vectors))
+        await write_q.put(_DONE)
+
+    async def write() -> None:
+        while (item := await write_q.get()) is not _DONE:
+            batch, vectors = item
+            stats.written += await loop.run_in_executor(None, write_batch, batch, vectors)
+            _report("write", stats.written)
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(extract())
+            tg.create_task(chunk())
+            tg.create_task(embed())
+            tg.create_task(write())
+    except BaseException as exc:
+        if on_failure is not None:
+            try:
+                # Shielded so a cancellation (shutdown) still lets the cleanup finish.
+                await asyncio.shield(loop.run_in_executor(None, on_failure))
+            except Exception:
+                logger.exception("pipeline on_failure cleanup failed")
+        if isinstance(exc, BaseExceptionGroup) and len(exc.exceptions) == 1:
+            raise exc.exceptions[0] from None
+        raise
+
+    return stats
@@ -0,0 +1,228 @@
+"""
+Incremental refresh of web sources.
+
+``refresh_web_source`` re-scrapes a page and diffs the new chunks against the
+stored ones by ``chunk_hash``. Chunks still on the page keep their id and
+embedding and only get their metadata rewritten. New chunks are embedded
+(reusing any stored embedding for the same text) and upserted. Chunks that
+disappeared are deleted.
+
+``RefreshScheduler`` queues refresh jobs for web sources whose ``scraped_at``
+is older than ``web_refresh_max_age_seconds``, at most
+``web_refresh_per_minute`` a minute. It reads the per-source times kept in
+``web.scrape_times``; the collection is scanned only once, to seed them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app.core import vector_store
+from app.core.chroma import get_collection
+from app.core.config import settings
+from app.services.embedder import get_embedder
+from app.services.ingestion import web
+from app.services.ingestion.dedup import chunk_hash, content_hash, embed_with_reuse
+from app.services.ingestion.pipeline import ProgressCallback
+from app.services.jobs import Job, get_job_manager
+
+logger = logging.getLogger(__name__)
+
+_Stored = tuple[str, str, dict]   # (chunk id, chunk hash, metadata)
+
+
+def _load_source(collection, source_id: str) -> list[_Stored]:
+    res = vector_store.call(collection, "get", where={"source_id": source_id}, include=["metadatas", "documents"])
+    return [
+        (cid, (meta or {}).get("chunk_hash") or chunk_hash(doc or ""), meta or {})
+        for cid, meta, doc in zip(res["ids"], res["metadatas"], res["documents"])
+    ]
+
+
+def _plan(source_id: str, stored: list[_Stored], records: list[dict]):
+    """Match new records to stored chunks by hash.
+
+    Returns ``(kept, added, removed)``: ``kept`` and ``added`` are
+    ``(id, record, chunk_hash)`` triples, ``removed`` the ids to delete.
+    """
+    by_hash: dict[str, list[str]] = defaultdict(list)
+    for cid, h, _ in stored:
+        by_hash[h].append(cid)
+    kept, new = [], []
+    for rec in records:
+        h = chunk_hash(rec["text"])
+        if by_hash.get(h):
+            kept.append((by_hash[h].pop(0), rec, h))
+        else:
+            new.append((rec, h))
+
+    taken = {cid for cid, _, _ in kept}
+    added = []
+    for rec, h in new:
+        cid = f"{source_id}_{rec['metadata']['chunk_index']}"
+        if cid in taken:   # still held by a kept chunk that moved
+            cid = f"{cid}-{h[:8]}"
+        taken.add(cid)
+        added.append((cid, rec, h))
+    # Ids of removed chunks that a new chunk reuses are overwritten by the upsert.
+    removed = [cid for cid, _, _ in stored if cid not in taken]
+    return kept, added, removed
+
+
+async def refresh_web_source(source_id: str, progress: ProgressCallback | None = None) -> dict:
+    """Re-scrape a web source and store only what changed. Returns a summary of the diff."""
+    loop = asyncio.get_running_loop()
+    report = progress or (lambda stage, n: None)
+    collection = get_collection(web.COLLECTION)
+    stored = await loop.run_in_executor(None, _load_source, collection, source_id)
+    if not stored:
+        web.scrape_times.forget(source_id)
+        raise ValueError(f"Web source {source_id} not found")
+    url = stored[0][2]["url"]
+
+    scraped = await web._scrape(url)
+    report("fetch", 1)
+    now = datetime.now(timezone.utc).isoformat()
+    text_hash = content_hash(scraped["content"])
+
+    if text_hash == stored[0][2].get("content_hash"):
+        await vector_store.update(
+            collection,
+            ids=[cid for cid, _, _ in stored],
+            metadatas=[{**meta, "scraped_at": now} for _, _, meta in stored],
+        )
+        web.scrape_times.note(source_id, now)
+        return {"source_id": source_id, "status": "unchanged", "kept": len(stored), "added": 0, "removed": 0}
+
+    records = await web._chunk_records(url, scraped, now)
+    report("chunk", len(records))
+    kept, added, removed = _plan(source_id, stored, records)
+
+    def meta(rec: dict, h: str) -> dict:
+        return {"source_id": source_id, **rec["metadata"], "content_hash": text_hash, "chunk_hash": h}
+
+    vectors = []
+    if added:
+        embedder = get_embedder()
+        if embedder is None:
+            raise RuntimeError("No embedder available to embed changed chunks")
+        texts = [rec["text"] for _, rec, _ in added]
+        vectors, _ = await loop.run_in_executor(
+            None,
+            embed_with_reuse,
+            collection,
+            texts,
+            lambda todo: embedder.embed_batch([texts[k] for k in todo]),
+        )
+    report("embed", len(vectors))
+
+    def write() -> None:
+        # New chunks land before stale ones go, so a failure never leaves the source empty.
+        if added:
+            vector_store.call(
+                collection,
+                "upsert",
+                ids=[cid for cid, _, _ in added],
+                embeddings=[v.tolist() for v in vectors],
+                documents=[rec["text"] for _, rec, _ in added],
+                metadatas=[meta(rec, h) for _, rec, h in added],
+            )
+        if kept:
+            vector_store.call(collection, "update", ids=[cid for cid, _, _ in kept], metadatas=[meta(rec, h) for _, rec, h in kept])
+        if removed:
+            vector_store.call(collection, "delete", ids=removed)
+
+    await loop.run_in_executor(None, write)
+    web.scrape_times.note(source_id, now)
+    report("write", len(added))
+    return {
+        "source_id": source_id,
+        "status": "updated",
+        "kept": len(kept),
+        "added": len(added),
+        "removed": len(removed),
+    }
+
+
+def _scan_scrape_times(collection) -> dict[str, str]:
+    """Oldest ``scraped_at`` of each stored web source. Reads every chunk; used once to seed."""
+    oldest: dict[str, str] = {}
+    for meta in vector_store.call(collection, "get", include=["metadatas"])["metadatas"]:
+        sid, at = (meta or {}).get("source_id"), (meta or {}).get("scraped_at") or ""
+        if sid and (sid not in oldest or at < oldest[sid]):
+            oldest[sid] = at
+    return oldest
+
+
+class RefreshScheduler:
+    """Once a minute, queues refresh jobs for stale web sources."""
+
+    def __init__(self, max_age_seconds: float, per_minute: int, interval: float = 60.0) -> None:
+        self.max_age_seconds = max_age_seconds
+        self.per_minute = max(1, per_minute)
+        self.interval = interval
+        self._inflight: dict[str, Job] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def tick(self) -> list[str]:
+        """Queue refreshes for up to ``per_minute`` stale sources not already in flight."""
+        self._inflight = {sid: job for sid, job in self._inflight.items() if not job.done}
+        budget = self.per_minute - len(self._inflight)
+        if budget <= 0:
+            return []
+        if not web.scrape_times.seeded:
+            loop = asyncio.get_running_loop()
+            times = await loop.run_in_executor(None, _scan_scrape_times, get_collection(web.COLLECTION))
+            web.scrape_times.seed(times)
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.max_age_seconds)).isoformat()
+        source_ids = web.scrape_times.stale(cutoff, budget, set(self._inflight))
+        manager = get_job_manager()
+        for sid in source_ids:
+            self._inflight[sid] = manager.submit(
+                "refresh", f"refresh {sid}", lambda progress, sid=sid: refresh_web_source(sid, progress)
+            )
+        return source_ids
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                queued = await self.tick()
+                if queued:
+                    logger.info("web_refresh_queued count=%d", len(queued))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("web_refresh_tick_failed")
+            await asyncio.sleep(self.interval)
+
+
+_scheduler: RefreshScheduler | None = None
+
+
+def start_refresh_scheduler() -> None:
+    """Start the background scheduler unless ``web_refresh_max_age_seconds`` is 0."""
+    global _scheduler
+    if settings.web_refresh_max_age_seconds <= 0 or _scheduler is not None:
+        return
+    _scheduler = RefreshScheduler(settings.web_refresh_max_age_seconds, settings.web_refresh_per_minute)
+    _scheduler.start()
+
+
+async def stop_refresh_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,197 @@
+"""
+Upload staging: stream an upload in chunks, hashing and size-checking as it
+arrives.
+
+``stage_request`` parses the multipart request body itself instead of letting
+Starlette spool the whole form to its own temp file first, so an oversized
+upload is refused after at most ``upload_max_bytes`` and the file is written
+once. Uploads up to ``upload_memory_max_bytes`` stay in memory and are handed
+to the extractors as bytes; larger ones spill to a temp file whose writes run
+in the default executor so the event loop never blocks on disk I/O.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from fastapi import Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+
+_MULTIPART_SLACK = 64 * 1024     # room for boundaries, part headers and small form fields
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"Upload exceeds the {limit // (1024 * 1024)} MB limit")
+        self.limit = limit
+
+
+class BadUpload(ValueError):
+    """The request body is not a multipart form carrying the expected file."""
+
+
+@dataclass
+class StagedUpload:
+    size: int
+    sha256: str
+    data: bytes | None = None
+    path: Path | None = None
+    filename: str | None = None
+    content_type: str | None = None
+
+    @property
+    def source(self) -> "bytes | Path":
+        return self.data if self.data is not None else self.path
+
+    def cleanup(self) -> None:
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+class _Stager:
+    """Accumulates one file's chunks: hashed, capped, in memory until it outgrows the limit."""
+
+    def __init__(self, max_bytes: int, memory_max_bytes: int, suffix: str) -> None:
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self.suffix = suffix
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.parts: list[bytes] = []
+        self.tmp = None
+
+    async def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        self.digest.update(chunk)
+        if self.tmp is None and self.size <= self.memory_max_bytes:
+            self.parts.append(chunk)
+            return
+        loop = asyncio.get_running_loop()
+        if self.tmp is None:
+            self.tmp = tempfile.NamedTemporaryFile(delete=False, suffix=self.suffix)
+            self.parts.append(chunk)
+            chunk, self.parts = b"".join(self.parts), []
+        await loop.run_in_executor(None, self.tmp.write, chunk)
+
+    async def finish(self) -> StagedUpload:
+        if self.tmp is None:
+            return StagedUpload(size=self.size, sha256=self.digest.hexdigest(), data=b"".join(self.parts))
+        await asyncio.get_running_loop().run_in_executor(None, self.tmp.close)
+        return StagedUpload(size=self.size, sha256=self.digest.hexdigest(), path=Path(self.tmp.name))
+
+    def abort(self) -> None:
+        if self.tmp is not None:
+            self.tmp.close()
+            Path(self.tmp.name).unlink(missing_ok=True)
+
+
+def _suffix(filename: str | None) -> str:
+    return Path(filename or "upload").suffix or ".bin"
+
+
+async def stage_request(
+    request: Request,
+    field: str = "file",
+    accept: Callable[[str, str], None] | None = None,
+    max_bytes: int | None = None,
+    memory_max_bytes: int | None = None,
+) -> StagedUpload:
+    """Stage the ``field`` file of a multipart request straight from the body stream.
+
+    ``accept(filename, content_type)`` runs once the part's headers arrive and
+    may raise to refuse the file before its data is read. A declared
+    Content-Length over the cap is refused without reading anything.
+    """
+    max_bytes = max_bytes or settings.upload_max_bytes
+    memory_max_bytes = settings.upload_memory_max_bytes if memory_max_bytes is None else memory_max_bytes
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise BadUpload("Expected a multipart/form-data upload")
+    body_cap = max_bytes + _MULTIPART_SLACK
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > body_cap:
+        raise UploadTooLarge(max_bytes)
+
+    state = {"header": b"", "value": b"", "disposition": b"", "type": b"", "target": False}
+    stager: _Stager | None = None
+    meta: dict[str, str] = {}
+    pending: list[bytes] = []
+
+    def on_part_begin() -> None:
+        state.update(disposition=b"", type=b"", target=False)
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["header"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        name = state["header"].lower()
+        if name == b"content-disposition":
+            state["disposition"] = state["value"]
+        elif name == b"content-type":
+            state["type"] = state["value"]
+        state["header"] = state["value"] = b""
+
+    def on_headers_finished() -> None:
+        _, options = parse_options_header(state["disposition"])
+        # Only the first file sent under ``field`` is kept; other parts are skipped unread.
+        if options.get(b"name") == field.encode() and b"filename" in options and not meta:
+            meta["filename"] = options[b"filename"].decode("utf-8", "replace")
+            meta["content_type"] = state["type"].decode("latin-1").strip()
+            state["target"] = True
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if state["target"]:
+            pending.append(bytes(data[start:end]))
+
+    def on_part_end() -> None:
+        state["target"] = False
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_cap:
+                raise UploadTooLarge(max_bytes)
+            try:
+                parser.write(chunk)
+            except MultipartParseError as exc:
+                raise BadUpload(f"Malformed multipart body: {exc}") from None
+            if meta and stager is None:
+                if accept is not None:
+                    accept(meta["filename"], meta["content_type"])
+                stager = _Stager(max_bytes, memory_max_bytes, _suffix(meta["filename"]))
+            for piece in pending:
+                await stager.feed(piece)
+            pending.clear()
+        parser.finalize()
+        if stager is None:
+            raise BadUpload(f"Missing file field {field!r}")
+        staged = await stager.finish()
+    except BaseException:
+        if stager is not None:
+            stager.abort()
+        raise
+    staged.filename, staged.content_type = meta["filename"], meta["content_type"]
+    return staged
@@ -1,72 +1,154 @@
-import re
-import uuid
 import asyncio
+import heapq
+import threading
+import uuid
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 
-import httpx
-import trafilatura
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
+from app.core import vector_store
 from app.core.chroma import get_collection
+from app.core.config import settings
+from app.core.executors import run_cpu_bound
 from app.services.embedder import get_embedder
+from app.services.fetch_cache import fetch_extracted
+from app.services.ingestion.boilerplate import get_boilerplate_model
+from app.services.ingestion.dedup import chunk_hash, content_hash, embed_with_reuse, find_source, stored_chunk_hashes
+from app.services.ingestion.pipeline import ProgressCallback
+from app.services.ingestion.web_parse import chunk_records, chunk_stripped, parse_html
 
 COLLECTION = "web_chunks"
 
-_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1500,
-    chunk_overlap=200,
-    separators=["\n\n", "\n", ". ", " ", ""],
-)
 
+class _ScrapeTimes:
+    """Latest ``scraped_at`` per web source, kept as sources are written.
 
-_HEADERS = {
-    "User-Agent": "Mozilla/5.0 (compatible; DocChatBot/2.0; +https://github.com/docchat)"
-}
+    Lets the refresh scheduler pick stale sources without reading the metadata
+    of every stored chunk. Filled from one scan of the collection per process
+    (``seed``); ingestion and refresh keep it current after that.
+    """
 
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._times: dict[str, str] = {}
+        self.seeded = False
 
-def _scrape(url: str) -> dict:
-    response = httpx.get(url, timeout=30, follow_redirects=True, headers=_HEADERS)
-    response.raise_for_status()
-    content = trafilatura.extract(response.text, include_comments=False, include_tables=False)
-    if not content:
-        raise ValueError(f"Could not extract readable content from {url}")
-    title_match = re.search(r"<title>(.*?)</title>", response.text, re.IGNORECASE | re.DOTALL)
-    title = title_match.group(1).strip() if title_match else url
-    return {"content": content, "title": title}
+    def note(self, source_id: str, scraped_at: str) -> None:
+        with self._lock:
+            if scraped_at > self._times.get(source_id, ""):
+                self._times[source_id] = scraped_at
 
+    def forget(self, source_id: str) -> None:
+        with self._lock:
+            self._times.pop(source_id, None)
 
-async def ingest_web(url: str) -> str:
-    """Scrape URL, chunk, embed, and store in ChromaDB. Returns source_id."""
-    source_id = str(uuid.uuid4())
+    def seed(self, times: dict[str, str]) -> None:
+        """Merge a full scan, keeping any newer time noted while it ran."""
+        with self._lock:
+            for sid, at in times.items():
+                if at > self._times.get(sid, ""):
+                    self._times[sid] = at
+            self.seeded = True
+
+    def stale(self, cutoff: str, limit: int, skip: set[str]) -> list[str]:
+        """Up to ``limit`` source ids last scraped before ``cutoff``, oldest first."""
+        with self._lock:
+            candidates = [(at, sid) for sid, at in self._times.items() if at < cutoff and sid not in skip]
+        return [sid for _, sid in heapq.nsmallest(limit, candidates)]
+
+
+scrape_times = _ScrapeTimes()
+
+
+async def _scrape(url: str) -> dict:
+    """Fetch and extract a page; an unchanged page (304) reuses the cached extraction."""
+    async def extract(html: str) -> dict:
+        return await run_cpu_bound("web_parse", settings.web_parse_workers, parse_html, url, html)
+
+    return await fetch_extracted(url, extract)
+
+
+async def _chunk_records(
+    url: str, scraped: dict, now: str, progress: ProgressCallback | None = None
+) -> list[dict]:
+    """Chunk a page, first stripping blocks that recur across its domain (see ``boilerplate``)."""
+    model = get_boilerplate_model()
+    boilerplate: frozenset[str] = frozenset()
     loop = asyncio.get_running_loop()
-    domain = urlparse(url).netloc
+    if model is not None:
+        boilerplate = await loop.run_in_executor(
+            None, model.observe, urlparse(url).netloc, url, scraped["content"]
+        )
+    if not boilerplate:
+        return await run_cpu_bound("web_parse", settings.web_parse_workers, chunk_records, url, scraped, now)
 
-    scraped = await loop.run_in_executor(None, _scrape, url)
-    chunk_texts = _splitter.split_text(scraped["content"])
+    records, blocks, unstripped = await run_cpu_bound(
+        "web_parse", settings.web_parse_workers, chunk_stripped, url, scraped, now, boilerplate
+    )
+    # Savings are what the unstripped page would have cost over what the stripped one does:
+    # chunks embedded, and embeddings for chunk texts not already stored.
+    before = {chunk_hash(t) for t in unstripped}
+    after = {chunk_hash(r["text"]) for r in records}
+    stored = await loop.run_in_executor(None, stored_chunk_hashes, get_collection(COLLECTION), list(before | after))
+    chunks_saved = max(0, len(unstripped) - len(records))
+    embeddings_saved = max(0, len(before - stored) - len(after - stored))
+    model.record_savings(blocks, chunks_saved, embeddings_saved)
+    if progress:
+        progress("boilerplate_chunks_saved", chunks_saved)
+        progress("boilerplate_embeddings_saved", embeddings_saved)
+    return records
 
-    embedder = get_embedder()
+
+async def ingest_web(url: str, progress: ProgressCallback | None = None) -> str:
+    """Scrape URL, chunk, embed, and store in ChromaDB. Returns source_id.
+
+    A page whose extracted text was ingested before returns the existing source_id.
+    """
+    loop = asyncio.get_running_loop()
+
+    scraped = await _scrape(url)
+    report = progress or (lambda stage, n: None)
+    report("fetch", 1)
     collection = get_collection(COLLECTION)
-    ids, docs, metas, embs = [], [], [], []
+    text_hash = content_hash(scraped["content"])
+    existing = await loop.run_in_executor(None, find_source, collection, text_hash)
+    if existing:
+        return existing
+
+    source_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
+    records = await _chunk_records(url, scraped, now, progress)
+    embedder = get_embedder()
+    ids, docs, metas, embs = [], [], [], []
+
+    texts = [r["text"] for r in records]
+    report("chunk", len(texts))
+    if embedder and records:
+        vectors, hashes = await loop.run_in_executor(
+            None,
+            embed_with_reuse,
+            collection,
+            texts,
+            lambda todo: embedder.embed_batch([texts[k] for k in todo]),
+        )
+    else:
+        vectors, hashes = [], []
 
-    for i, text in enumerate(chunk_texts):
-        if not text.strip() or not embedder:
-            continue
-        emb = embedder.embed_query(text)
-        ids.append(f"{source_id}_{i}")
-        docs.append(text)
+    for rec, emb, h in zip(records, vectors, hashes):
+        ids.append(f"{source_id}_{rec['metadata']['chunk_index']}")
+        docs.append(rec["text"])
         metas.append({
             "source_id": source_id,
-            "url": url,
-            "title": scraped["title"],
-            "domain": domain,
-            "chunk_index": i,
-            "scraped_at": now,
+            **rec["metadata"],
+            "content_hash": text_hash,
+            "chunk_hash": h,
         })
         embs.append(emb.tolist())
 
+    report("embed", len(embs))
+
     if ids:
-        collection.add(ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+        await vector_store.add(collection, ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+        scrape_times.note(source_id, now)
+    report("write", len(ids))
 
     return source_id
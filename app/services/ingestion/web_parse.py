@@ -0,0 +1,100 @@
+"""
+CPU-bound half of web ingestion: HTML extraction, title parsing and chunking.
+
+These run on the ``web_parse`` process pool, so this module deliberately
+imports only what parsing needs — workers never load chromadb or the embedder.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from urllib.parse import urljoin, urlparse
+
+import trafilatura
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=1500,
+    chunk_overlap=200,
+    separators=["\n\n", "\n", ". ", " ", ""],
+)
+
+
+def _title(url: str, html: str) -> str:
+    title_match = re.search(r"<title>(.*?)</title>", html, re.IGNORECASE | re.DOTALL)
+    return title_match.group(1).strip() if title_match else url
+
+
+def parse_html(url: str, html: str) -> dict:
+    content = trafilatura.extract(html, include_comments=False, include_tables=False)
+    if not content:
+        raise ValueError(f"Could not extract readable content from {url}")
+    return {"content": content, "title": _title(url, html)}
+
+
+def parse_crawled_page(url: str, html: str) -> dict:
+    """Extraction plus link discovery for crawl mode; ``content`` is empty for pages with no article text."""
+    import lxml.html
+    from lxml.etree import ParserError
+
+    content = trafilatura.extract(html, include_comments=False, include_tables=False) or ""
+    links: list[str] = []
+    canonical = None
+    try:
+        tree = lxml.html.fromstring(html)
+    except (ParserError, ValueError):
+        tree = None
+    if tree is not None:
+        links = [urljoin(url, href.strip()) for href in tree.xpath("//a/@href") if href.strip()]
+        hrefs = tree.xpath('//link[@rel="canonical"]/@href')
+        canonical = urljoin(url, hrefs[0].strip()) if hrefs else None
+    return {"content": content, "title": _title(url, html), "links": links, "canonical": canonical}
+
+
+def page_blocks(content: str) -> list[str]:
+    """The text blocks of an extracted page — trafilatura puts each paragraph on its own line."""
+    return [line for line in content.split("\n") if line.strip()]
+
+
+def block_hash(block: str) -> str:
+    return hashlib.sha1(" ".join(block.split()).lower().encode("utf-8")).hexdigest()
+
+
+def strip_blocks(content: str, boilerplate: frozenset[str]) -> tuple[str, int]:
+    """Drop the blocks whose hash is in ``boilerplate``; returns the text left and how many were removed."""
+    kept = [line for line in content.split("\n") if not line.strip() or block_hash(line) not in boilerplate]
+    removed = content.count("\n") + 1 - len(kept)
+    return "\n".join(kept), removed
+
+
+def chunk_records(url: str, scraped: dict, now: str) -> list[dict]:
+    """Split a scraped page into ``{"text", "metadata"}`` records; source-level fields are added on write."""
+    domain = urlparse(url).netloc
+    return [
+        {
+            "text": text,
+            "metadata": {
+                "url": url,
+                "title": scraped["title"],
+                "domain": domain,
+                "chunk_index": i,
+                "scraped_at": now,
+            },
+        }
+        for i, text in enumerate(_splitter.split_text(scraped["content"]))
+        if text.strip()
+    ]
+
+
+def chunk_stripped(url: str, scraped: dict, now: str, boilerplate: frozenset[str]) -> tuple[list[dict], int, list[str]]:
+    """``chunk_records`` after removing boilerplate blocks.
+
+    Returns ``(records, blocks removed, chunk texts of the unstripped page)``;
+    the caller compares the two chunkings to see what stripping saved.
+    """
+    content, removed = strip_blocks(scraped["content"], boilerplate)
+    records = chunk_records(url, {**scraped, "content": content}, now)
+    if not records:   # nothing but recurring blocks: keep the page as it is
+        records = chunk_records(url, scraped, now)
+        return records, 0, [r["text"] for r in records]
+    return records, removed, [t for t in _splitter.split_text(scraped["content"]) if t.strip()]
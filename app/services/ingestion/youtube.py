@@ -1,43 +1,217 @@
+import json
+import re
+import time
 import uuid
 import asyncio
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import Protocol
 from urllib.parse import urlparse, parse_qs
 
+from app.core import vector_store
 from app.core.chroma import get_collection
+from app.core.config import settings
+from app.core.http import fetch
 from app.services.embedder import get_embedder
+from app.services.fetch_cache import fetch_extracted, get_fetch_cache
+from app.services.ingestion.dedup import content_hash, embed_with_reuse, find_source
+from app.services.ingestion.pipeline import ProgressCallback
 
 COLLECTION = "youtube_chunks"
 CHUNK_DURATION_SECONDS = 60
 
+_VIDEO_PATH_PREFIXES = ("shorts", "embed", "live", "v")
+_CHANNEL_ID = re.compile(r'"(?:externalId|channelId)":"(UC[\w-]{22})"')
+
+
+def _is_youtube_host(host: str | None) -> bool:
+    host = (host or "").lower()
+    return host in ("youtube.com", "youtube-nocookie.com") or host.endswith((".youtube.com", ".youtube-nocookie.com"))
+
 
 def _extract_video_id(url: str) -> str:
     parsed = urlparse(url)
     if parsed.hostname in ("youtu.be",):
         return parsed.path.lstrip("/")
     qs = parse_qs(parsed.query)
-    return qs["v"][0]
+    if "v" in qs:
+        return qs["v"][0]
+    parts = [p for p in parsed.path.split("/") if p]
+    if _is_youtube_host(parsed.hostname) and len(parts) >= 2 and parts[0] in _VIDEO_PATH_PREFIXES:
+        return parts[1]
+    raise ValueError(f"Not a YouTube video URL: {url}")
+
+
+def collection_ref(url: str) -> tuple[str, str] | None:
+    """``("playlist", list_id)`` or ``("channel", handle / id / path)`` for collection URLs, else None.
+
+    A watch URL that also carries ``list=`` is treated as the single video.
+    """
+    parsed = urlparse(url)
+    if not _is_youtube_host(parsed.hostname):
+        return None
+    qs = parse_qs(parsed.query)
+    parts = [p for p in parsed.path.split("/") if p]
+    if parts[:1] == ["playlist"] and qs.get("list"):
+        return "playlist", qs["list"][0]
+    if parts and parts[0].startswith("@"):
+        return "channel", parts[0]
+    if len(parts) >= 2 and parts[0] == "channel":
+        return "channel", parts[1]
+    if len(parts) >= 2 and parts[0] in ("c", "user"):
+        return "channel", f"/{parts[0]}/{parts[1]}"
+    return None
+
+
+class YouTubeProvider(Protocol):
+    """Where transcripts and playlist/channel listings come from."""
+
+    def fetch_transcript(self, video_id: str) -> list[dict]:
+        """Blocking; ``[{"text", "start", "duration"}, ...]``."""
+        ...
+
+    async def list_videos(self, url: str) -> list[str]:
+        """Video ids of a playlist or channel URL, in listing order."""
+        ...
+
+
+class LiveYouTubeProvider:
+    """youtube-transcript-api for transcripts, pytube for playlists.
+
+    A channel is listed through its uploads playlist (``UU`` + the channel id
+    without its ``UC`` prefix); handles and custom URLs are resolved to the
+    channel id from the channel page.
+    """
+
+    def fetch_transcript(self, video_id: str) -> list[dict]:
+        from youtube_transcript_api import YouTubeTranscriptApi
+        api = YouTubeTranscriptApi()
+        transcript = api.fetch(video_id)
+        return [{"text": s.text, "start": s.start, "duration": s.duration} for s in transcript]
+
+    async def list_videos(self, url: str) -> list[str]:
+        ref = collection_ref(url)
+        if ref is None:
+            raise ValueError(f"Not a YouTube playlist or channel URL: {url}")
+        kind, ident = ref
+        playlist_id = ident
+        if kind == "channel":
+            channel_id = ident if ident.startswith("UC") else await self._resolve_channel_id(url)
+            playlist_id = "UU" + channel_id[2:]
+
+        def list_playlist() -> list[str]:
+            from pytube import Playlist
+            return [_extract_video_id(u) for u in Playlist(f"https://www.youtube.com/playlist?list={playlist_id}").video_urls]
+
+        return await asyncio.get_running_loop().run_in_executor(None, list_playlist)
+
+    async def _resolve_channel_id(self, url: str) -> str:
+        response = await fetch(url, timeout=15)
+        match = _CHANNEL_ID.search(response.text)
+        if not match:
+            raise ValueError(f"Could not find a channel id on {url}")
+        return match.group(1)
+
+
+class LocalYouTubeProvider:
+    """Offline stand-in that reads transcripts and listings from a directory.
+
+    ``<root>/<video_id>.json`` holds a transcript (a list of segments);
+    ``<root>/collections.json`` maps a playlist id, channel handle/id or full
+    URL to a list of video ids.
+    """
+
+    def __init__(self, root: "str | Path") -> None:
+        self.root = Path(root)
+
+    def fetch_transcript(self, video_id: str) -> list[dict]:
+        path = self.root / f"{video_id}.json"
+        if not path.is_file():
+            raise FileNotFoundError(f"No local transcript for {video_id}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    async def list_videos(self, url: str) -> list[str]:
+        path = self.root / "collections.json"
+        listings = json.loads(path.read_text(encoding="utf-8")) if path.is_file() else {}
+        ref = collection_ref(url)
+        for key in (url, ref[1] if ref else None):
+            if key in listings:
+                return list(listings[key])
+        raise ValueError(f"No local listing for {url}")
+
+
+_provider: YouTubeProvider | None = None
+
+
+def get_youtube_provider() -> YouTubeProvider:
+    """The provider set with ``set_youtube_provider``; else local when ``youtube_local_dir`` is set, else live."""
+    global _provider
+    if _provider is None:
+        _provider = LocalYouTubeProvider(settings.youtube_local_dir) if settings.youtube_local_dir else LiveYouTubeProvider()
+    return _provider
+
+
+def set_youtube_provider(provider: YouTubeProvider | None) -> None:
+    """Swap the provider (None restores the configured default)."""
+    global _provider
+    _provider = provider
+
+
+class _RateLimiter:
+    """Spaces awaited calls at least ``1 / rate`` seconds apart without holding a thread."""
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def wait(self, rate: float) -> None:
+        if rate <= 0:
+            return
+        # Only the slot is reserved under the lock; callers sleep until theirs concurrently.
+        async with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + 1.0 / rate
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+_transcript_limiter = _RateLimiter()
 
 
 def _fetch_transcript(video_id: str) -> list[dict]:
-    from youtube_transcript_api import YouTubeTranscriptApi
-    api = YouTubeTranscriptApi()
-    transcript = api.fetch(video_id)
-    return [{"text": s.text, "start": s.start, "duration": s.duration} for s in transcript]
+    return get_youtube_provider().fetch_transcript(video_id)
 
 
-def _get_video_metadata(video_id: str, url: str) -> dict:
-    import re
-    import httpx
-    try:
-        resp = httpx.get(url, timeout=15, follow_redirects=True,
-                         headers={"User-Agent": "Mozilla/5.0 (compatible; DocChatBot/2.0)"})
-        title_match = re.search(r'"title":"([^"]+)"', resp.text)
-        author_match = re.search(r'"ownerChannelName":"([^"]+)"', resp.text)
+async def _load_transcript(video_id: str) -> list[dict]:
+    """``_fetch_transcript`` behind the fetch cache — TTL only, as the API exposes no validators.
+
+    Only cache misses wait on the transcript rate limit.
+    """
+    loop = asyncio.get_running_loop()
+    cache = get_fetch_cache()
+    key = f"youtube:transcript:{video_id}"
+    if cache and (entry := await loop.run_in_executor(None, cache.get, key)):
+        return entry.payload["segments"]
+    await _transcript_limiter.wait(settings.youtube_transcript_rate)
+    transcript = await loop.run_in_executor(None, _fetch_transcript, video_id)
+    if cache:
+        await loop.run_in_executor(None, cache.put, key, {"segments": transcript})
+    return transcript
+
+
+async def _get_video_metadata(video_id: str, url: str) -> dict:
+    async def extract(html: str) -> dict:
+        title_match = re.search(r'"title":"([^"]+)"', html)
+        author_match = re.search(r'"ownerChannelName":"([^"]+)"', html)
         title = title_match.group(1) if title_match else url
         channel = author_match.group(1) if author_match else "Unknown"
+        return {"title": title, "channel": channel, "video_id": video_id}
+
+    try:
+        return await fetch_extracted(url, extract, key=f"youtube:meta:{video_id}", timeout=15)
     except Exception:
-        title, channel = url, "Unknown"
-    return {"title": title, "channel": channel, "video_id": video_id}
+        return {"title": url, "channel": "Unknown", "video_id": video_id}
 
 
 def _chunk_transcript(transcript: list[dict]) -> list[dict]:
@@ -73,43 +247,79 @@ def _chunk_transcript(transcript: list[dict]) -> list[dict]:
     return chunks
 
 
-async def ingest_youtube(url: str) -> str:
-    """Fetch YouTube transcript, chunk, embed, and store in ChromaDB. Returns source_id."""
-    source_id = str(uuid.uuid4())
+def _chunk_records(url: str, meta: dict, transcript: list[dict], now: str) -> list[dict]:
+    """Chunk a transcript into ``{"text", "metadata"}`` records; source-level fields are added on write."""
+    return [
+        {
+            "text": chunk["text"],
+            "metadata": {
+                "video_id": meta["video_id"],
+                "video_url": url,
+                "title": meta["title"],
+                "channel": meta["channel"],
+                "timestamp_start": chunk["timestamp_start"],
+                "timestamp_end": chunk["timestamp_end"],
+                "chunk_index": i,
+                "ingested_at": now,
+            },
+        }
+        for i, chunk in enumerate(_chunk_transcript(transcript))
+    ]
+
+
+async def ingest_youtube(url: str, progress: ProgressCallback | None = None) -> str:
+    """Fetch YouTube transcript, chunk, embed, and store in ChromaDB. Returns source_id.
+
+    A video that was ingested before returns the existing source_id without refetching.
+    """
     loop = asyncio.get_running_loop()
     video_id = _extract_video_id(url)
+    collection = get_collection(COLLECTION)
+    video_hash = content_hash(f"youtube:{video_id}")
+    existing = await loop.run_in_executor(None, find_source, collection, video_hash)
+    if existing:
+        return existing
 
+    source_id = str(uuid.uuid4())
     meta, transcript = await asyncio.gather(
-        loop.run_in_executor(None, _get_video_metadata, video_id, url),
-        loop.run_in_executor(None, _fetch_transcript, video_id),
+        _get_video_metadata(video_id, url),
+        _load_transcript(video_id),
     )
+    report = progress or (lambda stage, n: None)
+    report("fetch", 1)
 
-    chunks = _chunk_transcript(transcript)
+    records = _chunk_records(url, meta, transcript, datetime.now(timezone.utc).isoformat())
+    report("chunk", len(records))
     embedder = get_embedder()
-    collection = get_collection(COLLECTION)
     ids, docs, metas, embs = [], [], [], []
-    now = datetime.now(timezone.utc).isoformat()
-
-    for i, chunk in enumerate(chunks):
-        if not embedder:
-            continue
-        emb = embedder.embed_query(chunk["text"])
-        ids.append(f"{source_id}_{i}")
-        docs.append(chunk["text"])
+
+    texts = [r["text"] for r in records]
+    if embedder and records:
+        vectors, hashes = await loop.run_in_executor(
+            None,
+            embed_with_reuse,
+            collection,
+            texts,
+            lambda todo: embedder.embed_batch([texts[k] for k in todo]),
+        )
+    else:
+        vectors, hashes = [], []
+
+    for rec, emb, h in zip(records, vectors, hashes):
+        ids.append(f"{source_id}_{rec['metadata']['chunk_index']}")
+        docs.append(rec["text"])
         metas.append({
             "source_id": source_id,
-            "video_id": meta["video_id"],
-            "video_url": url,
-            "title": meta["title"],
-            "channel": meta["channel"],
-            "timestamp_start": chunk["timestamp_start"],
-            "timestamp_end": chunk["timestamp_end"],
-            "chunk_index": i,
-            "ingested_at": now,
+            **rec["metadata"],
+            "content_hash": video_hash,
+            "chunk_hash": h,
         })
         embs.append(emb.tolist())
 
+    report("embed", len(embs))
+
     if ids:
-        collection.add(ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+        await vector_store.add(collection, ids=ids, embeddings=embs, documents=docs, metadatas=metas)
+    report("write", len(ids))
 
     return source_id
@@ -0,0 +1,231 @@
+"""
+In-process ingestion job queue.
+
+Each ingestion request becomes a ``Job`` that is queued per source type and
+picked up by that type's worker tasks, so a burst of slow scrapes cannot
+starve PDF uploads and vice versa. Jobs record stage-level progress reported
+by the ingestion services; watchers are woken on every change, which drives
+the SSE progress stream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.core.config import settings
+from app.services.ingestion.pipeline import ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+# Returns the new source_id, per-item results for bulk jobs, or a summary for crawls.
+JobFn = Callable[[ProgressCallback], Awaitable["str | list[dict] | dict"]]
+
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+_TERMINAL = {JobStatus.succeeded, JobStatus.failed}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    label: str
+    status: JobStatus = JobStatus.queued
+    stage: str | None = None
+    stages: dict[str, int] = field(default_factory=dict)
+    source_id: str | None = None
+    results: list[dict] | dict | None = None
+    error: str | None = None
+    created_at: str = field(default_factory=_now)
+    started_at: str | None = None
+    finished_at: str | None = None
+    _fn: JobFn | None = field(default=None, repr=False)
+    _cleanup: Callable[[], None] | None = field(default=None, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in _TERMINAL
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "label": self.label,
+            "status": self.status.value,
+            "stage": self.stage,
+            "stages": dict(self.stages),
+            "source_id": self.source_id,
+            "results": self.results,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def _touch(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _progress(self, stage: str, count: int) -> None:
+        self.stage = stage
+        self.stages[stage] = count
+        self._touch()
+
+
+class JobManager:
+    """Per-kind job queues drained by a fixed number of worker tasks each."""
+
+    def __init__(self, limits: dict[str, int], retain: int = 500) -> None:
+        self.limits = {kind: max(1, n) for kind, n in limits.items()}
+        self.retain = retain
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._workers: list[asyncio.Task] = []
+        self._running: dict[str, int] = {kind: 0 for kind in self.limits}
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        for kind, limit in self.limits.items():
+            queue: asyncio.Queue = asyncio.Queue()
+            self._queues[kind] = queue
+            for _ in range(limit):
+                self._workers.append(asyncio.create_task(self._worker(kind, queue)))
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+
+    def submit(
+        self,
+        kind: str,
+        label: str,
+        fn: JobFn,
+        cleanup: Callable[[], None] | None = None,
+    ) -> Job:
+        if kind not in self.limits:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self._ensure_workers()
+        job = Job(id=str(uuid.uuid4()), kind=kind, label=label, _fn=fn, _cleanup=cleanup)
+        self._jobs[job.id] = job
+        self._prune()
+        self._queues[kind].put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def recent(self, limit: int = 50) -> list[Job]:
+        return list(reversed(self._jobs.values()))[:limit]
+
+    async def watch(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield a snapshot of the job now and after every change until it finishes."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        while True:
+            changed = job._changed
+            yield job.to_dict()
+            if job.done:
+                return
+            await changed.wait()
+
+    def metrics(self) -> dict:
+        per_kind = {
+            kind: {
+                "queued": self._queues[kind].qsize() if kind in self._queues else 0,
+                "running": self._running[kind],
+                "limit": limit,
+            }
+            for kind, limit in self.limits.items()
+        }
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            counts[job.status.value] += 1
+        return {"queues": per_kind, "jobs": counts}
+
+    async def _worker(self, kind: str, queue: asyncio.Queue) -> None:
+        while True:
+            job: Job = await queue.get()
+            self._running[kind] += 1
+            try:
+                await self._run(job)
+            finally:
+                self._running[kind] -= 1
+                queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JobStatus.running
+        job.started_at = _now()
+        job._touch()
+        try:
+            outcome = await job._fn(job._progress)
+            if isinstance(outcome, str):
+                job.source_id = outcome
+            else:
+                job.results = outcome
+            job.status = JobStatus.succeeded
+        except asyncio.CancelledError:
+            job.status, job.error = JobStatus.failed, "cancelled"
+            raise
+        except Exception as exc:
+            logger.exception("ingest_job_failed job_id=%s kind=%s", job.id, job.kind)
+            job.status, job.error = JobStatus.failed, str(exc) or type(exc).__name__
+        finally:
+            job.finished_at = _now()
+            job._fn = None
+            if job._cleanup:
+                try:
+                    job._cleanup()
+                except Exception:
+                    logger.exception("ingest_job_cleanup_failed job_id=%s", job.id)
+            job._touch()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs once more than ``retain`` are tracked."""
+        excess = len(self._jobs) - self.retain
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, j in self._jobs.items() if j.done][:excess]:
+            del self._jobs[job_id]
+
+
+_manager: JobManager | None = None
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager(
+            {
+                "pdf": settings.ingest_concurrency_pdf,
+                "youtube": settings.ingest_concurrency_youtube,
+                "web": settings.ingest_concurrency_web,
+                "bulk": settings.ingest_concurrency_bulk,
+                "crawl": settings.ingest_concurrency_crawl,
+                "refresh": settings.ingest_concurrency_refresh,
+            },
+            retain=settings.ingest_jobs_retained,
+        )
+    return _manager
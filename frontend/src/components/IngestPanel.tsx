@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState } from 'react';
 import { apiFetch } from '../api';
-import type { Source } from '../types';
+import type { IngestJob, Source } from '../types';
 
 interface Props {
   selectedIds: Set<string>;
@@ -20,6 +20,25 @@ function sourceLabel(s: Source): string {
   return s.filename ?? s.title ?? s.url ?? s.source_id;
 }
 
+type Feedback = { msg: string; cls: string } | null;
+
+function jobProgress(job: IngestJob): string {
+  if (job.status === 'queued') return 'Queued…';
+  if (!job.stage) return 'Ingesting…';
+  return `Ingesting… ${job.stage} (${job.stages[job.stage]})`;
+}
+
+async function waitForJob(jobId: string, onUpdate: (job: IngestJob) => void): Promise<IngestJob> {
+  for (;;) {
+    const res = await apiFetch(`/ingest/jobs/${jobId}`);
+    if (!res.ok) throw new Error('Job lookup failed');
+    const job = await res.json() as IngestJob;
+    if (job.status === 'succeeded' || job.status === 'failed') return job;
+    onUpdate(job);
+    await new Promise(r => setTimeout(r, 1000));
+  }
+}
+
 const TYPE_ORDER: Source['source_type'][] = ['pdf', 'youtube', 'web'];
 const TYPE_LABEL: Record<Source['source_type'], string> = {
   pdf: 'PDF',
@@ -31,11 +50,11 @@ export default function IngestPanel({ selectedIds, onSelectionChange }: Props) {
   const [open, setOpen] = useState(false);
   const [activeTab, setActiveTab] = useState<'pdf' | 'youtube' | 'web'>('pdf');
   const [sources, setSources] = useState<Source[]>([]);
-  const [pdfFeedback, setPdfFeedback] = useState<{ msg: string; cls: string } | null>(null);
+  const [pdfFeedback, setPdfFeedback] = useState<Feedback>(null);
   const [ytUrl, setYtUrl] = useState('');
-  const [ytFeedback, setYtFeedback] = useState<{ msg: string; cls: string } | null>(null);
+  const [ytFeedback, setYtFeedback] = useState<Feedback>(null);
   const [webUrl, setWebUrl] = useState('');
-  const [webFeedback, setWebFeedback] = useState<{ msg: string; cls: string } | null>(null);
+  const [webFeedback, setWebFeedback] = useState<Feedback>(null);
   const [dragOver, setDragOver] = useState(false);
   const fileInputRef = useRef<HTMLInputElement>(null);
 
@@ -51,16 +70,25 @@ export default function IngestPanel({ selectedIds, onSelectionChange }: Props) {
     } catch { /* silent */ }
   }
 
+  async function trackJob(jobId: string, label: string, setFb: (fb: Feedback) => void) {
+    const job = await waitForJob(jobId, j => setFb({ msg: jobProgress(j), cls: 'busy' }));
+    if (job.status === 'succeeded') {
+      setFb({ msg: `Ingested ${label}`, cls: 'ok' });
+      loadSources();
+    } else {
+      setFb({ msg: job.error ?? 'Ingestion failed', cls: 'err' });
+    }
+  }
+
   async function ingestPdf(file: File) {
     setPdfFeedback({ msg: 'Ingesting…', cls: 'busy' });
     const fd = new FormData();
     fd.append('file', file);
     try {
       const res = await apiFetch('/ingest/pdf', { method: 'POST', body: fd });
-      const d = await res.json() as { message?: string; detail?: string };
-      if (res.ok) {
-        setPdfFeedback({ msg: d.message ?? 'Ingested successfully', cls: 'ok' });
-        loadSources();
+      const d = await res.json() as { job_id?: string; detail?: string };
+      if (res.ok && d.job_id) {
+        await trackJob(d.job_id, file.name, setPdfFeedback);
       } else {
         setPdfFeedback({ msg: d.detail ?? 'Error', cls: 'err' });
       }
@@ -78,11 +106,10 @@ export default function IngestPanel({ selectedIds, onSelectionChange }: Props) {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ url }),
       });
-      const d = await res.json() as { message?: string; detail?: string };
-      if (res.ok) {
-        setFb({ msg: d.message ?? 'Ingested successfully', cls: 'ok' });
+      const d = await res.json() as { job_id?: string; detail?: string };
+      if (res.ok && d.job_id) {
         if (type === 'youtube') setYtUrl(''); else setWebUrl('');
-        loadSources();
+        await trackJob(d.job_id, url, setFb);
       } else {
         setFb({ msg: d.detail ?? 'Error', cls: 'err' });
       }
@@ -34,6 +34,17 @@ export interface Source {
   scraped_at?: string;
 }
 
+export interface IngestJob {
+  job_id: string;
+  kind: 'pdf' | 'youtube' | 'web';
+  label: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  stage: string | null;
+  stages: Record<string, number>;
+  source_id: string | null;
+  error: string | null;
+}
+
 export interface TokenResponse {
   access_token: string;
   refresh_token: string;
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+DOCX extraction benchmark
+=========================
+Time and peak memory of a python-docx reader (``_iter_python_docx_segments``,
+below) against the streaming ``iterparse`` reader (``_iter_docx_segments``) on a
+generated Word file of ``--pages`` pages, and a check that both produce the
+same segments.
+
+Each reader runs in a fresh process so its peak RSS is measured in isolation;
+the figure reported is the growth over the process's RSS after imports.
+
+Usage (from project root, venv active):
+    python scripts/bench_docx.py                 # 500 pages
+    python scripts/bench_docx.py --pages 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_PARAGRAPHS_PER_PAGE = 9
+_PAGES_PER_SECTION = 4
+_SENTENCE = ("The committee reviewed clause {n} and agreed that the obligations described "
+             "therein remain in force for the full term of the agreement. ")
+
+
+def _paragraph(text: str, style: str | None = None) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f'<w:p>{ppr}<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _generate_docx(pages: int) -> Path:
+    """A python-docx default document whose body is replaced by ``pages`` pages of text."""
+    from docx import Document
+
+    out = Path(tempfile.mkstemp(suffix=".docx")[1])
+    Document().save(str(out))
+    with zipfile.ZipFile(out) as zf:
+        parts = {name: zf.read(name) for name in zf.namelist()}
+
+    body = []
+    n = 0
+    for page in range(pages):
+        if page % _PAGES_PER_SECTION == 0:
+            body.append(_paragraph(f"Section {page // _PAGES_PER_SECTION + 1}", "Heading1"))
+        for _ in range(_PARAGRAPHS_PER_PAGE):
+            n += 1
+            body.append(_paragraph((_SENTENCE * 3).format(n=n)))
+    document = parts["word/document.xml"].decode("utf-8")
+    start = document.index("<w:body>") + len("<w:body>")
+    end = document.index("<w:sectPr")
+    parts["word/document.xml"] = (document[:start] + "".join(body) + document[end:]).encode("utf-8")
+
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts.items():
+            zf.writestr(name, data)
+    return out
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _iter_python_docx_segments(path: Path):
+    """The python-docx reader ingestion used before ``_iter_docx_segments``."""
+    from docx import Document
+
+    from app.services.ingestion.pdf import _group_docx_paragraphs
+
+    doc = Document(str(path))
+    return _group_docx_paragraphs(
+        (para.style.name if para.style is not None else None, para.text) for para in doc.paragraphs
+    )
+
+
+def _measure(reader: str, path: str, queue) -> None:
+    from app.services.ingestion import pdf
+
+    fn = _iter_python_docx_segments if reader == "python-docx" else pdf._iter_docx_segments
+    baseline = _max_rss_mb()
+    start = time.perf_counter()
+    segments = [(s.text, s.section_heading) for s in fn(Path(path))]
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _max_rss_mb() - baseline, segments))
+
+
+def _run(reader: str, path: Path) -> tuple[float, float, list]:
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(reader, str(path), queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    args = parser.parse_args()
+
+    path = _generate_docx(args.pages)
+    try:
+        size_mb = path.stat().st_size / (1024 * 1024)
+        with zipfile.ZipFile(path) as zf:
+            xml_mb = zf.getinfo("word/document.xml").file_size / (1024 * 1024)
+        print(f"{args.pages} pages: {size_mb:.1f} MB .docx, {xml_mb:.1f} MB document.xml\n")
+        print(f"{'reader':<12} {'seconds':>8} {'peak RSS +MB':>13}")
+        results = {}
+        for label in ("python-docx", "streaming"):
+            elapsed, rss, segments = _run(label, path)
+            results[label] = segments
+            print(f"{label:<12} {elapsed:>8.2f} {rss:>13.1f}")
+        same = results["python-docx"] == results["streaming"]
+        print(f"\nsegments: {len(results['streaming'])}, identical output: {'yes' if same else 'NO'}")
+    finally:
+        path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Embedding throughput benchmark
+==============================
+Compares the old per-chunk path (one ``embed_query`` call per chunk, as
+``ingest_web`` / ``ingest_youtube`` used to do) against the batched
+``_Embedder.embed_batch`` path, for a range of batch sizes.
+
+Usage (from project root, venv active):
+    python scripts/bench_embedding.py                        # 500 chunks
+    python scripts/bench_embedding.py --chunks 2000
+    python scripts/bench_embedding.py --batch-sizes 16 64 256 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.core.config import settings
+from app.services.embedder import _Embedder
+
+from synthetic_docs import _LOREM
+
+
+def _make_chunks(n: int, size: int = 1500) -> list[str]:
+    base = _LOREM * (size // len(_LOREM) + 1)
+    # Vary the prefix so no two chunks are byte-identical.
+    return [f"Chunk {i}. {base[: size - 12]}" for i in range(n)]
+
+
+def _rate(n: int, elapsed: float) -> float:
+    return n / elapsed if elapsed > 0 else 0.0
+
+
+def run(args: argparse.Namespace) -> None:
+    texts = _make_chunks(args.chunks)
+    print("Embedding throughput benchmark")
+    print(f"Model: {settings.embedding_model}   chunks: {len(texts)}   threads: {args.threads or 'default'}")
+
+    embedder = _Embedder(settings.embedding_model, threads=args.threads or None)
+
+    t0 = time.perf_counter()
+    for text in texts:
+        embedder.embed_query(text)
+    per_chunk_s = time.perf_counter() - t0
+    baseline = _rate(len(texts), per_chunk_s)
+    print(f"\n  {'Path':<22} {'Time':>9} {'Chunks/s':>10} {'Speedup':>9}")
+    print(f"  {'─' * 52}")
+    print(f"  {'per-chunk embed_query':<22} {per_chunk_s:>8.2f}s {baseline:>10.1f} {'1.0x':>9}")
+
+    for bs in args.batch_sizes:
+        embedder.batch_size = bs
+        t0 = time.perf_counter()
+        embedder.embed_batch(texts)
+        elapsed = time.perf_counter() - t0
+        rate = _rate(len(texts), elapsed)
+        speedup = rate / baseline if baseline else 0.0
+        print(f"  {f'embed_batch bs={bs}':<22} {elapsed:>8.2f}s {rate:>10.1f} {speedup:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-chunk vs batched embedding throughput")
+    parser.add_argument("--chunks", type=int, default=500,
+                        help="Number of ~1500-char chunks to embed (default: 500)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256],
+                        help="Batch sizes to try for embed_batch (default: 16 64 256)")
+    parser.add_argument("--threads", type=int, default=settings.embedding_threads,
+                        help="ONNX intra-op threads (default: EMBEDDING_THREADS, 0 = onnxruntime default)")
+    run(parser.parse_args())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Outbound HTTP benchmark
+=======================
+Fetches a batch of URLs from a local stub server two ways:
+
+- ``per-request``: ``httpx.get`` on a thread pool, as ``_scrape`` and
+  ``_get_video_metadata`` used to do — a new connection for every fetch;
+- ``shared``: ``app.core.http.fetch`` on the shared keep-alive ``AsyncClient``.
+
+The stub server delays each *new* connection by ``--handshake-ms`` to stand in
+for the DNS + TCP + TLS setup a real remote host costs, and each response by
+``--latency-ms``.
+
+Usage (from project root, venv active):
+    python scripts/bench_http.py                         # 500 URLs, 4 hosts
+    python scripts/bench_http.py --urls 2000 --concurrency 32
+    python scripts/bench_http.py --handshake-ms 0        # plain-HTTP localhost
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx
+
+from app.core import http
+from app.core.config import settings
+
+_BODY = b"<html><head><title>Stub</title></head><body>" + b"<p>lorem ipsum</p>" * 200 + b"</body></html>"
+
+
+def _start_server(handshake_s: float, latency_s: float) -> tuple[ThreadingHTTPServer, dict]:
+    counters = {"connections": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with lock:
+                counters["connections"] += 1
+            time.sleep(handshake_s)
+
+        def do_GET(self):
+            time.sleep(latency_s)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(_BODY)))
+            self.end_headers()
+            self.wfile.write(_BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+def _urls(port: int, n: int, hosts: int) -> list[str]:
+    # Distinct hostnames that all resolve to the stub, so per-host limits apply.
+    names = (["127.0.0.1", "localhost"] + [f"127.0.0.{i}" for i in range(2, 255)])[: max(1, hosts)]
+    return [f"http://{names[i % len(names)]}:{port}/page/{i}" for i in range(n)]
+
+
+def _bench_per_request(urls: list[str], concurrency: int) -> float:
+    def get(url: str) -> int:
+        return len(httpx.get(url, timeout=30, follow_redirects=True).content)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(get, urls))
+    return time.perf_counter() - start
+
+
+async def _bench_shared(urls: list[str], concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def get(url: str) -> int:
+        async with sem:
+            return len((await http.fetch(url)).content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(get(u) for u in urls))
+    elapsed = time.perf_counter() - start
+    await http.close_http_client()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=500)
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--handshake-ms", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    server, counters = _start_server(args.handshake_ms / 1000, args.latency_ms / 1000)
+    urls = _urls(server.server_address[1], args.urls, args.hosts)
+    settings.http_per_host_connections = max(1, args.concurrency // max(1, args.hosts))
+
+    print(f"{args.urls} URLs over {args.hosts} hosts, concurrency {args.concurrency}, "
+          f"handshake {args.handshake_ms} ms, latency {args.latency_ms} ms\n")
+    print(f"{'mode':<12} {'seconds':>8} {'req/s':>9} {'connections':>12}")
+
+    results = {}
+    for mode in ("per-request", "shared"):
+        counters["connections"] = 0
+        if mode == "per-request":
+            elapsed = _bench_per_request(urls, args.concurrency)
+        else:
+            elapsed = asyncio.run(_bench_shared(urls, args.concurrency))
+        results[mode] = elapsed
+        print(f"{mode:<12} {elapsed:>8.2f} {args.urls / elapsed:>9.1f} {counters['connections']:>12}")
+
+    print(f"\nspeed-up: {results['per-request'] / results['shared']:.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+PDF page layout benchmark
+=========================
+Per-page timing of the legacy two-pass extraction (``page.get_text()`` then
+``page.get_text("dict")`` for heading detection) against the single-pass
+``_parse_page_layout``, on the synthetic PDFs from ``synthetic_docs._generate_pdf``.
+Also checks that both paths produce identical text and headings.
+
+Usage (from project root, venv active):
+    python scripts/bench_pdf_layout.py                   # 100 KB, 1 MB, 5 MB
+    python scripts/bench_pdf_layout.py --sizes-kb 500 2048
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import fitz
+
+from app.services.ingestion.pdf import HEADING_MIN_FONT_SIZE, _parse_page_layout
+
+from synthetic_docs import _generate_pdf
+
+
+def _legacy_extract(page) -> tuple[str, str | None]:
+    """The pre-single-pass extraction: plain text, then a second dict parse."""
+    text = page.get_text()
+    max_size, heading = 0.0, None
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                size = span.get("size", 0.0)
+                txt = span.get("text", "").strip()
+                if size > max_size and 3 < len(txt) < 200:
+                    max_size, heading = size, txt
+    return text, heading if max_size > HEADING_MIN_FONT_SIZE else None
+
+
+def _single_pass(page) -> tuple[str, str | None]:
+    layout = _parse_page_layout(page)
+    return layout.text, layout.heading
+
+
+def _time_pages(doc, fn) -> tuple[list[float], list]:
+    timings, outputs = [], []
+    for page in doc:
+        t0 = time.perf_counter()
+        outputs.append(fn(page))
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings, outputs
+
+
+def run(args: argparse.Namespace) -> None:
+    print("PDF page layout benchmark  (per-page ms, mean / p95)")
+    print(f"\n  {'Size':<8} {'Pages':>6} {'Two-pass':>16} {'Single-pass':>16} {'Speedup':>8}  Same output")
+    print(f"  {'─' * 70}")
+    for kb in args.sizes_kb:
+        label = f"{kb} KB" if kb < 1024 else f"{kb // 1024} MB"
+        pdf = _generate_pdf(kb * 1024)
+        try:
+            doc = fitz.open(str(pdf))
+            legacy_ms, legacy_out = _time_pages(doc, _legacy_extract)
+            single_ms, single_out = _time_pages(doc, _single_pass)
+            pages = doc.page_count
+            doc.close()
+        finally:
+            pdf.unlink(missing_ok=True)
+
+        def _fmt(ms: list[float]) -> str:
+            p95 = sorted(ms)[int(0.95 * (len(ms) - 1))]
+            return f"{statistics.mean(ms):.2f}/{p95:.2f}"
+
+        speedup = statistics.mean(legacy_ms) / statistics.mean(single_ms)
+        same = "yes" if legacy_out == single_out else "NO"
+        print(f"  {label:<8} {pages:>6} {_fmt(legacy_ms):>16} {_fmt(single_ms):>16} {speedup:>7.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Two-pass vs single-pass PDF page parsing")
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[100, 1024, 5 * 1024],
+                        help="Synthetic PDF sizes in KB (default: 100 1024 5120)")
+    run(parser.parse_args())
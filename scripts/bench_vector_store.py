@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Vector store benchmark
+======================
+Insert time, query latency, peak memory and disk size of ChromaDB against the
+in-process local index (``app/core/local_index.py``) — exact and partitioned —
+on synthetic clustered 384-d embeddings, for each corpus size in ``--sizes``.
+Partitioned search also reports recall@k against exact search.
+
+Each backend runs in a fresh process so its peak RSS is measured in isolation;
+the figure reported is the growth over the process's RSS once the corpus is
+loaded. The local index keeps float32 copies of up to ``--cache-mb`` of its
+float16 vectors per collection, and that cache is counted in its figure.
+
+Chroma is reached over HTTP with ``--chroma-host``/``--chroma-port`` (as the app
+does). Without them it runs in-process via ``PersistentClient``, which leaves out
+the HTTP round trip and so flatters Chroma's latency.
+
+Usage (from project root, venv active):
+    python scripts/bench_vector_store.py                          # 10k and 50k rows
+    python scripts/bench_vector_store.py --sizes 10000,100000,300000 --queries 500
+    python scripts/bench_vector_store.py --chroma-host localhost --chroma-port 8001
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_DIM = 384
+_CLUSTERS = 256
+_BATCH = 4096
+_SOURCES = 200
+
+
+def _corpus(n: int, queries: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(_CLUSTERS, _DIM)).astype(np.float32)
+    data = centers[rng.integers(0, _CLUSTERS, n)] + 0.35 * rng.normal(size=(n, _DIM)).astype(np.float32)
+    picks = data[rng.integers(0, n, queries)] + 0.2 * rng.normal(size=(queries, _DIM)).astype(np.float32)
+    return data, picks
+
+
+def _max_rss_mb() -> float:
+    # On Linux ru_maxrss survives exec, so a spawned child would report the parent's peak; VmHWM does not.
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _dir_mb(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / (1024 * 1024)
+
+
+def _measure(backend: str, k: int, chroma: tuple[str, int] | None, cache_mb: int, workdir: str, out) -> None:
+    data = np.load(Path(workdir) / "data.npy")
+    picks = np.load(Path(workdir) / "queries.npy")
+    n = len(data)
+    baseline = _max_rss_mb()
+    path = Path(workdir) / backend
+
+    if backend == "chroma":
+        import chromadb
+
+        client = (chromadb.HttpClient(host=chroma[0], port=chroma[1]) if chroma
+                  else chromadb.PersistentClient(path=str(path)))
+        try:
+            client.delete_collection("bench")
+        except Exception:
+            pass
+        col = client.get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+    else:
+        from app.core.local_index import LocalIndexClient
+
+        client = LocalIndexClient(path, partition_min=1 if backend == "partitioned" else 0, nprobe=16,
+                                  cache_mb=cache_mb)
+        col = client.get_or_create_collection("bench")
+
+    start = time.perf_counter()
+    for i in range(0, n, _BATCH):
+        rows = range(i, min(i + _BATCH, n))
+        col.add(
+            ids=[str(r) for r in rows],
+            embeddings=data[i : i + len(rows)],
+            documents=[f"chunk {r}" for r in rows],
+            metadatas=[{"source_id": f"s{r % _SOURCES}", "chunk_index": r} for r in rows],
+        )
+    insert = time.perf_counter() - start
+
+    col.query(query_embeddings=picks[:1], n_results=k)   # warm-up: page in / build partitions
+    latencies, ids = [], []
+    for q in picks:
+        t = time.perf_counter()
+        res = col.query(query_embeddings=[q], n_results=k, include=["documents", "metadatas", "distances"])
+        latencies.append(time.perf_counter() - t)
+        ids.append(res["ids"][0])
+    t = time.perf_counter()
+    for q in picks[:50]:
+        col.query(query_embeddings=[q], n_results=k, where={"source_id": {"$in": ["s1", "s2", "s3"]}})
+    filtered = (time.perf_counter() - t) / 50
+
+    lat = np.array(latencies) * 1000
+    disk = _dir_mb(path) if path.exists() else float("nan")   # not measurable for a remote server
+    if chroma:
+        client.delete_collection("bench")
+    out.put({
+        "insert_s": insert,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "filtered_ms": filtered * 1000,
+        "rss_mb": _max_rss_mb() - baseline,
+        "disk_mb": disk,
+        "ids": ids,
+    })
+
+
+def _run(backend: str, args, workdir: str) -> dict:
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    chroma = (args.chroma_host, args.chroma_port) if args.chroma_host else None
+    proc = ctx.Process(target=_measure, args=(backend, args.k, chroma, args.cache_mb, workdir, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=8)
+    parser.add_argument("--chroma-host", default="")
+    parser.add_argument("--chroma-port", type=int, default=8001)
+    parser.add_argument("--cache-mb", type=int, default=256, help="local index float32 cache per collection")
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    backends = ["exact", "partitioned"] + ([] if args.skip_chroma else ["chroma"])
+    where = f"HTTP {args.chroma_host}:{args.chroma_port}" if args.chroma_host else "in-process, no HTTP"
+    print(f"{_DIM}-d vectors, {args.queries} queries, k={args.k}; chroma: {where}\n")
+    print(f"{'rows':>8} {'backend':<12} {'insert s':>9} {'p50 ms':>8} {'p95 ms':>8} {'filter ms':>10} "
+          f"{'RSS +MB':>8} {'disk MB':>8} {'recall':>7}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        workdir = tempfile.mkdtemp(prefix="bench-vs-")
+        try:
+            data, picks = _corpus(n, args.queries)
+            np.save(Path(workdir) / "data.npy", data)
+            np.save(Path(workdir) / "queries.npy", picks)
+            del data, picks
+            results = {b: _run(b, args, workdir) for b in backends}
+            truth = results["exact"]["ids"]
+            for b, r in results.items():
+                recall = np.mean([len(set(g) & set(w)) / len(w) for g, w in zip(r["ids"], truth) if w])
+                print(f"{n:>8} {b:<12} {r['insert_s']:>9.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+                      f"{r['filtered_ms']:>10.2f} {r['rss_mb']:>8.1f} {r['disk_mb']:>8.1f} {recall:>7.3f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
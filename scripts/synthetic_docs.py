@@ -0,0 +1,101 @@
+"""
+Synthetic documents shared by the benchmark scripts.
+
+Kept free of app imports so any script can use the generators without
+pulling in the services it is not measuring.
+"""
+
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Synthetic document content — known facts with labelled ground-truth queries
+# ---------------------------------------------------------------------------
+
+# Each entry: (fact_label, fact_sentence, query_text)
+GROUND_TRUTH = [
+    (
+        "q3_revenue",
+        "The Q3 2024 quarterly revenue was exactly 4.231 billion dollars.",
+        "What was the Q3 2024 revenue?",
+    ),
+    (
+        "yoy_growth",
+        "Year-over-year revenue growth reached precisely 15.7 percent in Q3.",
+        "How much did the company grow year over year?",
+    ),
+    (
+        "cac",
+        "Customer acquisition cost decreased to 127 dollars per new user this quarter.",
+        "What is the customer acquisition cost?",
+    ),
+    (
+        "ebitda",
+        "EBITDA margins expanded to 28.5 percent from 24.1 percent in the prior year.",
+        "What are the EBITDA margins?",
+    ),
+    (
+        "headcount",
+        "Total employee headcount grew to 8432 full-time employees by end of quarter.",
+        "How many employees does the company have?",
+    ),
+]
+
+_LOREM = (
+    "The company continues to invest in its core product lines while expanding "
+    "into adjacent markets. Strategic partnerships have been established with "
+    "several industry leaders to accelerate distribution. Operating leverage "
+    "remains a key focus as the team scales efficiently. Research and development "
+    "spending increased by twelve percent to support next-generation capabilities. "
+    "International markets contributed twenty-two percent of total revenue this period. "
+    "The balance sheet remains strong with over two billion in cash and equivalents. "
+    "Supply chain improvements reduced cost of goods sold by three percentage points. "
+    "Customer satisfaction scores reached an all-time high of 94 out of 100. "
+    "The leadership team was strengthened with three executive hires in key functions. "
+    "Regulatory approvals were obtained in four new markets during the quarter. "
+)
+
+
+# ---------------------------------------------------------------------------
+# PDF / document generation (uses pymupdf — already a dependency)
+# ---------------------------------------------------------------------------
+
+def _generate_pdf(target_bytes: int, include_facts: bool = False) -> Path:
+    """
+    Create a synthetic PDF whose raw size is approximately target_bytes.
+    If include_facts=True, embeds GROUND_TRUTH sentences at known positions.
+    Returns the path to the temp file.
+    """
+    import fitz
+
+    tmp = Path(tempfile.mktemp(suffix=".pdf"))
+    doc = fitz.open()
+
+    # Estimate chars needed (PDF overhead is ~60 bytes per char of text on average)
+    chars_needed = max(target_bytes // 4, 500)
+    base_text = _LOREM * (chars_needed // len(_LOREM) + 1)
+
+    # Insert facts at ~1/3 and ~2/3 of the way through (if requested)
+    facts_text = ""
+    if include_facts:
+        for _, sentence, _ in GROUND_TRUTH:
+            facts_text += f"\n\n{sentence}\n\n"
+
+    full_text = base_text[: chars_needed // 3] + facts_text + base_text[chars_needed // 3 :]
+
+    # Chunk into pages (~3000 chars per page)
+    chars_per_page = 3000
+    for i in range(0, len(full_text), chars_per_page):
+        page = doc.new_page(width=595, height=842)  # A4
+        page.insert_text(
+            (50, 50),
+            full_text[i : i + chars_per_page],
+            fontsize=11,
+            fontname="helv",
+        )
+
+    doc.save(str(tmp), garbage=4, deflate=True)
+    doc.close()
+    return tmp
@@ -18,7 +18,7 @@ async def test_graph_runs_full_pipeline():
         patch("app.agent.nodes.critic.chat_complete", new=AsyncMock(
             return_value='{"quality": "good", "feedback": ""}')),
         patch("app.agent.nodes.retriever.get_embedder") as mock_emb,
-        patch("app.agent.nodes.retriever.get_collection") as mock_col,
+        patch("app.core.vector_store.get_collection") as mock_col,
     ):
         import numpy as np
         mock_emb.return_value.embed_query.return_value = np.array([0.1] * 384)
@@ -2,7 +2,7 @@ import pytest
 import numpy as np
 from unittest.mock import MagicMock, patch
 from app.agent.state import AgentState
-from app.agent.nodes.retriever import retriever_node
+from app.agent.nodes.retriever import mmr_select, rank_chunks, retriever_node
 
 
 def _base_state(**kwargs) -> AgentState:
@@ -32,7 +32,7 @@ async def test_retriever_queries_selected_sources():
     mock_embedder.embed_query.return_value = np.array([0.1] * 384, dtype="float32")
 
     with (
-        patch("app.agent.nodes.retriever.get_collection", return_value=mock_collection),
+        patch("app.core.vector_store.get_collection", return_value=mock_collection),
         patch("app.agent.nodes.retriever.get_embedder", return_value=mock_embedder),
     ):
         result = await retriever_node(_base_state(sources_to_use=["pdf"]))
@@ -55,7 +55,7 @@ async def test_retriever_deduplicates_chunks():
     mock_embedder.embed_query.return_value = np.array([0.1] * 384, dtype="float32")
 
     with (
-        patch("app.agent.nodes.retriever.get_collection", return_value=mock_collection),
+        patch("app.core.vector_store.get_collection", return_value=mock_collection),
         patch("app.agent.nodes.retriever.get_embedder", return_value=mock_embedder),
     ):
         result = await retriever_node(_base_state(sources_to_use=["pdf"]))
@@ -69,3 +69,147 @@ async def test_retriever_returns_empty_without_embedder():
         result = await retriever_node(_base_state())
 
     assert result["retrieved_chunks"] == []
+
+
+def _collections(delays: dict[str, float]):
+    """Collections whose query sleeps for ``delays[name]`` seconds (a negative delay raises)."""
+    import time
+
+    def make(name):
+        def query(**kwargs):
+            if delays[name] < 0:
+                raise RuntimeError("unavailable")
+            time.sleep(delays[name])
+            return {"documents": [[f"{name} text"]], "metadatas": [[{}]], "distances": [[0.2]]}
+        col = MagicMock()
+        col.query.side_effect = query
+        return col
+
+    cols = {name: make(name) for name in delays}
+    return lambda name: cols[name]
+
+
+@pytest.mark.asyncio
+async def test_retriever_queries_collections_concurrently():
+    import time
+    mock_embedder = MagicMock()
+    mock_embedder.embed_query.return_value = np.array([0.1] * 384, dtype="float32")
+    delays = {"pdf_chunks": 0.3, "youtube_chunks": 0.3, "web_chunks": 0.3}
+
+    with (
+        patch("app.core.vector_store.get_collection", side_effect=_collections(delays)),
+        patch("app.agent.nodes.retriever.get_embedder", return_value=mock_embedder),
+    ):
+        start = time.perf_counter()
+        result = await retriever_node(_base_state(sources_to_use=["pdf", "youtube", "web"]))
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.8
+    assert [c["source_type"] for c in result["retrieved_chunks"]] == ["pdf", "youtube", "web"]
+    assert set(result["retrieval_stats"]["collections"]) == {"pdf", "youtube", "web"}
+
+
+@pytest.mark.asyncio
+async def test_retriever_times_out_slow_collection_and_records_it():
+    mock_embedder = MagicMock()
+    mock_embedder.embed_query.return_value = np.array([0.1] * 384, dtype="float32")
+    delays = {"pdf_chunks": 0.0, "youtube_chunks": 1.0, "web_chunks": -1}
+
+    with (
+        patch("app.core.vector_store.get_collection", side_effect=_collections(delays)),
+        patch("app.agent.nodes.retriever.get_embedder", return_value=mock_embedder),
+        patch("app.agent.nodes.retriever.settings.retrieval_timeout_seconds", 0.2),
+    ):
+        result = await retriever_node(_base_state(sources_to_use=["pdf", "youtube", "web"]))
+
+    stats = result["retrieval_stats"]
+    assert [c["source_type"] for c in result["retrieved_chunks"]] == ["pdf"]
+    assert stats["collections"]["youtube"]["status"] == "timeout"
+    assert stats["collections"]["web"]["status"] == "error"
+    assert stats["collections"]["pdf"] == {**stats["collections"]["pdf"], "status": "ok", "chunks": 1}
+    assert stats["slowest"] == "youtube"
+    assert stats["ms"] < 800
+
+
+def _chunk(text: str, distance: float, source: str = "pdf") -> dict:
+    return {"text": text, "metadata": {}, "source_type": source, "distance": distance}
+
+
+def test_rank_chunks_merges_collections_by_distance():
+    chunks = [_chunk("a", 0.30), _chunk("b", 0.10, "web"), _chunk("c", 0.20, "youtube"), _chunk("a", 0.05, "web")]
+    ranked = rank_chunks(chunks, top_k=10, max_distance=0, max_gap=0)
+    assert [(c["text"], c["source_type"]) for c in ranked] == [("a", "web"), ("b", "web"), ("c", "youtube")]
+    assert ranked[0]["norm_distance"] == pytest.approx(0.025)
+
+
+def test_rank_chunks_cutoffs():
+    close = [_chunk(f"near {i}", 0.20 + 0.01 * i) for i in range(6)]
+    far = [_chunk(f"far {i}", 0.80 + 0.01 * i) for i in range(6)]
+    # The jump from ~0.13 to 0.40 (normalized) ends the list.
+    assert len(rank_chunks(close + far, top_k=20, max_distance=0, max_gap=0.08)) == 6
+    assert len(rank_chunks(close + far, top_k=4, max_distance=0, max_gap=0.08)) == 4
+    assert len(rank_chunks(close + far, top_k=20, max_distance=0.107, max_gap=0)) == 2
+    # Nothing is close: min_k still hands the best chunk over.
+    assert [c["text"] for c in rank_chunks(far, top_k=8, max_distance=0.2, max_gap=0.08)] == ["far 0"]
+    assert rank_chunks(far, top_k=8, max_distance=0.2, max_gap=0.08, min_k=0) == []
+
+
+@pytest.mark.asyncio
+async def test_retriever_reports_chunk_counts():
+    mock_collection = MagicMock()
+    mock_collection.query.return_value = {
+        "documents": [["close", "also close", "far away"]],
+        "metadatas": [[{}, {}, {}]],
+        "distances": [[0.1, 0.12, 0.9]],
+    }
+    mock_embedder = MagicMock()
+    mock_embedder.embed_query.return_value = np.array([0.1] * 384, dtype="float32")
+
+    with (
+        patch("app.core.vector_store.get_collection", return_value=mock_collection),
+        patch("app.agent.nodes.retriever.get_embedder", return_value=mock_embedder),
+    ):
+        result = await retriever_node(_base_state(sources_to_use=["pdf"]))
+
+    assert [c["text"] for c in result["retrieved_chunks"]] == ["close", "also close"]
+    assert result["retrieval_stats"]["candidates"] == 3
+    assert result["retrieval_stats"]["chunks"] == 2
+
+
+def test_mmr_select_skips_near_duplicates():
+    query = np.array([1.0, 0.0, 0.0])
+    vectors = np.array([
+        [0.95, 0.30, 0.0],    # most relevant
+        [0.94, 0.31, 0.0],    # near-duplicate of the first
+        [0.80, 0.0, 0.60],    # relevant and different
+        [0.0, 1.0, 0.0],      # irrelevant
+    ])
+    assert mmr_select(query, vectors, k=3, lambda_=1.0) == [0, 1, 2]
+    assert mmr_select(query, vectors, k=3, lambda_=0.5)[:2] == [0, 2]
+    assert mmr_select(query, vectors, k=4, lambda_=0.7, duplicate_similarity=0.99) == [0, 2, 3]
+    assert mmr_select(query, vectors[:0], k=3, lambda_=0.7) == []
+
+
+@pytest.mark.asyncio
+async def test_retriever_mmr_drops_near_duplicate_chunks():
+    mock_collection = MagicMock()
+    mock_collection.query.return_value = {
+        "documents": [["overlap A", "overlap A again", "other topic"]],
+        "metadatas": [[{}, {}, {}]],
+        "distances": [[0.10, 0.11, 0.15]],
+        "embeddings": [np.array([[1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.7, 0.0, 0.7]])],
+    }
+    mock_embedder = MagicMock()
+    mock_embedder.embed_query.return_value = np.array([1.0, 0.0, 0.2], dtype="float32")
+
+    with (
+        patch("app.core.vector_store.get_collection", return_value=mock_collection),
+        patch("app.agent.nodes.retriever.get_embedder", return_value=mock_embedder),
+        patch("app.agent.nodes.retriever.settings.retrieval_mmr", True),
+    ):
+        result = await retriever_node(_base_state(sources_to_use=["pdf"]))
+
+    kwargs = mock_collection.query.call_args.kwargs
+    assert "embeddings" in kwargs["include"] and kwargs["n_results"] == 20
+    assert [c["text"] for c in result["retrieved_chunks"]] == ["overlap A", "other topic"]
+    assert all("embedding" not in c for c in result["retrieved_chunks"])
@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
+import asyncio
+import hashlib
 import io
 
 
@@ -10,40 +12,229 @@ def client():
     return TestClient(app)
 
 
-def test_ingest_pdf_returns_source_id(client):
-    with patch("app.api.ingest.ingest_pdf", new=AsyncMock(return_value="src-123")):
+def _manager():
+    manager = MagicMock()
+    job = MagicMock()
+    job.id = "job-1"
+    job.status.value = "queued"
+    manager.submit.return_value = job
+    return manager
+
+
+async def _run_submitted(manager):
+    """Invoke the job function captured by the mocked manager."""
+    fn = manager.submit.call_args[0][2]
+    return await fn(lambda stage, n: None)
+
+
+def test_ingest_pdf_queues_job(client):
+    manager = _manager()
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.api.ingest.ingest_pdf", new=AsyncMock(return_value="src-123")) as mock_ingest,
+    ):
         response = client.post(
             "/api/v1/ingest/pdf",
             files={"file": ("test.pdf", io.BytesIO(b"%PDF-fake"), "application/pdf")},
         )
-    assert response.status_code == 200
-    assert response.json()["source_id"] == "src-123"
+        assert response.status_code == 202
+        assert response.json()["job_id"] == "job-1"
+        assert asyncio.run(_run_submitted(manager)) == "src-123"
+
+    # Small uploads are handed over in memory with their hash precomputed.
+    assert mock_ingest.call_args[0][0] == b"%PDF-fake"
+    assert mock_ingest.call_args[1]["file_hash"] == hashlib.sha256(b"%PDF-fake").hexdigest()
+    assert manager.submit.call_args[0][:2] == ("pdf", "test.pdf")
+
+
+def test_ingest_pdf_rejects_oversized_upload(client):
+    manager = _manager()
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.services.ingestion.upload.settings.upload_max_bytes", 1024),
+    ):
+        response = client.post(
+            "/api/v1/ingest/pdf",
+            files={"file": ("big.pdf", io.BytesIO(b"x" * 4096), "application/pdf")},
+        )
+    assert response.status_code == 413
+    manager.submit.assert_not_called()
 
 
-def test_ingest_youtube_returns_source_id(client):
-    with patch("app.api.ingest.ingest_youtube", new=AsyncMock(return_value="src-456")):
+def test_ingest_pdf_version_queues_job_for_existing_source(client):
+    manager = _manager()
+    col = MagicMock()
+    col.get.return_value = {"ids": ["s1_0"]}
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.core.vector_store.get_collection", return_value=col),
+        patch("app.api.ingest.ingest_pdf_version", new=AsyncMock(return_value={"version": 2})) as mock_version,
+    ):
+        response = client.post(
+            "/api/v1/ingest/pdf/s1/versions",
+            files={"file": ("v2.pdf", io.BytesIO(b"%PDF-v2"), "application/pdf")},
+        )
+        assert response.status_code == 202
+        assert asyncio.run(_run_submitted(manager)) == {"version": 2}
+
+    assert mock_version.call_args[0][:2] == ("s1", b"%PDF-v2")
+
+    col.get.return_value = {"ids": []}
+    with patch("app.core.vector_store.get_collection", return_value=col):
+        response = client.post(
+            "/api/v1/ingest/pdf/nope/versions",
+            files={"file": ("v2.pdf", io.BytesIO(b"%PDF-v2"), "application/pdf")},
+        )
+    assert response.status_code == 404
+
+
+def test_ingest_youtube_queues_job(client):
+    manager = _manager()
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.api.ingest.ingest_youtube", new=AsyncMock(return_value="src-456")),
+    ):
         response = client.post(
             "/api/v1/ingest/youtube",
             json={"url": "https://youtube.com/watch?v=abc123"},
         )
-    assert response.status_code == 200
-    assert response.json()["source_id"] == "src-456"
+    assert response.status_code == 202
+    assert response.json() == {
+        "job_id": "job-1",
+        "status": "queued",
+        "message": "Queued YouTube: https://youtube.com/watch?v=abc123",
+    }
+    assert manager.submit.call_args[0][0] == "youtube"
+
+
+def test_ingest_youtube_playlist_queues_bulk_job(client):
+    manager = _manager()
+    url = "https://www.youtube.com/playlist?list=PL123"
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.api.ingest.ingest_youtube_collection", new=AsyncMock(return_value=[])) as mock_collection,
+    ):
+        response = client.post("/api/v1/ingest/youtube", json={"url": url})
+        assert response.status_code == 202
+        assert response.json()["message"] == f"Queued YouTube playlist: {url}"
+        asyncio.run(_run_submitted(manager))
 
+    assert manager.submit.call_args[0][0] == "bulk"
+    assert mock_collection.call_args[0][0] == url
 
-def test_ingest_web_returns_source_id(client):
-    with patch("app.api.ingest.ingest_web", new=AsyncMock(return_value="src-789")):
+
+def test_ingest_web_queues_job(client):
+    manager = _manager()
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.api.ingest.ingest_web", new=AsyncMock(return_value="src-789")),
+    ):
         response = client.post(
             "/api/v1/ingest/web",
             json={"url": "https://example.com/article"},
         )
+    assert response.status_code == 202
+    assert manager.submit.call_args[0][0] == "web"
+
+
+def test_ingest_bulk_queues_deduplicated_urls(client):
+    manager = _manager()
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.api.ingest.ingest_bulk_urls", new=AsyncMock(return_value=[])) as mock_bulk,
+    ):
+        response = client.post(
+            "/api/v1/ingest/bulk",
+            json={"urls": ["https://a.example", " https://a.example ", "https://b.example"]},
+        )
+        assert response.status_code == 202
+        asyncio.run(_run_submitted(manager))
+
+    assert manager.submit.call_args[0][0] == "bulk"
+    assert mock_bulk.call_args[0][0] == ["https://a.example", "https://b.example"]
+    assert client.post("/api/v1/ingest/bulk", json={"urls": []}).status_code == 400
+
+
+def test_ingest_bulk_zip_rejects_other_files(client):
+    response = client.post(
+        "/api/v1/ingest/bulk/zip",
+        files={"file": ("notes.txt", io.BytesIO(b"hi"), "text/plain")},
+    )
+    assert response.status_code == 400
+
+
+def test_ingest_crawl_creates_crawl_and_queues_job(client):
+    manager = _manager()
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.api.ingest.create_crawl", new=AsyncMock(return_value="crawl-1")) as mock_create,
+        patch("app.api.ingest.run_crawl", new=AsyncMock(return_value={"pages": {}})) as mock_run,
+    ):
+        response = client.post("/api/v1/ingest/crawl", json={"url": "https://site.example/", "max_depth": 1})
+        assert response.status_code == 202
+        assert response.json()["crawl_id"] == "crawl-1"
+        asyncio.run(_run_submitted(manager))
+
+    options = mock_create.call_args[0][1]
+    assert options.max_depth == 1 and options.respect_robots
+    assert mock_run.call_args[0][0] == "crawl-1"
+    assert manager.submit.call_args[0][0] == "crawl"
+
+
+def test_resume_unknown_crawl_returns_404(client):
+    with patch("app.api.ingest.crawl_summary", new=AsyncMock(return_value=None)):
+        response = client.post("/api/v1/ingest/crawls/nope/resume")
+    assert response.status_code == 404
+
+
+def test_refresh_source_queues_job(client):
+    manager = _manager()
+    col = MagicMock()
+    col.get.return_value = {"ids": ["s1_0"]}
+    with (
+        patch("app.api.ingest.get_job_manager", return_value=manager),
+        patch("app.core.vector_store.get_collection", return_value=col),
+        patch("app.api.ingest.refresh_web_source", new=AsyncMock(return_value={"status": "updated"})) as mock_refresh,
+    ):
+        response = client.post("/api/v1/sources/s1/refresh")
+        assert response.status_code == 202
+        asyncio.run(_run_submitted(manager))
+
+    assert mock_refresh.call_args[0][0] == "s1"
+    assert manager.submit.call_args[0][:2] == ("refresh", "s1")
+
+    col.get.return_value = {"ids": []}
+    with patch("app.core.vector_store.get_collection", return_value=col):
+        assert client.post("/api/v1/sources/nope/refresh").status_code == 404
+
+
+def test_get_job_returns_404_for_unknown_id(client):
+    manager = MagicMock()
+    manager.get.return_value = None
+    with patch("app.api.ingest.get_job_manager", return_value=manager):
+        assert client.get("/api/v1/ingest/jobs/missing").status_code == 404
+        assert client.get("/api/v1/ingest/jobs/missing/events").status_code == 404
+
+
+def test_job_events_stream_snapshots(client):
+    async def watch(job_id):
+        yield {"job_id": job_id, "status": "running"}
+        yield {"job_id": job_id, "status": "succeeded", "source_id": "src-1"}
+
+    manager = MagicMock()
+    manager.watch = watch
+    with patch("app.api.ingest.get_job_manager", return_value=manager):
+        response = client.get("/api/v1/ingest/jobs/job-1/events")
     assert response.status_code == 200
-    assert response.json()["source_id"] == "src-789"
+    events = [line for line in response.text.split("\n\n") if line]
+    assert len(events) == 2
+    assert '"status": "succeeded"' in events[-1]
 
 
 def test_list_sources_returns_empty_on_no_data(client):
     mock_col = MagicMock()
     mock_col.get.return_value = {"metadatas": []}
-    with patch("app.api.ingest.get_collection", return_value=mock_col):
+    with patch("app.core.vector_store.get_collection", return_value=mock_col):
         response = client.get("/api/v1/sources")
     assert response.status_code == 200
     assert response.json()["sources"] == []
@@ -1,5 +1,5 @@
 from unittest.mock import MagicMock, patch
-from app.core.chroma import get_chroma_client, get_collection
+from app.core.chroma import forget_collection, get_chroma_client, get_collection
 
 
 def test_get_chroma_client_returns_singleton():
@@ -26,3 +26,37 @@ def test_get_collection_uses_cosine_space():
         metadata={"hnsw:space": "cosine"},
     )
     assert result is mock_collection
+
+
+def test_get_collection_caches_handles_per_client():
+    mock_client = MagicMock()
+    with patch("app.core.chroma.get_chroma_client", return_value=mock_client):
+        first = get_collection("web_chunks")
+        assert get_collection("web_chunks") is first
+        assert mock_client.get_or_create_collection.call_count == 1
+        forget_collection("web_chunks")
+        get_collection("web_chunks")
+        assert mock_client.get_or_create_collection.call_count == 2
+
+    other = MagicMock()
+    with patch("app.core.chroma.get_chroma_client", return_value=other):
+        get_collection("web_chunks")
+    other.get_or_create_collection.assert_called_once()
+
+
+def test_local_backend_serves_collections_in_process(tmp_path):
+    from app.core.chroma import get_local_index_client
+    from app.core.local_index import LocalCollection
+    from app.services.ingestion.dedup import find_source
+
+    get_local_index_client.cache_clear()
+    with (
+        patch("app.core.chroma.settings.vector_backend", "local"),
+        patch("app.core.chroma.settings.vector_index_dir", str(tmp_path)),
+    ):
+        col = get_collection("pdf_chunks")
+        assert isinstance(col, LocalCollection)
+        col.add(ids=["a_0"], embeddings=[[1.0, 0.0]], documents=["x"], metadatas=[{"source_id": "a", "content_hash": "h"}])
+        assert find_source(get_collection("pdf_chunks"), "h") == "a"
+        get_local_index_client().close()
+    get_local_index_client.cache_clear()
@@ -0,0 +1,186 @@
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app import cli
+
+
+@pytest.fixture
+def index():
+    """Patches the ingest calls; returns the mocks plus a fake pdf_chunks collection."""
+    collection = MagicMock()
+    collection.get.side_effect = lambda where, include: {"ids": [f"{where['source_id']}_0"]}
+    counter = iter(range(100))
+    with (
+        patch("app.cli.ingest_pdf", new=AsyncMock(side_effect=lambda *a, **k: f"src-{next(counter)}")) as ingest,
+        patch("app.cli.ingest_pdf_version", new=AsyncMock(return_value={"version": 2})) as version,
+        patch("app.cli.get_collection", return_value=collection),
+    ):
+        yield ingest, version, collection
+
+
+def _bump(path, content):
+    path.write_text(content)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+
+
+def test_sync_ingests_new_then_only_changes(tmp_path, index):
+    ingest, version, collection = index
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    (docs / "a.txt").write_text("alpha")
+    (docs / "sub" / "b.md").write_text("beta")
+    (docs / "image.png").write_bytes(b"\x89PNG")
+    (docs / ".hidden.txt").write_text("skip me")
+    manifest = docs / cli.MANIFEST_NAME
+
+    counts = cli.sync(docs, manifest)
+    assert counts["new"] == 2 and counts["failed"] == 0
+    files = json.loads(manifest.read_text())["files"]
+    assert set(files) == {"a.txt", "sub/b.md"}
+
+    # Nothing changed: no file is even hashed.
+    with patch("app.cli.hash_file") as hashing:
+        assert cli.sync(docs, manifest)["unchanged"] == 2
+    hashing.assert_not_called()
+
+    _bump(docs / "a.txt", "alpha v2")
+    os.utime(docs / "sub" / "b.md")           # touched, same bytes
+    (docs / "c.txt").write_text("gamma")
+    counts = cli.sync(docs, manifest)
+    assert (counts["new"], counts["changed"], counts["unchanged"]) == (1, 1, 0)
+    assert version.call_args[0][0] == files["a.txt"]["source_id"]
+    assert ingest.call_count == 3
+
+    (docs / "sub" / "b.md").unlink()
+    counts = cli.sync(docs, manifest)
+    assert counts["removed"] == 1
+    collection.delete.assert_called_once_with(ids=[f"{files['sub/b.md']['source_id']}_0"])
+    assert "sub/b.md" not in json.loads(manifest.read_text())["files"]
+
+
+def test_shared_source_survives_removal_and_edits(tmp_path, index):
+    ingest, version, collection = index
+    ingest.side_effect = None
+    ingest.return_value = "shared"
+    (tmp_path / "one.txt").write_text("same")
+    (tmp_path / "two.txt").write_text("same")
+    manifest = tmp_path / "m.json"
+    cli.sync(tmp_path, manifest)
+
+    ingest.return_value = "fresh"
+    _bump(tmp_path / "one.txt", "edited")
+    cli.sync(tmp_path, manifest)
+    version.assert_not_called()               # editing one copy must not rewrite the other's source
+    assert ingest.call_count == 3
+
+    (tmp_path / "two.txt").unlink()
+    cli.sync(tmp_path, manifest)
+    collection.delete.assert_called_once()    # "shared" is no longer referenced
+
+
+def test_unsettled_and_failed_files_are_retried(tmp_path, index):
+    ingest, _, _ = index
+    (tmp_path / "new.txt").write_text("still copying")
+    manifest = tmp_path / "m.json"
+    assert cli.sync(tmp_path, manifest, settle=60)["unsettled"] == 1
+    assert ingest.call_count == 0
+
+    ingest.side_effect = RuntimeError("embedder down")
+    assert cli.sync(tmp_path, manifest)["failed"] == 1
+    assert json.loads(manifest.read_text())["files"] == {}
+
+    ingest.side_effect = None
+    ingest.return_value = "src"
+    assert cli.sync(tmp_path, manifest)["new"] == 1
+
+
+def test_failed_removal_is_retried(tmp_path, index):
+    _, _, collection = index
+    (tmp_path / "gone.txt").write_text("gamma")
+    manifest = tmp_path / "m.json"
+    cli.sync(tmp_path, manifest)
+
+    (tmp_path / "gone.txt").unlink()
+    collection.delete.side_effect = RuntimeError("chroma down")
+    counts = cli.sync(tmp_path, manifest)
+    assert (counts["removed"], counts["failed"]) == (0, 1)
+    assert "gone.txt" in json.loads(manifest.read_text())["files"]
+
+    collection.delete.side_effect = None
+    assert cli.sync(tmp_path, manifest)["removed"] == 1
+    assert json.loads(manifest.read_text())["files"] == {}
+
+
+def test_watch_keeps_going_after_a_failed_pass(tmp_path):
+    passes = [RuntimeError("disk gone"), {"new": 1, "changed": 0, "moved": 0, "removed": 0, "failed": 0}]
+
+    def sync(*args):
+        result = passes.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with (
+        patch("app.cli.sync", side_effect=sync) as mock_sync,
+        patch("app.cli.time.sleep", side_effect=[None, KeyboardInterrupt]),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        cli.watch(tmp_path, tmp_path / "m.json", 1, 1.0, 0.0)
+    assert mock_sync.call_count == 2
+
+
+def test_main_rejects_missing_directory(tmp_path):
+    with pytest.raises(SystemExit):
+        cli.main(["ingest", str(tmp_path / "missing")])
+
+
+def test_moved_file_keeps_its_source(tmp_path, index):
+    ingest, _, collection = index
+    collection.get.side_effect = lambda where, include: {
+        "ids": [f"{where['source_id']}_0"], "metadatas": [{"source_id": where["source_id"], "filename": "a.txt"}],
+    }
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "gone.txt").write_text("gamma")
+    manifest = tmp_path / "m.json"
+    cli.sync(tmp_path, manifest)
+    source_id = json.loads(manifest.read_text())["files"]["a.txt"]["source_id"]
+
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.txt").rename(tmp_path / "sub" / "b.txt")
+    (tmp_path / "gone.txt").unlink()
+    (tmp_path / "c.txt").write_text("new")
+    order = []
+    ingest.side_effect = lambda *a, **k: order.append("ingest") or "src-c"
+    collection.delete.side_effect = lambda **k: order.append("delete")
+    counts = cli.sync(tmp_path, manifest)
+
+    assert (counts["moved"], counts["new"], counts["removed"]) == (1, 1, 1)
+    assert json.loads(manifest.read_text())["files"]["sub/b.txt"]["source_id"] == source_id
+    update = collection.update.call_args[1]
+    assert update["ids"] == [f"{source_id}_0"] and update["metadatas"][0]["filename"] == "b.txt"
+    assert order == ["ingest", "delete"]      # removals run after ingestion
+
+
+def test_local_backend_ingests_with_one_writer(tmp_path):
+    with (
+        patch("app.cli.settings.vector_backend", "local"),
+        patch("app.cli.get_collection"),
+        patch("app.cli.sync", return_value={"failed": 0}) as sync,
+    ):
+        assert cli.main(["ingest", str(tmp_path), "--workers", "4"]) == 0
+    assert sync.call_args[0][2] == 1
+
+
+def test_local_backend_fails_fast_when_index_is_held(tmp_path, capsys):
+    with (
+        patch("app.cli.settings.vector_backend", "local"),
+        patch("app.cli.get_collection", side_effect=RuntimeError("Vector index x is open in another process")),
+        patch("app.cli.sync") as sync,
+    ):
+        assert cli.main(["ingest", str(tmp_path)]) == 2
+    sync.assert_not_called()
+    assert "open in another process" in capsys.readouterr().err
@@ -44,3 +44,43 @@ def test_get_embedder_returns_none_on_import_error():
 
     assert result is None
     emb_mod._embedder_instance = None
+
+
+def test_embed_batch_uses_configured_batch_size():
+    import app.services.embedder as emb_mod
+    emb_mod._embedder_instance = None
+
+    mock_fe = MagicMock()
+    mock_fe.embed.return_value = iter([np.array([0.1] * 384, dtype="float32")])
+
+    with patch("app.services.embedder.TextEmbedding", return_value=mock_fe):
+        embedder = emb_mod._Embedder("test-model", batch_size=8, threads=2)
+
+    mock_fe.embed.return_value = iter([np.array([0.2] * 384, dtype="float64")] * 3)
+    result = embedder.embed_batch(["a", "b", "c"])
+
+    assert len(result) == 3
+    assert all(r.dtype == np.float32 for r in result)
+    mock_fe.embed.assert_called_with(["a", "b", "c"], batch_size=8)
+    assert embedder.embed_batch([]) == []
+
+
+def test_embed_batch_only_runs_cache_misses(tmp_path):
+    import app.services.embedder as emb_mod
+    from app.services.embedding_cache import EmbeddingCache
+
+    mock_fe = MagicMock()
+    mock_fe.embed.return_value = iter([np.array([0.1] * 384, dtype="float32")])
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3", "test-model")
+    cache.put_many(["cached"], [np.full(384, 0.5, dtype="float32")])
+
+    with patch("app.services.embedder.TextEmbedding", return_value=mock_fe):
+        embedder = emb_mod._Embedder("test-model", cache=cache)
+
+    mock_fe.embed.return_value = iter([np.full(384, 0.2, dtype="float32")])
+    result = embedder.embed_batch(["cached", "fresh"])
+
+    mock_fe.embed.assert_called_with(["fresh"], batch_size=64)
+    assert np.allclose(result[0], 0.5) and np.allclose(result[1], 0.2)
+    assert np.allclose(embedder.embed_query("fresh"), 0.2)
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,60 @@
+import sqlite3
+from unittest.mock import patch
+
+import numpy as np
+from app.services.embedding_cache import EmbeddingCache
+
+
+def test_cache_round_trips_vectors_and_counts_hits(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3", "model-a")
+    vec = np.arange(4, dtype="float32")
+
+    assert cache.get_many(["hello world"]) == [None]
+    cache.put_many(["hello world"], [vec])
+    (hit,) = cache.get_many(["hello   world\n"])
+
+    assert np.array_equal(hit, vec) and hit.dtype == np.float32
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+    cache.close()
+
+
+def test_cache_is_keyed_by_model_and_persists(tmp_path):
+    path = tmp_path / "emb.sqlite3"
+    cache = EmbeddingCache(path, "model-a")
+    cache.put_many(["text"], [np.ones(3, dtype="float32")])
+    cache.close()
+
+    assert EmbeddingCache(path, "model-b").get_many(["text"]) == [None]
+    assert EmbeddingCache(path, "model-a").get_many(["text"])[0] is not None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite3", "m", max_entries=10)
+    texts = [f"t{i}" for i in range(10)]
+    cache.put_many(texts, [np.full(2, i, dtype="float32") for i in range(10)])
+    cache.get_many(["t0"])                      # refresh t0 so it survives
+    cache.put_many(["t10"], [np.zeros(2, dtype="float32")])
+
+    assert cache.stats()["entries"] == 9
+    assert cache.get_many(["t0"])[0] is not None
+    assert cache.get_many(["t10"])[0] is not None
+    assert sum(v is None for v in cache.get_many(texts[1:])) == 2
+
+
+
+def test_hits_update_last_used_in_batches(tmp_path):
+    path = tmp_path / "emb.sqlite3"
+    cache = EmbeddingCache(path, "m")
+    with patch("app.services.embedding_cache.time.time", return_value=100.0):
+        cache.put_many(["a"], [np.ones(2, dtype="float32")])
+    with patch("app.services.embedding_cache.time.time", return_value=200.0):
+        for _ in range(5):
+            assert cache.get_many(["a"])[0] is not None
+
+    def last_used():
+        with sqlite3.connect(str(path)) as conn:
+            return conn.execute("SELECT last_used FROM embeddings").fetchone()[0]
+
+    assert last_used() == 100.0   # hits are buffered, not committed one by one
+    cache.close()
+    assert last_used() == 200.0
@@ -0,0 +1,33 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from app.core import executors
+
+
+def test_concurrent_callers_share_one_pool():
+    created = []
+
+    def slow_pool(**kwargs):
+        time.sleep(0.05)
+        pool = MagicMock()
+        created.append(pool)
+        return pool
+
+    with patch("app.core.executors.ProcessPoolExecutor", side_effect=slow_pool):
+        got = []
+        threads = [threading.Thread(target=lambda: got.append(executors.get_process_pool("t", 2))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        executors.shutdown_process_pools()
+
+    assert len(created) == 1 and all(p is created[0] for p in got)
+    created[0].shutdown.assert_called_once()
+
+
+async def test_run_cpu_bound_uses_a_pool_only_above_one_worker():
+    with patch("app.core.executors.get_process_pool") as mock_pool:
+        assert await executors.run_cpu_bound("t", 1, sum, [1, 2]) == 3
+    mock_pool.assert_not_called()
@@ -0,0 +1,72 @@
+import time
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services.fetch_cache import FetchCache, fetch_extracted
+
+
+def _response(status: int, text: str = "", headers: dict | None = None) -> httpx.Response:
+    return httpx.Response(status, text=text, headers=headers or {}, request=httpx.Request("GET", "https://x"))
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = FetchCache(tmp_path / "fetch.db", ttl_seconds=60, max_bytes=1 << 20)
+    cache.put("k", {"content": "hello"}, etag='"v1"')
+    assert cache.get("k").payload == {"content": "hello"}
+    assert cache.get("k").conditional_headers() == {"If-None-Match": '"v1"'}
+
+    with patch("app.services.fetch_cache.time.time", return_value=time.time() + 120):
+        assert cache.get("k") is None
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = FetchCache(tmp_path / "fetch.db", ttl_seconds=3600, max_bytes=1000)
+    for i in range(10):
+        cache.put(f"k{i}", {"content": "x" * 150})
+    stats = cache.stats()
+    assert stats["bytes"] <= 1000
+    assert cache.get("k9") is not None
+    assert cache.get("k0") is None
+
+
+@pytest.mark.asyncio
+async def test_not_modified_reuses_cached_extraction(tmp_path):
+    cache = FetchCache(tmp_path / "fetch.db", ttl_seconds=3600, max_bytes=1 << 20)
+    extract = AsyncMock(return_value={"content": "parsed", "title": "T"})
+    fetch = AsyncMock(side_effect=[
+        _response(200, "<html>page</html>", {"etag": '"abc"', "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        _response(304),
+    ])
+
+    with (
+        patch("app.services.fetch_cache.get_fetch_cache", return_value=cache),
+        patch("app.services.fetch_cache.fetch", new=fetch),
+    ):
+        first = await fetch_extracted("https://example.com/a", extract)
+        second = await fetch_extracted("https://example.com/a", extract)
+
+    assert first == second == {"content": "parsed", "title": "T"}
+    extract.assert_awaited_once_with("<html>page</html>")
+    assert fetch.call_args_list[0][1]["headers"] == {}
+    assert fetch.call_args_list[1][1]["headers"] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert cache.stats()["not_modified"] == 1
+
+
+async def test_transcript_is_served_from_cache(tmp_path):
+    from app.services.ingestion.youtube import _load_transcript
+    cache = FetchCache(tmp_path / "fetch.db", ttl_seconds=3600, max_bytes=1 << 20)
+    segments = [{"text": "hi", "start": 0.0, "duration": 1.0}]
+
+    with (
+        patch("app.services.ingestion.youtube.get_fetch_cache", return_value=cache),
+        patch("app.services.ingestion.youtube._fetch_transcript", return_value=segments) as mock_fetch,
+    ):
+        assert await _load_transcript("vid") == segments
+        assert await _load_transcript("vid") == segments
+
+    mock_fetch.assert_called_once_with("vid")
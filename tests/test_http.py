@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+from app.core import http
+
+
+def _mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def test_client_is_shared_until_closed():
+    first = http.get_http_client()
+    assert http.get_http_client() is first
+    await http.close_http_client()
+    assert first.is_closed
+    assert http.get_http_client() is not first
+    await http.close_http_client()
+
+
+async def test_fetch_limits_concurrency_per_host():
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200, text="ok")
+
+    with (
+        patch("app.core.http._build_client", return_value=_mock_client(handler)),
+        patch("app.core.http.settings.http_per_host_connections", 2),
+    ):
+        await http.close_http_client()
+        urls = [f"https://a.example/{i}" for i in range(6)] + [f"https://b.example/{i}" for i in range(3)]
+        responses = await asyncio.gather(*(http.fetch(u) for u in urls))
+        await http.close_http_client()
+
+    assert all(r.text == "ok" for r in responses)
+    assert peak == {"a.example": 2, "b.example": 2}
+
+
+async def test_fetch_raises_for_error_status():
+    with patch("app.core.http._build_client", return_value=_mock_client(lambda r: httpx.Response(404))):
+        await http.close_http_client()
+        with pytest.raises(httpx.HTTPStatusError):
+            await http.fetch("https://a.example/missing")
+        await http.close_http_client()
@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock, patch
+
+from app.services.ingestion.boilerplate import BoilerplateModel
+from app.services.ingestion.web_parse import block_hash, chunk_stripped, strip_blocks
+
+NAV = "Home | Docs | Blog | Pricing"
+COOKIES = "We use cookies to improve your experience. Accept all?"
+
+
+def _page(i: int) -> str:
+    return f"{NAV}\nArticle {i} explains topic {i} in depth.\nMore detail about topic {i}.\n{COOKIES}"
+
+
+def test_model_flags_blocks_recurring_across_a_domain():
+    model = BoilerplateModel(":memory:", min_pages=3, min_ratio=0.5)
+    assert model.observe("docs.example", "https://docs.example/1", _page(1)) == frozenset()
+    model.observe("docs.example", "https://docs.example/2", _page(2))
+    # Re-ingesting a page does not count it twice.
+    model.observe("docs.example", "https://docs.example/2", _page(2))
+    assert model.observe("docs.example", "https://docs.example/2", _page(2)) == frozenset()
+
+    found = model.observe("docs.example", "https://docs.example/3", _page(3))
+    assert found == {block_hash(NAV), block_hash(COOKIES)}
+    # Counts are per domain.
+    assert model.observe("other.example", "https://other.example/1", _page(1)) == frozenset()
+    assert model.stats()["pages"] == 4
+
+
+def test_block_ratio_threshold_scales_with_domain_size():
+    model = BoilerplateModel(":memory:", min_pages=2, min_ratio=0.5)
+    for i in range(2):
+        model.observe("d", f"https://d/{i}", f"Promo banner\nBody {i}")
+    for i in range(2, 6):
+        model.observe("d", f"https://d/{i}", f"Body {i}")
+    # The banner is on 3 of 7 pages: below half, so not boilerplate.
+    assert model.observe("d", "https://d/6", "Promo banner\nBody 6") == frozenset()
+
+
+def test_strip_blocks_and_chunk_savings():
+    boilerplate = frozenset({block_hash(NAV), block_hash(COOKIES)})
+    text, removed = strip_blocks(_page(1), boilerplate)
+    assert removed == 2 and NAV not in text and "Article 1" in text
+
+    long_nav = "\n".join(f"Menu entry {i} " * 20 for i in range(20))
+    page = {"content": f"{long_nav}\nThe actual article body.", "title": "T"}
+    nav_hashes = frozenset(block_hash(line) for line in long_nav.split("\n"))
+    records, blocks, unstripped = chunk_stripped("https://d/1", page, "now", nav_hashes)
+    assert blocks == 20
+    assert [r["text"] for r in records] == ["The actual article body."]
+    assert len(unstripped) == 4
+
+
+def test_page_made_only_of_boilerplate_is_kept():
+    records, blocks, unstripped = chunk_stripped(
+        "https://d/1", {"content": NAV, "title": "T"}, "now", frozenset({block_hash(NAV)})
+    )
+    assert [r["text"] for r in records] == [NAV] and blocks == 0 and unstripped == [NAV]
+
+
+async def _savings(pages: list[str], stored: list[str] = ()) -> dict:
+    from app.services.ingestion.web import _chunk_records
+
+    model = BoilerplateModel(":memory:", min_pages=2, min_ratio=0.5)
+    collection = MagicMock()
+    collection.get.return_value = {"metadatas": [{"chunk_hash": h} for h in stored]}
+    stages = {}
+    with (
+        patch("app.services.ingestion.web.get_boilerplate_model", return_value=model),
+        patch("app.services.ingestion.web.get_collection", return_value=collection),
+        patch("app.services.ingestion.web.settings.web_parse_workers", 0),
+    ):
+        for i, content in enumerate(pages):
+            stages["records"] = await _chunk_records(
+                f"https://d.example/{i}", {"content": content, "title": "T"}, "now",
+                progress=lambda stage, n: stages.__setitem__(stage, n),
+            )
+    return {**stages, **model.stats()}
+
+
+async def test_chunk_records_reports_savings():
+    from app.services.ingestion.dedup import chunk_hash
+    from app.services.ingestion.web_parse import _splitter
+
+    long_nav = "\n".join(f"Menu entry {i} " * 20 for i in range(20))
+    pages = [f"{long_nav}\nFirst body.", f"{long_nav}\nSecond body."]
+    result = await _savings(pages)
+    assert [r["text"] for r in result["records"]] == ["Second body."]
+    assert result["boilerplate_chunks_saved"] == 3
+    assert result["boilerplate_embeddings_saved"] == 3
+    assert result["blocks_stripped"] == 20 and result["chunks_saved"] == 3
+
+    # A nav chunk already stored would not have been embedded again anyway.
+    nav_chunk = _splitter.split_text(pages[1])[0]
+    result = await _savings(pages, stored=[chunk_hash(nav_chunk)])
+    assert result["boilerplate_chunks_saved"] == 3
+    assert result["boilerplate_embeddings_saved"] == 2
+
+
+async def test_stripping_that_leaves_the_chunk_count_alone_saves_nothing():
+    nav = "Home | Docs | Blog"
+    result = await _savings([f"{nav}\nFirst article body.", f"{nav}\nShort article body."])
+    assert [r["text"] for r in result["records"]] == ["Short article body."]
+    assert result["boilerplate_chunks_saved"] == 0
+    assert result["boilerplate_embeddings_saved"] == 0
+    assert result["blocks_stripped"] == 1
@@ -0,0 +1,127 @@
+import io
+import zipfile
+
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def _collections():
+    cols = {}
+
+    def get(name):
+        if name not in cols:
+            col = MagicMock()
+            col.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
+            cols[name] = col
+        return cols[name]
+
+    return cols, get
+
+
+def _embedder():
+    embedder = MagicMock()
+    embedder.embed_batch.side_effect = lambda texts: [np.ones(4, dtype="float32") for _ in texts]
+    embedder.embed_late.side_effect = lambda doc, chunks, starts: [np.ones(4, dtype="float32") for _ in chunks]
+    return embedder
+
+
+async def test_bulk_urls_share_batches_and_report_per_item():
+    cols, get = _collections()
+    embedder = _embedder()
+    pages = {
+        "https://a.example/1": {"content": "Alpha page text.", "title": "A"},
+        "https://b.example/2": {"content": "Beta page text.", "title": "B"},
+        "https://c.example/3": {"content": "Alpha page text.", "title": "A copy"},
+    }
+
+    async def scrape(url):
+        if url not in pages:
+            raise ValueError("HTTP 404")
+        return pages[url]
+
+    with (
+        patch("app.services.ingestion.bulk.get_collection", side_effect=get),
+        patch("app.services.ingestion.bulk.get_embedder", return_value=embedder),
+        patch("app.services.ingestion.web._scrape", side_effect=scrape),
+        patch("app.services.ingestion.youtube._get_video_metadata", new_callable=AsyncMock,
+              return_value={"title": "Talk", "channel": "Ch", "video_id": "vid1"}),
+        patch("app.services.ingestion.youtube._fetch_transcript",
+              return_value=[{"text": "hello there", "start": 0.0, "duration": 5.0}]),
+    ):
+        from app.services.ingestion.bulk import ingest_bulk_urls
+        results = await ingest_bulk_urls([*pages, "https://youtu.be/vid1", "https://missing.example/"])
+
+    assert [r["item"] for r in results] == [*pages, "https://youtu.be/vid1", "https://missing.example/"]
+    by_item = {r["item"]: r for r in results}
+    first, copy = by_item["https://a.example/1"], by_item["https://c.example/3"]
+    assert {first["status"], copy["status"]} == {"ingested", "duplicate"}
+    assert first["source_id"] == copy["source_id"]
+    assert by_item["https://b.example/2"]["status"] == "ingested"
+    assert by_item["https://youtu.be/vid1"]["kind"] == "youtube"
+    assert by_item["https://youtu.be/vid1"]["chunks"] == 1
+    assert by_item["https://missing.example/"] == {
+        "item": "https://missing.example/", "kind": "web", "status": "failed",
+        "source_id": None, "chunks": 0, "error": "HTTP 404",
+    }
+
+    # Both new pages are written by a single coalesced add.
+    cols["web_chunks"].add.assert_called_once()
+    metas = cols["web_chunks"].add.call_args[1]["metadatas"]
+    assert len(metas) == 2 and "B" in {m["title"] for m in metas}
+    assert embedder.embed_batch.call_count == 2   # one call per collection in the batch
+    cols["youtube_chunks"].add.assert_called_once()
+
+
+async def test_bulk_zip_ingests_supported_members():
+    cols, get = _collections()
+    embedder = _embedder()
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("docs/intro.txt", "Intro paragraph.\n\nMore intro.")
+        zf.writestr("docs/notes.md", "Some notes.")
+        zf.writestr("docs/again.txt", "Intro paragraph.\n\nMore intro.")
+        zf.writestr("docs/logo.png", b"\x89PNG")
+        zf.writestr("__MACOSX/._intro.txt", "junk")
+
+    with (
+        patch("app.services.ingestion.bulk.get_collection", side_effect=get),
+        patch("app.services.ingestion.bulk.get_embedder", return_value=embedder),
+    ):
+        from app.services.ingestion.bulk import ingest_bulk_zip
+        results = await ingest_bulk_zip(buf.getvalue())
+
+    assert [(r["item"], r["status"]) for r in results] == [
+        ("docs/intro.txt", "ingested"),
+        ("docs/notes.md", "ingested"),
+        ("docs/again.txt", "duplicate"),
+        ("docs/logo.png", "failed"),
+    ]
+    assert results[2]["source_id"] == results[0]["source_id"]
+    cols["pdf_chunks"].add.assert_called_once()
+    add = cols["pdf_chunks"].add.call_args[1]
+    assert {m["filename"] for m in add["metadatas"]} == {"intro.txt", "notes.md"}
+    assert [m["chunk_index"] for m in add["metadatas"] if m["filename"] == "notes.md"] == [0]
+    assert add["ids"][0] == f"{results[0]['source_id']}_0"
+
+
+async def test_bulk_zip_failure_rolls_back_partial_documents():
+    cols, get = _collections()
+    cols_add = get("pdf_chunks")
+    cols_add.add.side_effect = [None, RuntimeError("chroma down")]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("a.txt", "First document.")
+        zf.writestr("b.txt", "Second document.")
+
+    with (
+        patch("app.services.ingestion.bulk.get_collection", side_effect=get),
+        patch("app.services.ingestion.bulk.get_embedder", return_value=_embedder()),
+        patch("app.services.ingestion.bulk.settings.ingest_batch_size", 1),
+    ):
+        from app.services.ingestion.bulk import ingest_bulk_zip
+        with pytest.raises(RuntimeError, match="chroma down"):
+            await ingest_bulk_zip(buf.getvalue())
+
+    source_id = cols_add.add.call_args_list[0][1]["metadatas"][0]["source_id"]
+    cols_add.delete.assert_called_once_with(where={"source_id": source_id})
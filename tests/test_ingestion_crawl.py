@@ -0,0 +1,205 @@
+import gzip
+import re
+
+import httpx
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from unittest.mock import MagicMock, patch
+
+from app.core.database import Base
+from app.models.crawl import PageState
+from app.services.ingestion import crawl
+
+SITE = {
+    "/robots.txt": "User-agent: *\nDisallow: /private/\n",
+    "/": '<title>Home</title><p>Welcome home.</p><a href="/a">A</a><a href="/private/x">X</a>'
+         '<a href="https://other.example/">off-site</a><a href="/file.pdf">pdf</a>',
+    "/a": '<title>A</title><p>Page A text.</p><a href="/b#top">B</a><a href="/a-copy">copy</a>',
+    "/a-copy": '<link rel="canonical" href="https://site.example/a"><p>Page A text.</p>',
+    "/b": '<title>B</title><p>Page B text.</p><a href="/c">C</a>',
+    "/c": "<p>Page C text.</p>",
+}
+
+
+@pytest.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'crawl.db'}")
+    import app.models.crawl  # noqa
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _site(requested: list[str]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.path)
+        if request.url.host != "site.example" or request.url.path not in SITE:
+            return httpx.Response(404)
+        return httpx.Response(200, text=SITE[request.url.path])
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _extract(html, **kwargs):
+    match = re.search(r"<p>(.*?)</p>", html)
+    return match.group(1) if match else None
+
+
+@pytest.fixture
+def env():
+    cols = {}
+
+    def get(name):
+        if name not in cols:
+            col = MagicMock()
+            col.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
+            cols[name] = col
+        return cols[name]
+
+    embedder = MagicMock()
+    embedder.embed_batch.side_effect = lambda texts: [np.ones(4, dtype="float32") for _ in texts]
+    requested: list[str] = []
+    with (
+        patch("app.core.http._build_client", side_effect=lambda: _site(requested)),
+        patch("app.services.ingestion.bulk.get_collection", side_effect=get),
+        patch("app.services.ingestion.bulk.get_embedder", return_value=embedder),
+        patch("app.services.ingestion.web_parse.trafilatura.extract", side_effect=_extract),
+        patch("app.services.ingestion.crawl.settings.web_parse_workers", 0),
+    ):
+        yield cols, requested
+
+
+async def _crawl(sessions, url="https://site.example/", **options):
+    options = crawl.CrawlOptions(delay_seconds=0, **options)
+    crawl_id = await crawl.create_crawl(url, options, session_factory=sessions)
+    result = await crawl.run_crawl(crawl_id, session_factory=sessions)
+    return crawl_id, result
+
+
+async def _states(sessions, crawl_id):
+    pages = await crawl._CrawlStore(crawl_id, sessions).pages()
+    return {p.url.removeprefix("https://site.example"): p.state for p in pages}
+
+
+def test_normalize_url():
+    assert crawl.normalize_url("HTTPS://Site.Example:443/a?q=1#frag") == "https://site.example/a?q=1"
+    assert crawl.normalize_url("http://site.example") == "http://site.example/"
+    assert crawl.normalize_url("http://site.example:8080/x") == "http://site.example:8080/x"
+    assert crawl.normalize_url("mailto:someone@site.example") is None
+
+
+async def test_crawl_follows_links_within_scope(sessions, env):
+    cols, requested = env
+    crawl_id, result = await _crawl(sessions)
+
+    states = await _states(sessions, crawl_id)
+    assert states == {
+        "/": PageState.ingested,
+        "/a": PageState.ingested,
+        "/a-copy": PageState.duplicate,
+        "/b": PageState.ingested,
+        "/c": PageState.ingested,
+        "/private/x": PageState.skipped,
+    }
+    assert result["pages"] == {"ingested": 4, "duplicate": 1, "skipped": 1}
+    assert "/private/x" not in requested and "/file.pdf" not in requested
+    urls = {m["url"] for call in cols["web_chunks"].add.call_args_list for m in call[1]["metadatas"]}
+    assert urls == {f"https://site.example{p}" for p in ("/", "/a", "/b", "/c")}
+
+    summary = await crawl.crawl_summary(crawl_id, session_factory=sessions)
+    assert summary["status"] == "completed"
+    assert summary["pages"]["ingested"] == 4
+
+
+async def test_crawl_respects_depth_and_page_limits(sessions, env):
+    crawl_id, _ = await _crawl(sessions, max_depth=1)
+    assert set(await _states(sessions, crawl_id)) == {"/", "/a", "/private/x"}
+
+    crawl_id, _ = await _crawl(sessions, max_pages=2)
+    assert len(await _states(sessions, crawl_id)) == 2
+
+
+async def test_crawl_without_robots_fetches_everything(sessions, env):
+    _, requested = env
+    crawl_id, _ = await _crawl(sessions, respect_robots=False)
+    assert "/private/x" in requested
+    assert (await _states(sessions, crawl_id))["/private/x"] == PageState.failed   # 404
+
+
+async def test_sitemap_seeds_frontier(sessions, env):
+    urlset = (
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<url><loc>https://site.example/b</loc></url><url><loc>https://site.example/c</loc></url>"
+        "</urlset>"
+    )
+    index = (
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<sitemap><loc>https://site.example/pages.xml.gz</loc></sitemap>"
+        "<sitemap><loc>https://site.example/private/more.xml</loc></sitemap></sitemapindex>"
+    )
+    site = {**SITE, "/sitemap.xml": index, "/pages.xml.gz": None, "/private/more.xml": urlset}
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        if request.url.path == "/pages.xml.gz":
+            return httpx.Response(200, content=gzip.compress(urlset.encode()))
+        return httpx.Response(200, text=site[request.url.path]) if request.url.path in site else httpx.Response(404)
+
+    with patch("app.core.http._build_client", side_effect=lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))):
+        crawl_id, _ = await _crawl(sessions, url="https://site.example/sitemap.xml", max_depth=0)
+
+    assert await _states(sessions, crawl_id) == {"/b": PageState.ingested, "/c": PageState.ingested}
+    assert requested[0] == "/robots.txt" and "/private/more.xml" not in requested
+
+
+async def test_resume_continues_queued_pages(sessions, env):
+    options = crawl.CrawlOptions(delay_seconds=0)
+    crawl_id = await crawl.create_crawl("https://site.example/", options, session_factory=sessions)
+    store = crawl._CrawlStore(crawl_id, sessions)
+    # State left behind by a crawl interrupted after the home page.
+    await store.add_pages([("https://site.example/", 0), ("https://site.example/b", 2)])
+    await store.mark("https://site.example/", PageState.ingested, source_id="s1")
+
+    _, requested = env
+    result = await crawl.run_crawl(crawl_id, session_factory=sessions)
+
+    assert "/" not in requested
+    assert await _states(sessions, crawl_id) == {
+        "/": PageState.ingested, "/b": PageState.ingested, "/c": PageState.ingested,
+    }
+    assert result["pages"]["ingested"] == 3
+
+
+async def test_crawl_obeys_rules_for_its_own_agent(sessions, env, monkeypatch):
+    monkeypatch.setitem(SITE, "/robots.txt", "User-agent: DocChatBot\nDisallow: /b\n\nUser-agent: *\nDisallow:\n")
+    crawl_id, _ = await _crawl(sessions)
+    states = await _states(sessions, crawl_id)
+    assert states["/b"] == PageState.skipped and states["/private/x"] == PageState.failed
+
+
+async def test_failed_write_removes_partly_stored_page(sessions, env, monkeypatch):
+    monkeypatch.setitem(SITE, "/", "<p>" + "Long home page sentence. " * 120 + "</p>")
+    cols, _ = env
+    web_chunks = MagicMock()
+    web_chunks.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
+    web_chunks.add.side_effect = [None, RuntimeError("chroma down")]
+    cols["web_chunks"] = web_chunks
+
+    with patch("app.services.ingestion.bulk.settings.ingest_batch_size", 1):
+        with pytest.raises(RuntimeError, match="chroma down"):
+            await _crawl(sessions)
+
+    source_id = web_chunks.add.call_args_list[0][1]["metadatas"][0]["source_id"]
+    web_chunks.delete.assert_called_once_with(where={"source_id": source_id})
+
+
+async def test_fetched_progress_counts_fetches(sessions, env):
+    crawl_id = await crawl.create_crawl("https://site.example/", crawl.CrawlOptions(delay_seconds=0), session_factory=sessions)
+    fetched = []
+    await crawl.run_crawl(
+        crawl_id, progress=lambda stage, n: stage == "fetched" and fetched.append(n), session_factory=sessions
+    )
+    assert fetched == [1, 2, 3, 4, 5]   # /, /a, /a-copy, /b, /c; /private/x is never fetched
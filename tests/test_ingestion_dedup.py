@@ -0,0 +1,84 @@
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.ingestion.dedup import chunk_hash, embed_with_reuse, find_source, hash_file
+
+
+def test_chunk_hash_ignores_whitespace_differences():
+    assert chunk_hash("Hello   world\n") == chunk_hash("Hello world")
+    assert chunk_hash("Hello world") != chunk_hash("Hello there")
+
+
+def test_hash_file_matches_bytes(tmp_path):
+    import hashlib
+    path = tmp_path / "doc.bin"
+    path.write_bytes(b"x" * 3_000_000)
+    assert hash_file(path) == hashlib.sha256(b"x" * 3_000_000).hexdigest()
+
+
+def test_find_source_returns_existing_source_id():
+    collection = MagicMock()
+    collection.get.return_value = {"ids": ["s1_0"], "metadatas": [{"source_id": "s1"}]}
+    assert find_source(collection, "abc") == "s1"
+    assert collection.get.call_args[1]["where"] == {"content_hash": "abc"}
+
+    collection.get.return_value = {"ids": [], "metadatas": []}
+    assert find_source(collection, "abc") is None
+
+
+def test_embed_with_reuse_only_embeds_unseen_chunks():
+    stored = chunk_hash("already stored")
+    collection = MagicMock()
+    collection.get.return_value = {
+        "metadatas": [{"chunk_hash": stored}],
+        "embeddings": np.array([[0.5, 0.5]]),
+    }
+    embedded: list[list[int]] = []
+
+    def embed_missing(todo):
+        embedded.append(todo)
+        return [np.array([float(i), 0.0], dtype="float32") for i in todo]
+
+    texts = ["new one", "already stored", "new one", "new two"]
+    vectors, hashes = embed_with_reuse(collection, texts, embed_missing)
+
+    assert embedded == [[0, 3]]
+    assert hashes == [chunk_hash(t) for t in texts]
+    assert np.allclose(vectors[1], [0.5, 0.5])
+    assert vectors[0] is vectors[2]
+
+
+@pytest.mark.asyncio
+async def test_ingest_web_returns_existing_source_for_duplicate_content():
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": ["old_0"], "metadatas": [{"source_id": "old-source"}]}
+    mock_embedder = MagicMock()
+
+    with (
+        patch("app.services.ingestion.web.get_collection", return_value=mock_collection),
+        patch("app.services.ingestion.web.get_embedder", return_value=mock_embedder),
+        patch("app.services.ingestion.web._scrape", new_callable=AsyncMock, return_value={"content": "Same text.", "title": "T"}),
+    ):
+        from app.services.ingestion.web import ingest_web
+        source_id = await ingest_web("https://example.com/again")
+
+    assert source_id == "old-source"
+    mock_collection.add.assert_not_called()
+    mock_embedder.embed_batch.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ingest_youtube_duplicate_skips_transcript_fetch():
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": ["old_0"], "metadatas": [{"source_id": "old-video"}]}
+
+    with (
+        patch("app.services.ingestion.youtube.get_collection", return_value=mock_collection),
+        patch("app.services.ingestion.youtube._fetch_transcript") as mock_fetch,
+    ):
+        from app.services.ingestion.youtube import ingest_youtube
+        source_id = await ingest_youtube("https://youtu.be/abc123")
+
+    assert source_id == "old-video"
+    mock_fetch.assert_not_called()
+    mock_collection.add.assert_not_called()
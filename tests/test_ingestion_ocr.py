@@ -0,0 +1,87 @@
+from unittest.mock import MagicMock, patch
+
+
+def _make_scanned_pdf(path, pages: int = 2, text_page: int | None = None):
+    import fitz
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        if n == text_page:
+            page.insert_text((50, 50), "Real text layer", fontsize=11)
+        else:
+            # Vector drawing only: renders to pixels but has no text layer.
+            page.draw_rect(fitz.Rect(50 + n * 10, 50, 300, 120), color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+    doc.save(str(path))
+    doc.close()
+
+
+def test_choose_dpi_adapts_to_page_size():
+    from app.services.ingestion.ocr import OCR_MAX_DPI, OCR_MIN_DPI, _choose_dpi
+
+    def page(w, h):
+        p = MagicMock()
+        p.rect.width, p.rect.height = w, h
+        return p
+
+    assert _choose_dpi(page(595, 842)) == 205          # A4
+    assert _choose_dpi(page(200, 300)) == OCR_MAX_DPI  # small receipt → upscale
+    assert _choose_dpi(page(2384, 3370)) == OCR_MIN_DPI  # A0 poster
+
+
+def test_ocr_pages_caches_text_by_page_image(tmp_path):
+    from app.services.ingestion.ocr import ocr_pages
+    pdf = tmp_path / "scan.pdf"
+    _make_scanned_pdf(pdf)
+
+    with (
+        patch("app.services.ingestion.ocr.settings.ocr_cache_dir", str(tmp_path / "cache")),
+        patch("app.services.ingestion.ocr.settings.ocr_workers", 0),
+        patch("pytesseract.image_to_string", return_value="recognised words") as mock_ocr,
+    ):
+        first = ocr_pages(pdf, [1, 2])
+        second = ocr_pages(pdf, [1, 2])
+
+    assert first == second == {1: "recognised words", 2: "recognised words"}
+    assert mock_ocr.call_count == 2
+    assert mock_ocr.call_args[0][0].mode == "L"
+    assert len(list((tmp_path / "cache").rglob("*.txt"))) == 2
+
+
+def test_pdf_extraction_fills_scanned_pages_in_order(tmp_path):
+    from app.services.ingestion.pdf import _iter_pdf_segments
+    pdf = tmp_path / "mixed.pdf"
+    _make_scanned_pdf(pdf, pages=3, text_page=1)
+
+    with (
+        patch("app.services.ingestion.pdf.ocr_pages",
+              side_effect=lambda path, pages: {p: f"ocr page {p}" for p in pages}) as mock_ocr,
+    ):
+        segments = list(_iter_pdf_segments(pdf))
+
+    mock_ocr.assert_called_once_with(pdf, [1, 3])
+    assert [s.page_number for s in segments] == [1, 2, 3]
+    assert segments[0].text == "ocr page 1"
+    assert segments[1].text.startswith("Real text layer")
+
+
+def test_in_memory_pdf_is_spilled_once_for_the_pool(tmp_path):
+    from pathlib import Path
+    from app.services.ingestion.ocr import ocr_pages
+
+    seen = []
+
+    def fake_map(fn, paths, pages, dirs, langs):
+        paths = list(paths)
+        seen.extend(paths)
+        assert all(isinstance(p, str) and Path(p).read_bytes() == b"%PDF-bytes" for p in paths)
+        return ["text"] * len(paths)
+
+    pool = MagicMock()
+    pool.map.side_effect = fake_map
+    with (
+        patch("app.services.ingestion.ocr.settings.ocr_workers", 2),
+        patch("app.services.ingestion.ocr.get_process_pool", return_value=pool),
+    ):
+        assert ocr_pages(b"%PDF-bytes", [1, 2, 3]) == {1: "text", 2: "text", 3: "text"}
+
+    assert len(set(seen)) == 1 and not Path(seen[0]).exists()
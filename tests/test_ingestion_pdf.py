@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import numpy as np
 from unittest.mock import MagicMock, patch
@@ -14,19 +15,18 @@ class FakeSegment:
 @pytest.mark.asyncio
 async def test_ingest_pdf_stores_chunks_in_chromadb():
     mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
     mock_embedder = MagicMock()
     mock_embedder.embed_late.return_value = [np.array([0.1] * 384, dtype="float32")]
     mock_embedder.embed_independently.return_value = [np.array([0.1] * 384, dtype="float32")]
 
     fake_segments = [FakeSegment(text="Sample text", page_number=1, section_heading="Intro")]
-    fake_chunks = [{"text": "Sample text", "page_number": 1, "section_heading": "Intro",
-                    "seg_idx": 0, "char_start": 0}]
 
     with (
         patch("app.services.ingestion.pdf.get_collection", return_value=mock_collection),
         patch("app.services.ingestion.pdf.get_embedder", return_value=mock_embedder),
-        patch("app.services.ingestion.pdf._extract_segments", return_value=fake_segments),
-        patch("app.services.ingestion.pdf._chunk_segments", return_value=fake_chunks),
+        patch("app.services.ingestion.pdf.hash_file", return_value="f" * 64),
+        patch("app.services.ingestion.pdf._iter_segments", return_value=iter(fake_segments)),
         patch("app.services.ingestion.pdf._embed_chunks_late",
               return_value=[np.array([0.1] * 384, dtype="float32")]),
     ):
@@ -40,3 +40,312 @@ async def test_ingest_pdf_stores_chunks_in_chromadb():
     assert call_kwargs["documents"] == ["Sample text"]
     assert call_kwargs["metadatas"][0]["filename"] == "test.pdf"
     assert call_kwargs["metadatas"][0]["source_id"] == source_id
+
+
+@pytest.mark.asyncio
+async def test_ingest_pdf_streams_in_fixed_size_batches():
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
+    mock_embedder = MagicMock()
+    mock_embedder.embed_late.side_effect = lambda seg, texts, starts: [
+        np.array([0.1] * 384, dtype="float32") for _ in texts
+    ]
+    segments = (FakeSegment(text=f"Page {n} text", page_number=n) for n in range(1, 8))
+    events: list[tuple[str, int]] = []
+
+    with (
+        patch("app.services.ingestion.pdf.get_collection", return_value=mock_collection),
+        patch("app.services.ingestion.pdf.get_embedder", return_value=mock_embedder),
+        patch("app.services.ingestion.pdf.hash_file", return_value="f" * 64),
+        patch("app.services.ingestion.pdf._iter_segments", return_value=segments),
+        patch("app.services.ingestion.pdf.settings.ingest_batch_size", 3),
+    ):
+        from app.services.ingestion.pdf import ingest_pdf
+        source_id = await ingest_pdf(
+            "/fake/path.pdf", "big.pdf", "application/pdf",
+            progress=lambda stage, n: events.append((stage, n)),
+        )
+
+    batches = [c[1]["ids"] for c in mock_collection.add.call_args_list]
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert [i for b in batches for i in b] == [f"{source_id}_{i}" for i in range(7)]
+    assert ("extract", 7) in events
+    assert ("write", 7) in events
+
+
+
+async def test_failed_ingest_deletes_chunks_already_written():
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
+    mock_collection.add.side_effect = [None, RuntimeError("chroma down")]
+    mock_embedder = MagicMock()
+    mock_embedder.embed_late.side_effect = lambda seg, texts, starts: [
+        np.array([0.1] * 384, dtype="float32") for _ in texts
+    ]
+    segments = (FakeSegment(text=f"Page {n} text", page_number=n) for n in range(1, 8))
+
+    with (
+        patch("app.services.ingestion.pdf.get_collection", return_value=mock_collection),
+        patch("app.services.ingestion.pdf.get_embedder", return_value=mock_embedder),
+        patch("app.services.ingestion.pdf._iter_segments", return_value=segments),
+        patch("app.services.ingestion.pdf.settings.ingest_batch_size", 3),
+    ):
+        from app.services.ingestion.pdf import ingest_pdf
+        with pytest.raises(RuntimeError, match="chroma down"):
+            await ingest_pdf(b"%PDF", "big.pdf", "application/pdf")
+
+    source_id = mock_collection.add.call_args_list[0][1]["metadatas"][0]["source_id"]
+    mock_collection.delete.assert_called_once_with(where={"source_id": source_id})
+
+
+def test_iter_text_segments_splits_on_paragraph_breaks(tmp_path):
+    from app.services.ingestion.pdf import _iter_text_segments
+    path = tmp_path / "big.txt"
+    paragraphs = [f"Paragraph {i} " + "word " * 20 for i in range(50)]
+    path.write_text("\n\n".join(paragraphs))
+
+    segments = list(_iter_text_segments(path, block_chars=500))
+
+    assert len(segments) > 1
+    assert all(len(s.text) <= 1000 for s in segments)
+    assert "".join(s.text for s in segments) == path.read_text()
+
+
+def _make_pdf(path, pages: int):
+    import fitz
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Chapter {n}", fontsize=18)
+        page.insert_text((50, 100), f"Body text for page {n}.", fontsize=11)
+    doc.save(str(path))
+    doc.close()
+
+
+def test_parallel_pdf_extraction_preserves_page_order(tmp_path):
+    from app.core.executors import shutdown_process_pools
+    from app.services.ingestion.pdf import _iter_pdf_segments
+    path = tmp_path / "manual.pdf"
+    _make_pdf(path, 9)
+
+    with patch("app.services.ingestion.pdf.settings.pdf_extract_workers", 0):
+        sequential = list(_iter_pdf_segments(path))
+    with (
+        patch("app.services.ingestion.pdf.settings.pdf_extract_workers", 2),
+        patch("app.services.ingestion.pdf.settings.pdf_pages_per_task", 2),
+    ):
+        try:
+            parallel = list(_iter_pdf_segments(path))
+        finally:
+            shutdown_process_pools()
+
+    assert [s.page_number for s in parallel] == list(range(1, 10))
+    assert parallel == sequential
+    assert parallel[3].section_heading == "Chapter 3"
+
+
+def test_parse_page_layout_matches_plain_text_in_one_pass(tmp_path):
+    import fitz
+    from app.services.ingestion.pdf import _parse_page_layout
+    path = tmp_path / "layout.pdf"
+    _make_pdf(path, 1)
+
+    doc = fitz.open(str(path))
+    page = doc[0]
+    layout = _parse_page_layout(page)
+
+    assert layout.text == page.get_text()
+    assert layout.heading == "Chapter 0"
+    assert [size for size, _ in layout.heading_candidates] == [18]
+    assert layout.blocks[0].startswith("Chapter 0")
+    doc.close()
+
+
+def test_segments_from_in_memory_upload_match_file(tmp_path):
+    from app.services.ingestion.pdf import _iter_segments
+    pdf = tmp_path / "doc.pdf"
+    _make_pdf(pdf, pages=3)
+    txt = tmp_path / "notes.txt"
+    txt.write_text("First para.\n\nSecond para.")
+
+    for path, content_type in ((pdf, "application/pdf"), (txt, "text/plain")):
+        from_disk = list(_iter_segments(path, content_type))
+        from_memory = list(_iter_segments(path.read_bytes(), content_type))
+        assert [(s.text, s.page_number) for s in from_memory] == [(s.text, s.page_number) for s in from_disk]
+
+
+class _MemoryCollection:
+    """Just enough of a Chroma collection for ingest → re-ingest round trips."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def _match(self, meta, where):
+        (key, cond), = where.items()
+        return meta.get(key) in cond["$in"] if isinstance(cond, dict) else meta.get(key) == cond
+
+    def get(self, where=None, limit=None, include=()):
+        ids = [cid for cid, row in self.rows.items() if where is None or self._match(row["metadata"], where)]
+        ids = ids[:limit] if limit else ids
+        return {
+            "ids": ids,
+            "metadatas": [self.rows[c]["metadata"] for c in ids],
+            "embeddings": [self.rows[c]["embedding"] for c in ids],
+        }
+
+    def add(self, ids, embeddings, documents, metadatas):
+        for cid, emb, doc, meta in zip(ids, embeddings, documents, metadatas):
+            self.rows[cid] = {"embedding": emb, "document": doc, "metadata": meta}
+
+    def update(self, ids, metadatas):
+        for cid, meta in zip(ids, metadatas):
+            self.rows[cid]["metadata"] = meta
+
+    def delete(self, ids):
+        for cid in ids:
+            del self.rows[cid]
+
+
+async def test_new_version_reembeds_only_changed_pages():
+    from app.services.ingestion.pdf import ingest_pdf, ingest_pdf_version
+
+    collection = _MemoryCollection()
+    embedded: list[str] = []
+
+    def embed_late(doc, chunks, starts):
+        embedded.extend(chunks)
+        return [np.full(4, len(embedded), dtype="float32") for _ in chunks]
+
+    embedder = MagicMock()
+    embedder.embed_late.side_effect = embed_late
+    v1 = [FakeSegment(f"Page {i} clause text.", page_number=i) for i in (1, 2, 3)]
+    v2 = [v1[0], FakeSegment("Page 2 amended clause.", page_number=2), v1[2]]
+
+    with (
+        patch("app.services.ingestion.pdf.get_collection", return_value=collection),
+        patch("app.services.ingestion.pdf.get_embedder", return_value=embedder),
+        patch("app.services.ingestion.pdf._iter_segments", side_effect=[iter(v1), iter(v2), iter(v2)]),
+    ):
+        source_id = await ingest_pdf(b"v1", "spec.pdf", "application/pdf")
+        old_ids = set(collection.rows)
+        embedded.clear()
+        summary = await ingest_pdf_version(source_id, b"v2", "spec-v2.pdf", "application/pdf")
+        again = await ingest_pdf_version(source_id, b"v2", "spec-v2.pdf", "application/pdf")
+
+    assert embedded == ["Page 2 amended clause."]
+    assert summary == {
+        "source_id": source_id, "version": 2, "pages_kept": 2, "pages_changed": 1,
+        "pages_removed": 1, "chunks_added": 1, "chunks_removed": 1,
+    }
+    rows = collection.rows
+    assert sorted(r["document"] for r in rows.values()) == [
+        "Page 1 clause text.", "Page 2 amended clause.", "Page 3 clause text.",
+    ]
+    # Unchanged pages keep their chunk ids and embeddings; only metadata moves on.
+    assert len(old_ids & set(rows)) == 2
+    assert {r["metadata"]["version"] for r in rows.values()} == {2}
+    assert {r["metadata"]["filename"] for r in rows.values()} == {"spec-v2.pdf"}
+    assert again["version"] == 2 and again["pages_changed"] == 0   # same bytes: nothing to do
+
+
+
+async def test_failed_version_update_rolls_back_and_retry_applies_it():
+    from app.services.ingestion.pdf import ingest_pdf, ingest_pdf_version
+
+    collection = _MemoryCollection()
+    embedder = MagicMock()
+    embedder.embed_late.side_effect = lambda doc, chunks, starts: [np.ones(4, dtype="float32") for _ in chunks]
+    v1 = [FakeSegment(f"Page {i} clause text.", page_number=i) for i in (1, 2)]
+    v2 = [v1[0], FakeSegment("Page 2 amended clause.", page_number=2)]
+    update = collection.update
+
+    with (
+        patch("app.services.ingestion.pdf.get_collection", return_value=collection),
+        patch("app.services.ingestion.pdf.get_embedder", return_value=embedder),
+        patch("app.services.ingestion.pdf._iter_segments", side_effect=[iter(v1), iter(v2), iter(v2)]),
+    ):
+        source_id = await ingest_pdf(b"v1", "spec.pdf", "application/pdf")
+        v1_rows = {cid: dict(row["metadata"]) for cid, row in collection.rows.items()}
+        collection.update = MagicMock(side_effect=RuntimeError("chroma down"))
+        with pytest.raises(RuntimeError):
+            await ingest_pdf_version(source_id, b"v2", "spec.pdf", "application/pdf")
+        assert {cid: row["metadata"] for cid, row in collection.rows.items()} == v1_rows
+
+        collection.update = update
+        summary = await ingest_pdf_version(source_id, b"v2", "spec.pdf", "application/pdf")
+
+    assert summary["version"] == 2 and summary["pages_changed"] == 1
+    assert sorted(r["document"] for r in collection.rows.values()) == ["Page 1 clause text.", "Page 2 amended clause."]
+    assert len({r["metadata"]["content_hash"] for r in collection.rows.values()}) == 1
+
+
+async def test_concurrent_versions_of_one_source_apply_in_turn():
+    from app.services.ingestion.pdf import ingest_pdf, ingest_pdf_version
+
+    collection = _MemoryCollection()
+    embedder = MagicMock()
+    embedder.embed_late.side_effect = lambda doc, chunks, starts: [np.ones(4, dtype="float32") for _ in chunks]
+    v1 = [FakeSegment(f"Page {i} clause text.", page_number=i) for i in (1, 2)]
+    v2 = [v1[0], FakeSegment("Page 2 amended clause.", page_number=2)]
+    v3 = [v1[0], FakeSegment("Page 2 amended again.", page_number=2)]
+
+    with (
+        patch("app.services.ingestion.pdf.get_collection", return_value=collection),
+        patch("app.services.ingestion.pdf.get_embedder", return_value=embedder),
+        patch("app.services.ingestion.pdf._iter_segments", side_effect=[iter(v1), iter(v2), iter(v3)]),
+    ):
+        source_id = await ingest_pdf(b"v1", "spec.pdf", "application/pdf")
+        first, second = await asyncio.gather(
+            ingest_pdf_version(source_id, b"v2", "spec.pdf", "application/pdf"),
+            ingest_pdf_version(source_id, b"v3", "spec.pdf", "application/pdf"),
+        )
+
+    assert (first["version"], second["version"]) == (2, 3)
+    assert sorted(r["document"] for r in collection.rows.values()) == ["Page 1 clause text.", "Page 2 amended again."]
+    assert {r["metadata"]["version"] for r in collection.rows.values()} == {3}
+
+
+def _make_docx(path):
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    doc = Document()
+    doc.add_paragraph("Preamble before any heading.")
+    doc.add_heading("Chapter One", level=1)
+    para = doc.add_paragraph("Tabbed\tline")
+    run = para.add_run("after break")
+    run.add_break()
+    run.add_break(WD_BREAK.PAGE)
+    para.add_run("end")
+    doc.add_paragraph("")
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Cell text is not a body paragraph"
+    doc.add_heading("", level=2)            # empty heading keeps the previous one
+    linked = doc.add_paragraph("See ")
+    linked._p.append(parse_xml(
+        f'<w:hyperlink {nsdecls("w")}><w:r><w:t>the spec</w:t></w:r></w:hyperlink>'
+    ))
+    doc.add_paragraph("Quoted", style="Quote")
+    doc.add_heading("Appendix", level=2)
+    doc.add_paragraph("Last words.", style="List Bullet")
+    doc.save(str(path))
+
+
+def test_streaming_docx_matches_python_docx(tmp_path):
+    from docx import Document
+    from app.services.ingestion.docx_stream import iter_docx_paragraphs
+    from app.services.ingestion.pdf import _group_docx_paragraphs, _iter_docx_segments
+
+    path = tmp_path / "doc.docx"
+    _make_docx(path)
+
+    expected = [(p.style.name, p.text) for p in Document(str(path)).paragraphs]
+    assert list(iter_docx_paragraphs(path)) == expected
+    assert ("Normal", "See the spec") in expected
+
+    streamed = list(_iter_docx_segments(path))
+    assert streamed == list(_group_docx_paragraphs(expected))
+    assert [s.section_heading for s in streamed] == [None, "Chapter One", "Chapter One", "Appendix"]
+    assert list(_iter_docx_segments(path.read_bytes())) == streamed
@@ -0,0 +1,32 @@
+import pytest
+
+from app.services.ingestion.pipeline import run_pipeline
+
+
+def _chunk(seg, idx):
+    return [{"text": seg}]
+
+
+async def test_stage_error_is_raised_unwrapped_and_on_failure_runs():
+    written, cleaned = [], []
+
+    def embed(batch, segments):
+        if any(c["text"] == "bad" for c in batch):
+            raise RuntimeError("embedder exploded")
+        return [1] * len(batch)
+
+    def write(batch, vectors):
+        written.extend(c["text"] for c in batch)
+        return len(batch)
+
+    with pytest.raises(RuntimeError, match="embedder exploded"):
+        await run_pipeline(["a", "b", "bad", "c"], _chunk, embed, write, batch_size=1,
+                           on_failure=lambda: cleaned.append(list(written)))
+    assert cleaned == [written]
+
+
+async def test_on_failure_not_called_on_success():
+    calls = []
+    stats = await run_pipeline(["a", "b"], _chunk, lambda b, s: [1] * len(b), lambda b, v: len(b),
+                               batch_size=1, on_failure=lambda: calls.append(1))
+    assert stats.written == 2 and calls == []
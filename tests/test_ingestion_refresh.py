@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.ingestion.dedup import chunk_hash, content_hash
+from app.services.ingestion.refresh import RefreshScheduler, _plan, refresh_web_source
+from app.services.ingestion.web import _ScrapeTimes
+
+URL = "https://site.example/page"
+
+
+def _record(i, text):
+    return {"text": text, "metadata": {"url": URL, "title": "T", "domain": "site.example",
+                                       "chunk_index": i, "scraped_at": "now"}}
+
+
+def _collection(chunks, page_text="old page"):
+    """A web collection holding ``chunks`` (a list of texts) for source ``s1``."""
+    col = MagicMock()
+    ids = [f"s1_{i}" for i in range(len(chunks))]
+    metas = [
+        {"source_id": "s1", "url": URL, "chunk_index": i, "content_hash": content_hash(page_text),
+         "chunk_hash": chunk_hash(t), "scraped_at": "2024-01-01T00:00:00+00:00"}
+        for i, t in enumerate(chunks)
+    ]
+
+    def get(where=None, include=(), **kwargs):
+        if where and "source_id" in where:
+            return {"ids": ids, "metadatas": metas, "documents": list(chunks)}
+        if where and "chunk_hash" in where:
+            return {"ids": [], "metadatas": [], "embeddings": []}
+        return {"ids": ids, "metadatas": metas}
+
+    col.get.side_effect = get
+    return col
+
+
+def test_plan_keeps_matching_chunks_and_frees_removed_ids():
+    stored = [("s1_0", chunk_hash("a"), {}), ("s1_1", chunk_hash("b"), {}), ("s1_2", chunk_hash("c"), {})]
+    kept, added, removed = _plan("s1", stored, [_record(0, "new"), _record(1, "a"), _record(2, "c")])
+
+    assert [(cid, rec["text"]) for cid, rec, _ in kept] == [("s1_0", "a"), ("s1_2", "c")]
+    # Index 0 is still held by the moved "a" chunk, so the new chunk gets a distinct id.
+    assert [cid for cid, _, _ in added] == [f"s1_0-{chunk_hash('new')[:8]}"]
+    assert removed == ["s1_1"]
+
+
+async def test_refresh_embeds_only_changed_chunks():
+    col = _collection(["Intro.", "Old body.", "Footer."])
+    embedder = MagicMock()
+    embedder.embed_batch.side_effect = lambda texts: [np.ones(4, dtype="float32") for _ in texts]
+    records = [_record(0, "Intro."), _record(1, "New body."), _record(2, "Footer.")]
+
+    with (
+        patch("app.services.ingestion.refresh.get_collection", return_value=col),
+        patch("app.services.ingestion.refresh.get_embedder", return_value=embedder),
+        patch("app.services.ingestion.web._scrape", new=AsyncMock(return_value={"content": "new page", "title": "T"})),
+        patch("app.services.ingestion.web._chunk_records", new=AsyncMock(return_value=records)),
+    ):
+        summary = await refresh_web_source("s1")
+
+    assert summary == {"source_id": "s1", "status": "updated", "kept": 2, "added": 1, "removed": 0}
+    embedder.embed_batch.assert_called_once_with(["New body."])
+    upsert = col.upsert.call_args[1]
+    assert upsert["ids"] == ["s1_1"] and upsert["documents"] == ["New body."]
+    update = col.update.call_args[1]
+    assert update["ids"] == ["s1_0", "s1_2"]
+    assert {m["content_hash"] for m in update["metadatas"]} == {content_hash("new page")}
+    col.delete.assert_not_called()
+
+
+async def test_refresh_deletes_vanished_chunks_without_embedding():
+    col = _collection(["Intro.", "Gone.", "Footer."])
+    embedder = MagicMock()
+    records = [_record(0, "Intro."), _record(1, "Footer.")]
+
+    with (
+        patch("app.services.ingestion.refresh.get_collection", return_value=col),
+        patch("app.services.ingestion.refresh.get_embedder", return_value=embedder),
+        patch("app.services.ingestion.web._scrape", new=AsyncMock(return_value={"content": "shorter", "title": "T"})),
+        patch("app.services.ingestion.web._chunk_records", new=AsyncMock(return_value=records)),
+    ):
+        summary = await refresh_web_source("s1")
+
+    assert summary["removed"] == 1 and summary["added"] == 0
+    col.delete.assert_called_once_with(ids=["s1_1"])
+    col.upsert.assert_not_called()
+    embedder.embed_batch.assert_not_called()
+
+
+async def test_refresh_unchanged_page_only_touches_timestamps():
+    col = _collection(["Intro."], page_text="same")
+    with (
+        patch("app.services.ingestion.refresh.get_collection", return_value=col),
+        patch("app.services.ingestion.web._scrape", new=AsyncMock(return_value={"content": "same", "title": "T"})),
+        patch("app.services.ingestion.web._chunk_records", new=AsyncMock()) as chunk,
+    ):
+        summary = await refresh_web_source("s1")
+
+    assert summary["status"] == "unchanged"
+    chunk.assert_not_called()
+    assert col.update.call_args[1]["metadatas"][0]["scraped_at"] != "2024-01-01T00:00:00+00:00"
+
+
+async def test_refresh_unknown_source_raises():
+    col = MagicMock()
+    col.get.return_value = {"ids": [], "metadatas": [], "documents": []}
+    with patch("app.services.ingestion.refresh.get_collection", return_value=col):
+        with pytest.raises(ValueError, match="not found"):
+            await refresh_web_source("missing")
+
+
+async def test_scheduler_queues_stale_sources_once():
+    col = _collection(["Intro."])
+    manager = MagicMock()
+    job = MagicMock(done=False)
+    manager.submit.return_value = job
+
+    times = _ScrapeTimes()
+    with (
+        patch("app.services.ingestion.refresh.get_collection", return_value=col),
+        patch("app.services.ingestion.refresh.get_job_manager", return_value=manager),
+        patch("app.services.ingestion.web.scrape_times", times),
+    ):
+        scheduler = RefreshScheduler(max_age_seconds=3600, per_minute=5)
+        assert await scheduler.tick() == ["s1"]
+        assert await scheduler.tick() == []   # still in flight
+        job.done = True
+        assert await scheduler.tick() == ["s1"]
+
+    assert manager.submit.call_args[0][0] == "refresh"
+    col.get.assert_called_once()   # the collection is scanned only to seed the times
+
+
+def test_scrape_times_pick_oldest_stale_sources():
+    times = _ScrapeTimes()
+    times.note("a", "2024-03-01")
+    times.note("b", "2024-01-01")
+    times.note("c", "2024-02-01")
+    times.seed({"a": "2023-12-01", "d": "2025-01-01"})   # an older scan does not roll "a" back
+    times.forget("c")
+    assert times.stale("2024-06-01", 5, skip=set()) == ["b", "a"]
+    assert times.stale("2024-06-01", 1, skip={"b"}) == ["a"]
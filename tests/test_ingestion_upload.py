@@ -0,0 +1,84 @@
+import hashlib
+
+import pytest
+
+from app.services.ingestion.upload import BadUpload, UploadTooLarge, stage_request
+
+
+def _multipart(data: bytes, filename="doc.pdf", content_type="application/pdf") -> tuple[bytes, str]:
+    boundary = "XyZ"
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="note"\r\n\r\nhi\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _request(body: bytes, content_type: str, chunk: int = 100, declare_length: bool = True):
+    from starlette.requests import Request
+
+    pieces = [body[i : i + chunk] for i in range(0, len(body), chunk)]
+    sent = []
+
+    async def receive():
+        piece = pieces[len(sent)]
+        sent.append(piece)
+        return {"type": "http.request", "body": piece, "more_body": len(sent) < len(pieces)}
+
+    headers = [(b"content-type", content_type.encode())]
+    if declare_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive), sent
+
+
+async def test_request_body_is_staged_without_a_second_copy():
+    data = bytes(range(256)) * 20
+    body, ctype = _multipart(data)
+    request, _ = _request(body, ctype)
+    staged = await stage_request(request, max_bytes=10_000, memory_max_bytes=1000)
+    assert staged.path.read_bytes() == data
+    assert (staged.filename, staged.content_type) == ("doc.pdf", "application/pdf")
+    assert staged.sha256 == hashlib.sha256(data).hexdigest()
+    staged.cleanup()
+
+
+async def test_small_request_stays_in_memory():
+    body, ctype = _multipart(b"abc" * 10)
+    request, _ = _request(body, ctype, chunk=7)
+    staged = await stage_request(request, max_bytes=1000, memory_max_bytes=100)
+    assert (staged.data, staged.path) == (b"abc" * 10, None)
+    assert staged.sha256 == hashlib.sha256(b"abc" * 10).hexdigest()
+
+async def test_request_over_declared_length_is_refused_unread():
+    body, ctype = _multipart(b"x" * 200_000)
+    request, sent = _request(body, ctype)
+    with pytest.raises(UploadTooLarge):
+        await stage_request(request, max_bytes=1000)
+    assert sent == []
+
+
+async def test_request_without_length_is_cut_off_at_the_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+    body, ctype = _multipart(b"x" * 5000)
+    request, sent = _request(body, ctype, declare_length=False)
+    with pytest.raises(UploadTooLarge):
+        await stage_request(request, max_bytes=2000, memory_max_bytes=500)
+    assert len(sent) < len(body) // 100
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_request_file_can_be_refused_from_its_headers():
+    body, ctype = _multipart(b"x" * 5000, filename="a.exe", content_type="application/x-msdownload")
+    request, sent = _request(body, ctype)
+
+    def accept(filename, content_type):
+        raise ValueError(content_type)
+
+    with pytest.raises(ValueError, match="x-msdownload"):
+        await stage_request(request, accept=accept)
+    assert len(sent) == 2   # stopped once the part headers were in
+
+    request, _ = _request(b"plain body", "text/plain")
+    with pytest.raises(BadUpload):
+        await stage_request(request)
@@ -1,39 +1,58 @@
 import pytest
 import numpy as np
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from app.services.ingestion.web import _scrape
 
 
-def test_scrape_extracts_content_and_title():
+@pytest.mark.asyncio
+async def test_scrape_extracts_content_and_title():
     fake_html = "<html><head><title>Test Page</title></head><body><p>Hello world content here.</p></body></html>"
 
+    mock_resp = MagicMock()
+    mock_resp.text = fake_html
     with (
-        patch("app.services.ingestion.web.httpx.get") as mock_get,
-        patch("app.services.ingestion.web.trafilatura.extract", return_value="Hello world content here."),
+        patch("app.services.fetch_cache.fetch", new=AsyncMock(return_value=mock_resp)) as mock_fetch,
+        patch("app.services.ingestion.web_parse.trafilatura.extract", return_value="Hello world content here."),
+        patch("app.services.ingestion.web.settings.web_parse_workers", 0),
     ):
-        mock_resp = MagicMock()
-        mock_resp.text = fake_html
-        mock_resp.raise_for_status = MagicMock()
-        mock_get.return_value = mock_resp
-
-        result = _scrape("https://example.com")
+        result = await _scrape("https://example.com")
 
+    mock_fetch.assert_awaited_once()
+    assert mock_fetch.call_args[0][0] == "https://example.com"
     assert result["content"] == "Hello world content here."
     assert result["title"] == "Test Page"
 
 
+@pytest.mark.asyncio
+async def test_page_parsing_runs_on_web_parse_pool():
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.ingestion.web import _chunk_records
+
+    with (
+        ThreadPoolExecutor(max_workers=1) as pool,
+        patch("app.core.executors.get_process_pool", return_value=pool) as mock_pool,
+        patch("app.services.ingestion.web.settings.web_parse_workers", 3),
+    ):
+        records = await _chunk_records("https://example.com/a", {"content": "Some text.", "title": "T"}, "now")
+
+    mock_pool.assert_called_once_with("web_parse", 3)
+    assert records[0]["text"] == "Some text."
+    assert records[0]["metadata"]["domain"] == "example.com"
+
+
 @pytest.mark.asyncio
 async def test_ingest_web_stores_chunks():
     mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
     mock_embedder = MagicMock()
-    mock_embedder.embed_query.return_value = np.array([0.1] * 384, dtype="float32")
+    mock_embedder.embed_batch.return_value = [np.array([0.1] * 384, dtype="float32")]
 
     fake_scraped = {"content": "Article content about AI.", "title": "AI News"}
 
     with (
         patch("app.services.ingestion.web.get_collection", return_value=mock_collection),
         patch("app.services.ingestion.web.get_embedder", return_value=mock_embedder),
-        patch("app.services.ingestion.web._scrape", return_value=fake_scraped),
+        patch("app.services.ingestion.web._scrape", new_callable=AsyncMock, return_value=fake_scraped),
     ):
         from app.services.ingestion.web import ingest_web
         source_id = await ingest_web("https://example.com/article")
@@ -45,3 +64,5 @@ async def test_ingest_web_stores_chunks():
     assert meta["title"] == "AI News"
     assert meta["domain"] == "example.com"
     assert meta["source_id"] == source_id
+    mock_embedder.embed_batch.assert_called_once()
+    mock_embedder.embed_query.assert_not_called()
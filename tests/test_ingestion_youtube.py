@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 
 def test_extract_video_id_from_watch_url():
@@ -29,8 +29,9 @@ def test_chunk_transcript_groups_by_duration():
 @pytest.mark.asyncio
 async def test_ingest_youtube_stores_chunks():
     mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
     mock_embedder = MagicMock()
-    mock_embedder.embed_query.return_value = np.array([0.1] * 384, dtype="float32")
+    mock_embedder.embed_batch.return_value = [np.array([0.1] * 384, dtype="float32")]
 
     fake_transcript = [{"text": "attention is all you need", "start": 0.0, "duration": 30.0}]
     fake_meta = {"title": "Lecture 1", "channel": "MIT OCW", "video_id": "abc123"}
@@ -39,7 +40,7 @@ async def test_ingest_youtube_stores_chunks():
         patch("app.services.ingestion.youtube.get_collection", return_value=mock_collection),
         patch("app.services.ingestion.youtube.get_embedder", return_value=mock_embedder),
         patch("app.services.ingestion.youtube._fetch_transcript", return_value=fake_transcript),
-        patch("app.services.ingestion.youtube._get_video_metadata", return_value=fake_meta),
+        patch("app.services.ingestion.youtube._get_video_metadata", new_callable=AsyncMock, return_value=fake_meta),
         patch("app.services.ingestion.youtube._extract_video_id", return_value="abc123"),
     ):
         from app.services.ingestion.youtube import ingest_youtube
@@ -51,3 +52,86 @@ async def test_ingest_youtube_stores_chunks():
     assert meta["title"] == "Lecture 1"
     assert meta["channel"] == "MIT OCW"
     assert meta["source_id"] == source_id
+    mock_embedder.embed_batch.assert_called_once()
+    mock_embedder.embed_query.assert_not_called()
+
+
+def test_extract_video_id_from_path_styles():
+    from app.services.ingestion.youtube import _extract_video_id
+    assert _extract_video_id("https://www.youtube.com/shorts/abc123") == "abc123"
+    assert _extract_video_id("https://www.youtube-nocookie.com/embed/abc123?start=5") == "abc123"
+    with pytest.raises(ValueError):
+        _extract_video_id("https://www.youtube.com/@mitocw")
+
+
+def test_collection_ref_recognises_playlists_and_channels():
+    from app.services.ingestion.youtube import collection_ref
+    assert collection_ref("https://www.youtube.com/playlist?list=PL123") == ("playlist", "PL123")
+    assert collection_ref("https://m.youtube.com/@mitocw/videos") == ("channel", "@mitocw")
+    assert collection_ref("https://www.youtube.com/channel/UCabc") == ("channel", "UCabc")
+    assert collection_ref("https://www.youtube.com/c/Lectures") == ("channel", "/c/Lectures")
+    assert collection_ref("https://www.youtube.com/watch?v=abc&list=PL123") is None
+    assert collection_ref("https://example.com/playlist?list=PL123") is None
+
+
+async def test_playlist_ingests_videos_in_shared_batches(tmp_path):
+    import json
+    from app.services.ingestion import youtube
+    from app.services.ingestion.bulk import ingest_youtube_collection
+
+    for vid, text in (("v1", "first lecture"), ("v2", "second lecture")):
+        (tmp_path / f"{vid}.json").write_text(json.dumps([{"text": text, "start": 0.0, "duration": 10.0}]))
+    (tmp_path / "collections.json").write_text(json.dumps({"PL1": ["v1", "v2", "missing", "v1"]}))
+
+    collection = MagicMock()
+    collection.get.return_value = {"ids": [], "metadatas": [], "embeddings": []}
+    embedder = MagicMock()
+    embedder.embed_batch.side_effect = lambda texts: [np.ones(4, dtype="float32") for _ in texts]
+    stages = {}
+
+    youtube.set_youtube_provider(youtube.LocalYouTubeProvider(tmp_path))
+    try:
+        with (
+            patch("app.services.ingestion.bulk.get_collection", return_value=collection),
+            patch("app.services.ingestion.bulk.get_embedder", return_value=embedder),
+            patch("app.services.ingestion.youtube._get_video_metadata", new_callable=AsyncMock,
+                  side_effect=lambda vid, url: {"title": vid, "channel": "Ch", "video_id": vid}),
+            patch("app.services.ingestion.youtube.settings.youtube_transcript_rate", 0),
+        ):
+            results = await ingest_youtube_collection(
+                "https://www.youtube.com/playlist?list=PL1", progress=lambda s, n: stages.__setitem__(s, n)
+            )
+    finally:
+        youtube.set_youtube_provider(None)
+
+    assert [r["status"] for r in results] == ["ingested", "ingested", "failed"]
+    assert "No local transcript" in results[2]["error"]
+    assert stages["discover"] == 3
+    collection.add.assert_called_once()       # both videos land in one batch
+    embedder.embed_batch.assert_called_once()
+
+
+async def test_live_provider_lists_channel_uploads_playlist():
+    from app.services.ingestion.youtube import LiveYouTubeProvider
+
+    page = MagicMock(text='..."externalId":"UC' + "x" * 22 + '"...')
+    playlist = MagicMock(video_urls=["https://www.youtube.com/watch?v=a1", "https://www.youtube.com/watch?v=b2"])
+    with (
+        patch("app.services.ingestion.youtube.fetch", new=AsyncMock(return_value=page)),
+        patch("pytube.Playlist", return_value=playlist) as mock_playlist,
+    ):
+        ids = await LiveYouTubeProvider().list_videos("https://www.youtube.com/@lectures")
+
+    assert ids == ["a1", "b2"]
+    assert mock_playlist.call_args[0][0] == "https://www.youtube.com/playlist?list=UU" + "x" * 22
+
+
+async def test_transcript_rate_limiter_spaces_calls():
+    import asyncio
+    import time
+    from app.services.ingestion.youtube import _RateLimiter
+
+    limiter = _RateLimiter()
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.wait(50) for _ in range(3)))
+    assert time.monotonic() - start >= 0.039
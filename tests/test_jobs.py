@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.services.jobs import JobManager, JobStatus
+
+
+async def _wait(manager, job_id):
+    return [snapshot async for snapshot in manager.watch(job_id)][-1]
+
+
+async def test_job_reports_progress_and_result():
+    manager = JobManager({"web": 1})
+
+    async def work(progress):
+        progress("fetch", 1)
+        progress("write", 3)
+        return "src-1"
+
+    job = manager.submit("web", "https://example.com", work)
+    assert job.status is JobStatus.queued
+
+    final = await _wait(manager, job.id)
+    assert final["status"] == "succeeded"
+    assert final["source_id"] == "src-1"
+    assert final["stages"] == {"fetch": 1, "write": 3}
+    await manager.stop()
+
+
+async def test_failed_job_records_error_and_runs_cleanup():
+    manager = JobManager({"pdf": 1})
+    cleaned = []
+
+    async def work(progress):
+        raise ValueError("bad file")
+
+    job = manager.submit("pdf", "x.pdf", work, cleanup=lambda: cleaned.append(True))
+    final = await _wait(manager, job.id)
+    assert final["status"] == "failed"
+    assert final["error"] == "bad file"
+    assert cleaned == [True]
+    await manager.stop()
+
+
+async def test_concurrency_is_limited_per_kind():
+    manager = JobManager({"pdf": 1, "web": 2})
+    release = asyncio.Event()
+    active = {"pdf": 0, "web": 0}
+    peak = {"pdf": 0, "web": 0}
+
+    def make(kind):
+        async def work(progress):
+            active[kind] += 1
+            peak[kind] = max(peak[kind], active[kind])
+            await release.wait()
+            active[kind] -= 1
+            return kind
+        return work
+
+    jobs = [manager.submit(kind, kind, make(kind)) for kind in ("pdf", "pdf", "web", "web", "web")]
+    await asyncio.sleep(0.01)
+
+    metrics = manager.metrics()["queues"]
+    assert metrics["pdf"] == {"queued": 1, "running": 1, "limit": 1}
+    assert metrics["web"] == {"queued": 1, "running": 2, "limit": 2}
+
+    release.set()
+    for job in jobs:
+        await _wait(manager, job.id)
+    assert peak == {"pdf": 1, "web": 2}
+    assert manager.metrics()["jobs"]["succeeded"] == 5
+    await manager.stop()
+
+
+async def test_retention_drops_oldest_finished_jobs():
+    manager = JobManager({"web": 1}, retain=2)
+
+    async def work(progress):
+        return "ok"
+
+    ids = []
+    for _ in range(3):
+        job = manager.submit("web", "u", work)
+        await _wait(manager, job.id)
+        ids.append(job.id)
+    manager.submit("web", "u", work)
+
+    assert manager.get(ids[0]) is None
+    assert manager.get(ids[2]) is not None
+    await manager.stop()
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        JobManager({"web": 1}).submit("ftp", "u", None)
@@ -0,0 +1,167 @@
+import numpy as np
+import pytest
+
+from app.core.local_index import LocalIndexClient
+
+
+def _vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def _collection(tmp_path, **kwargs):
+    client = LocalIndexClient(tmp_path / "index", **kwargs)
+    return client, client.get_or_create_collection("pdf_chunks", metadata={"hnsw:space": "cosine"})
+
+
+def _fill(col, vectors, prefix="s"):
+    col.add(
+        ids=[f"{prefix}_{i}" for i in range(len(vectors))],
+        embeddings=vectors.tolist(),
+        documents=[f"doc {i}" for i in range(len(vectors))],
+        metadatas=[{"source_id": f"{prefix}{i % 3}", "chunk_index": i} for i in range(len(vectors))],
+    )
+
+
+def test_query_returns_exact_cosine_neighbours(tmp_path):
+    client, col = _collection(tmp_path)
+    vectors = _vectors(50)
+    _fill(col, vectors)
+
+    res = col.query(query_embeddings=[vectors[7].tolist()], n_results=3,
+                    include=["documents", "metadatas", "distances", "embeddings"])
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(unit @ unit[7]))[:3]
+    assert res["ids"][0] == [f"s_{i}" for i in expected]
+    assert res["distances"][0][0] == pytest.approx(0.0, abs=1e-3)
+    assert res["documents"][0][0] == "doc 7"
+    assert res["metadatas"][0][0] == {"source_id": "s1", "chunk_index": 7}
+    assert res["embeddings"][0].shape == (3, 16)
+    client.close()
+
+
+def test_where_filters_and_get(tmp_path):
+    client, col = _collection(tmp_path)
+    _fill(col, _vectors(30))
+
+    res = col.query(query_embeddings=[_vectors(1, seed=9)[0].tolist()], n_results=30,
+                    where={"source_id": {"$in": ["s0", "s2"]}})
+    assert res["ids"][0] and all(m["source_id"] in ("s0", "s2") for m in res["metadatas"][0])
+    assert len(res["ids"][0]) == 20
+
+    assert len(col.get(where={"source_id": "s1"}, include=[])["ids"]) == 10
+    assert col.get(where={"source_id": "s1"}, limit=2, include=[])["ids"] == ["s_1", "s_4"]
+    got = col.get(where={"$and": [{"source_id": "s1"}, {"chunk_index": {"$gte": 20}}]}, include=["metadatas"])
+    assert got["ids"] == ["s_22", "s_25", "s_28"]
+    assert col.get(ids=["s_3", "missing", "s_0"], include=["documents"])["documents"] == ["doc 3", "doc 0"]
+    assert col.get(where={"source_id": {"$ne": "s0"}}, include=[])["ids"][:2] == ["s_1", "s_2"]
+    client.close()
+
+
+def test_add_skips_existing_update_merges_upsert_replaces(tmp_path):
+    client, col = _collection(tmp_path)
+    vectors = _vectors(3)
+    _fill(col, vectors)
+
+    col.add(ids=["s_0"], embeddings=[vectors[2].tolist()], documents=["other"], metadatas=[{"source_id": "x"}])
+    assert col.get(ids=["s_0"])["documents"] == ["doc 0"]
+
+    col.update(ids=["s_0", "nope"], metadatas=[{"scraped_at": "now"}, {"a": 1}])
+    assert col.get(ids=["s_0"])["metadatas"] == [{"source_id": "s0", "chunk_index": 0, "scraped_at": "now"}]
+    assert col.count() == 3
+
+    col.upsert(ids=["s_1", "s_9"], embeddings=vectors[:2].tolist(), documents=["new 1", "new 9"],
+               metadatas=[{"source_id": "y"}, {"source_id": "y"}])
+    assert col.get(where={"source_id": "y"})["documents"] == ["new 1", "new 9"]
+    assert col.get(where={"source_id": "s1"}, include=[])["ids"] == []
+    client.close()
+
+
+def test_delete_and_reopen_persists_rows(tmp_path):
+    client, col = _collection(tmp_path)
+    vectors = _vectors(40)
+    _fill(col, vectors)
+    col.delete(where={"source_id": "s0"})
+    col.delete(ids=["s_1"])
+    col.update(ids=["s_2"], metadatas=[{"version": 2}])
+    before = col.query(query_embeddings=[vectors[5].tolist()], n_results=5)
+    client.close()
+
+    # A write cut off mid-line is dropped on reopen, and later writes stay readable.
+    with open(tmp_path / "index" / "pdf_chunks" / "rows.jsonl", "a") as fh:
+        fh.write('{"s": 99, "id": "torn"')
+
+    client, col = _collection(tmp_path)
+    assert col.count() == 40 - 14 - 1
+    assert col.query(query_embeddings=[vectors[5].tolist()], n_results=5)["ids"] == before["ids"]
+    assert col.get(ids=["s_2"])["metadatas"][0]["version"] == 2
+    col.add(ids=["later"], embeddings=[vectors[0].tolist()], documents=["d"], metadatas=[{}])
+    client.close()
+
+    client, col = _collection(tmp_path)
+    assert col.count() == 26 and col.get(ids=["later"], include=[])["ids"] == ["later"]
+    client.close()
+
+
+def test_compact_drops_deleted_rows(tmp_path):
+    client, col = _collection(tmp_path)
+    vectors = _vectors(3000)
+    _fill(col, vectors)
+    col.delete(ids=[f"s_{i}" for i in range(2500)])
+    col.compact()
+    assert col.count() == 500
+    res = col.query(query_embeddings=[vectors[2900].tolist()], n_results=1)
+    assert res["ids"] == [["s_2900"]]
+    client.close()
+
+    client, col = _collection(tmp_path)
+    assert col.count() == 500
+    client.close()
+
+
+def test_partitioned_search_matches_exact_on_clustered_data(tmp_path):
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(40, 32))
+    vectors = (centers[rng.integers(0, 40, 4000)] + 0.1 * rng.normal(size=(4000, 32))).astype(np.float32)
+    client = LocalIndexClient(tmp_path / "index", partition_min=1000, nprobe=8)
+    col = client.get_or_create_collection("web_chunks")
+    exact = LocalIndexClient(tmp_path / "exact", partition_min=0).get_or_create_collection("web_chunks")
+    for c in (col, exact):
+        c.add(ids=[str(i) for i in range(4000)], embeddings=vectors, documents=[""] * 4000,
+              metadatas=[{"i": i} for i in range(4000)])
+
+    queries = vectors[rng.integers(0, 4000, 20)] + 0.05 * rng.normal(size=(20, 32))
+    got = col.query(query_embeddings=queries, n_results=10, include=[])["ids"]
+    want = exact.query(query_embeddings=queries, n_results=10, include=[])["ids"]
+    recall = np.mean([len(set(g) & set(w)) / 10 for g, w in zip(got, want)])
+    assert col._centroids is not None
+    assert recall >= 0.9
+
+
+def test_index_directory_is_locked_to_one_owner(tmp_path):
+    client, col = _collection(tmp_path)
+    with pytest.raises(RuntimeError):
+        LocalIndexClient(tmp_path / "index").get_or_create_collection("pdf_chunks")
+    client.close()
+
+
+def test_compact_interrupted_before_switch_keeps_old_generation(tmp_path, monkeypatch):
+    client, col = _collection(tmp_path)
+    vectors = _vectors(3000)
+    _fill(col, vectors)
+    col.delete(ids=[f"s_{i}" for i in range(2500)])
+    monkeypatch.setattr(col, "_write_info", lambda: (_ for _ in ()).throw(OSError("disk full")))
+    with pytest.raises(OSError):
+        col.compact()
+    client.close()
+
+    client, col = _collection(tmp_path)    # reopening compacts the mostly-deleted collection again
+    assert col.count() == 500
+    assert col.query(query_embeddings=[vectors[2900].tolist()], n_results=1)["ids"] == [["s_2900"]]
+    client.close()
+
+    files = sorted(p.name for p in (tmp_path / "index" / "pdf_chunks").iterdir())
+    assert files == [".lock", "info.json", "rows.1.jsonl", "vectors.1.f16"]
+    client, col = _collection(tmp_path)
+    assert col.count() == 500
+    assert col.query(query_embeddings=[vectors[2900].tolist()], n_results=1)["ids"] == [["s_2900"]]
+    client.close()
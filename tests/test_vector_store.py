@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core import vector_store
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    vector_store.reset_vector_store_stats()
+    yield
+    vector_store.reset_vector_store_stats()
+
+
+async def test_calls_run_off_the_event_loop_and_resolve_names():
+    collection = MagicMock()
+    seen = {}
+
+    def query(**kwargs):
+        seen["thread"] = threading.current_thread().name
+        return {"ids": [["a"]]}
+
+    collection.query.side_effect = query
+    with patch("app.core.vector_store.get_collection", return_value=collection) as mock_get:
+        result = await vector_store.query("pdf_chunks", query_embeddings=[[0.1]], n_results=3)
+
+    assert result == {"ids": [["a"]]}
+    mock_get.assert_called_once_with("pdf_chunks")
+    collection.query.assert_called_once_with(query_embeddings=[[0.1]], n_results=3)
+    assert seen["thread"].startswith("chroma")
+
+
+async def test_slow_calls_do_not_serialize():
+    collection = MagicMock()
+    collection.query.side_effect = lambda **kw: time.sleep(0.2) or {}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(vector_store.query(collection, n_results=1) for _ in range(4)))
+    assert time.perf_counter() - start < 0.6
+
+
+async def test_latency_counters_per_operation():
+    collection = MagicMock()
+    collection.delete.side_effect = RuntimeError("boom")
+
+    await vector_store.get(collection, ids=["a"])
+    await vector_store.get(collection, ids=["b"])
+    with pytest.raises(RuntimeError):
+        await vector_store.delete(collection, ids=["a"])
+    vector_store.call(collection, "add", ids=["c"])
+
+    stats = vector_store.vector_store_stats()
+    assert stats["get"]["calls"] == 2 and stats["get"]["errors"] == 0
+    assert stats["delete"] == {**stats["delete"], "calls": 1, "errors": 1}
+    assert stats["add"]["calls"] == 1
+    assert set(stats["get"]) == {"calls", "errors", "mean_ms", "p50_ms", "p95_ms", "max_ms"}
+
+
+async def test_failed_call_forgets_cached_handle():
+    collection = MagicMock()
+    collection.get.side_effect = ValueError("collection does not exist")
+    with (
+        patch("app.core.vector_store.get_collection", return_value=collection),
+        patch("app.core.vector_store.forget_collection") as mock_forget,
+        pytest.raises(ValueError),
+    ):
+        await vector_store.get("web_chunks", ids=["x"])
+    mock_forget.assert_called_once_with("web_chunks")